@@ -24,7 +24,11 @@ from utils.login_devices import ensure_login_devices_table
 from utils.engagement_tables import ensure_engagement_tables
 from utils.enterprise_tables import ensure_enterprise_tables
 from utils.api_keys import ensure_api_key_columns, ensure_api_keys_table
+from utils.redirect_read_model import ensure_redirect_table
+from utils.scan_rollups import ensure_scan_rollup_tables
+from utils.bulk_jobs import ensure_bulk_job_table, recover_bulk_jobs
 from utils.tenant import resolve_tenant_context
+from utils.render_pool import RenderPoolBusy
 
 # -------------------------------------------------------------------------
 # 1️⃣ .env laden (muss ganz oben sein!)
@@ -43,6 +47,10 @@ ensure_engagement_tables(engine)
 ensure_enterprise_tables(engine)
 ensure_api_key_columns(engine)
 ensure_api_keys_table(engine)
+ensure_redirect_table(engine)
+ensure_scan_rollup_tables(engine)
+ensure_bulk_job_table(engine)
+recover_bulk_jobs(engine)
 
 # -------------------------------------------------------------------------
 # 3️⃣ Templates & Static
@@ -160,6 +168,8 @@ from routes import team
 from routes import sla
 from routes import api
 from routes import legal
+from routes import blobs
+from routes import qr_image
 
 # Individual QR Routes
 from routes.qr import (
@@ -196,6 +206,8 @@ app.include_router(team.router)
 app.include_router(sla.router)
 app.include_router(api.router)
 app.include_router(legal.router)
+app.include_router(blobs.router)
+app.include_router(qr_image.router)
 
 # zentrale QR-Erstellung
 app.include_router(qr_base.router)
@@ -335,9 +347,73 @@ def chrome_devtools_probe() -> Response:
     # Chrome probes this endpoint locally; 204 avoids noisy 404 logs.
     return Response(status_code=204)
 
+# -------------------------------------------------------------------------
+# 6.5️⃣ Render-Pool voll -> 503 statt blockiertem Event-Loop
+# -------------------------------------------------------------------------
+@app.exception_handler(RenderPoolBusy)
+async def render_pool_busy(request: Request, exc: RenderPoolBusy) -> Response:
+    return Response(
+        content="QR-Rendering ist gerade ausgelastet. Bitte gleich erneut versuchen.",
+        status_code=503,
+        headers={"Retry-After": "2"},
+        media_type="text/plain; charset=utf-8",
+    )
+
 # -------------------------------------------------------------------------
 # 7️⃣ Debug Route
 # -------------------------------------------------------------------------
 @app.get("/debug/routes")
 def debug_routes() -> List[Dict[str, str]]:
     return [{"path": r.path, "name": r.name} for r in app.routes]
+
+
+@app.get("/debug/perf", include_in_schema=False)
+def debug_perf() -> Dict[str, object]:
+    # Zähler der Resolver-Hot-Path-Komponenten (Cache-Größe, Ingest-Backlog, Shield)
+    from utils.blob_storage import blob_store
+    from utils.bulk_jobs import bulk_runner
+    from utils.download_artifacts import artifact_cache
+    from utils.logo_cache import logo_cache
+    from utils.rate_shield import shield_stats
+    from utils.render_cache import render_cache
+    from utils.render_pool import render_pool
+    from utils.resolve_cache import resolve_cache
+    from utils.scan_ingest import scan_ingestor
+    from utils.user_agent import classifier_stats
+    return {
+        "resolve_cache": resolve_cache.stats(),
+        "scan_ingest": scan_ingestor.stats(),
+        "download_artifacts": artifact_cache.stats(),
+        "resolve_shield": shield_stats(),
+        "user_agent": classifier_stats(),
+        "render_cache": render_cache.stats(),
+        "render_pool": render_pool.stats(),
+        "logo_cache": logo_cache.stats(),
+        "bulk_jobs": bulk_runner.stats(),
+        "blob_store": blob_store.stats(),
+    }
+
+
+@app.on_event("shutdown")
+def drain_scan_ingest() -> None:
+    # Gepufferte Scans/Visits vor dem Beenden wegschreiben
+    from utils.scan_ingest import scan_ingestor
+    scan_ingestor.shutdown()
+
+
+@app.on_event("shutdown")
+def stop_render_pool() -> None:
+    from utils.render_pool import render_pool
+    render_pool.shutdown()
+
+
+@app.on_event("shutdown")
+def stop_bulk_jobs() -> None:
+    from utils.bulk_jobs import bulk_runner
+    bulk_runner.shutdown()
+
+
+@app.on_event("shutdown")
+def flush_blob_uploads() -> None:
+    from utils.blob_storage import blob_store
+    blob_store.shutdown()
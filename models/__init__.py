@@ -21,6 +21,9 @@ from .workspace_qr import WorkspaceQR
 from .workspace_member import WorkspaceMember
 from .workspace import Workspace
 from .api_key import APIKey
+from .qr_redirect import QRRedirect
+from .scan_rollup import ScanRollupDaily, ScanRollupHourly, ScanRollupState
+from .bulk_job import QRBulkJob
 
 __all__ = [
     "User",
@@ -40,4 +43,9 @@ __all__ = [
     "WorkspaceMember",
     "Workspace",
     "APIKey",
+    "QRRedirect",
+    "ScanRollupHourly",
+    "ScanRollupDaily",
+    "ScanRollupState",
+    "QRBulkJob",
 ]
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import DateTime, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base
+
+
+class QRBulkJob(Base):
+    """
+    Fortschritt eines Bulk-Jobs (CSV/NDJSON -> QR-Codes + ZIP).
+    Die gerenderten Dateien und das Manifest liegen im Job-Verzeichnis
+    (BULK_JOB_DIR/<id>), nicht in der Datenbank.
+    """
+    __tablename__ = "qr_bulk_jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    # queued | running | done | failed | expired (Exportdateien nach BULK_RETENTION_HOURS gelöscht)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default="queued")
+    formats: Mapped[str] = mapped_column(String(32), nullable=False, default="png")
+    total: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rendered_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    failed_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    error: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
+    finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
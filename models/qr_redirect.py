@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base
+
+
+class QRRedirect(Base):
+    """
+    Denormalisiertes Read-Model für GET /d/{slug}.
+    Enthält nur, was der Resolver braucht; wird beim Schreiben von QRCode
+    in derselben Transaktion gepflegt (siehe models/qrcode.py Events).
+    """
+    __tablename__ = "qr_redirects"
+
+    slug: Mapped[str] = mapped_column(String(50), primary_key=True)
+    qr_id: Mapped[int] = mapped_column(ForeignKey("qr_codes.id", ondelete="CASCADE"), index=True)
+    user_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    type: Mapped[str] = mapped_column(String(50), nullable=False)
+    active: Mapped[bool] = mapped_column(Boolean, default=True)
+    # Routing-Daten (Ziel-URL, Regeln, ICS, …) ohne Design – AES-256-GCM (v2)
+    payload: Mapped[Optional[str]] = mapped_column(Text)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), default=lambda: datetime.now(timezone.utc)
+    )
@@ -129,19 +129,24 @@ class QRCode(Base):
     # 🔐 Verschlüsselungs-Methoden
     # ---------------------------------------------------------------------
     
-    def get_data(self) -> Optional[Dict[str, Any]]:
+    def get_data(self, upgrade: bool = True) -> Optional[Dict[str, Any]]:
         """
         Gibt die entschlüsselten QR-Daten zurück.
         Cached das Ergebnis für die aktuelle Instanz.
+        upgrade=False verhindert das Umschreiben von v1-Blobs (z. B. während eines Flushs).
         """
         if self._decrypted_data is not None:
             return self._decrypted_data
         
         if self.encrypted_content:
-            from utils.encryption import decrypt_qr_content
+            from utils.encryption import decrypt_qr_content, encrypt_qr_content, is_legacy_ciphertext
             decrypted = decrypt_qr_content(self.encrypted_content)
             if decrypted is not None:
                 self._decrypted_data = decrypted
+                # Lazy-Upgrade: v1-Blob (PBKDF2 pro Lesezugriff) auf v2 umschreiben;
+                # wird mit dem nächsten Commit der Session gespeichert.
+                if upgrade and decrypted and is_legacy_ciphertext(self.encrypted_content):
+                    self.encrypted_content = encrypt_qr_content(decrypted)
                 return self._decrypted_data
         
         # Fallback: altes unverschlüsseltes data Feld
@@ -165,8 +170,10 @@ class QRCode(Base):
         Verschlüsselt und speichert die QR-Daten.
         """
         from utils.encryption import encrypt_qr_content
+        from utils.resolve_cache import invalidate_resolved_qr
         self.encrypted_content = encrypt_qr_content(data)
         self._decrypted_data = data
+        invalidate_resolved_qr(self.slug)
         
         # Altes data Feld leeren (veraltet)
         if hasattr(self, 'data'):
@@ -203,6 +210,59 @@ def set_unique_slug(mapper: Mapper, connection: Connection, target: Any) -> None
         target.slug = uuid.uuid4().hex[:10]
 
 
+# =============================================================================
+# ⚙️ Event: Resolver-Cache bei Änderung/Löschung invalidieren
+# =============================================================================
+
+@event.listens_for(QRCode, "after_insert")  # type: ignore[misc]
+@event.listens_for(QRCode, "after_update")  # type: ignore[misc]
+@event.listens_for(QRCode, "after_delete")  # type: ignore[misc]
+def invalidate_resolver_cache(mapper: Mapper, connection: Connection, target: Any) -> None:
+    """
+    Jede geschriebene Änderung (Inhalt, active-Flag, Typ, Slug) und jedes Löschen
+    entfernt den Slug aus dem Resolver-Cache von /d/{slug}; neue Slugs fallen
+    aus dem Negativ-Cache.
+    """
+    from sqlalchemy import inspect as sa_inspect
+    from utils.resolve_cache import invalidate_resolved_qr
+
+    invalidate_resolved_qr(getattr(target, "slug", None))
+    for previous in sa_inspect(target).attrs.slug.history.deleted:
+        invalidate_resolved_qr(previous)
+
+
+# =============================================================================
+# ⚙️ Event: Read-Model qr_redirects in derselben Transaktion pflegen
+# =============================================================================
+
+_REDIRECT_FIELDS = ("slug", "type", "active", "user_id", "encrypted_content")
+
+
+@event.listens_for(QRCode, "after_insert")  # type: ignore[misc]
+def insert_redirect_row(mapper: Mapper, connection: Connection, target: Any) -> None:
+    from utils.redirect_read_model import sync_redirect
+    sync_redirect(connection, target)
+
+
+@event.listens_for(QRCode, "after_update")  # type: ignore[misc]
+def update_redirect_row(mapper: Mapper, connection: Connection, target: Any) -> None:
+    """Nur neu schreiben, wenn sich ein für den Resolver relevantes Feld geändert hat."""
+    from sqlalchemy import inspect as sa_inspect
+    from utils.redirect_read_model import sync_redirect
+
+    attrs = sa_inspect(target).attrs
+    if not any(attrs[name].history.has_changes() for name in _REDIRECT_FIELDS):
+        return
+    previous = attrs.slug.history.deleted
+    sync_redirect(connection, target, previous_slug=previous[0] if previous else None)
+
+
+@event.listens_for(QRCode, "after_delete")  # type: ignore[misc]
+def delete_redirect_row(mapper: Mapper, connection: Connection, target: Any) -> None:
+    from utils.redirect_read_model import delete_redirect
+    delete_redirect(connection, getattr(target, "slug", None))
+
+
 # =============================================================================
 # ⚙️ Event: Migration von altem 'data' Feld zu 'encrypted_content'
 # =============================================================================
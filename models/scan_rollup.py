@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from database import Base
+
+
+class _ScanRollupColumns:
+    """
+    Gemeinsame Spalten der Scan-Rollups. Schlüssel:
+    (qr_id, bucket, device_class, is_test, is_bot); `bucket` ist naive UTC.
+    """
+
+    qr_id: Mapped[int] = mapped_column(
+        ForeignKey("qr_codes.id", ondelete="CASCADE"), primary_key=True
+    )
+    bucket: Mapped[datetime] = mapped_column(DateTime, primary_key=True, index=True)
+    # ios | android | desktop | other | bot (Bot/Test-Tool ohne erkennbares Gerät)
+    device_class: Mapped[str] = mapped_column(String(16), primary_key=True)
+    is_test: Mapped[bool] = mapped_column(Boolean, primary_key=True)
+    is_bot: Mapped[bool] = mapped_column(Boolean, primary_key=True)
+    scans: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class ScanRollupHourly(_ScanRollupColumns, Base):
+    """Scans pro QR-Code und Stunde (Heatmap, Vorzeitraum-Vergleich)."""
+
+    __tablename__ = "qr_scan_rollup_hourly"
+
+
+class ScanRollupDaily(_ScanRollupColumns, Base):
+    """Scans pro QR-Code und Tag (Verläufe, Summen, Geräte, Top-10)."""
+
+    __tablename__ = "qr_scan_rollup_daily"
+
+
+class ScanRollupState(Base):
+    """
+    Einzeilige Markierung (id=1): die Rollups sind aus qr_scans aufgebaut.
+    Bis dahin liest das Dashboard die Rohdaten – frisch angelegte Rollup-
+    Tabellen sind leer, die Historie käme erst mit dem Backfill.
+    """
+
+    __tablename__ = "qr_scan_rollup_state"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    backfilled_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
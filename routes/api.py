@@ -3,25 +3,25 @@ from __future__ import annotations
 import os
 import uuid
 from datetime import datetime, timezone
-from pathlib import Path
 from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi import APIRouter, Depends, File, Form, Header, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
 from database import get_db
 from models.api_key import APIKey
+from models.bulk_job import QRBulkJob
 from models.qrcode import QRCode
 from models.user import User
 from utils.api_keys import hash_api_key
-from utils.qr_config import get_qr_style
-from utils.qr_generator import generate_qr_png
+from utils.bulk_jobs import BulkInputError, bulk_runner, iter_job_archive, parse_formats, parse_rows, serialize_job
+from utils.resolve_cache import invalidate_resolved_qr
+from utils.qr_image import qr_image_path
 
 router = APIRouter(prefix="/api/v1", tags=["Public API"])
 
-QR_DIR = Path("static/generated_qr")
-QR_DIR.mkdir(parents=True, exist_ok=True)
 
 ALLOWED_TYPES = {
     "url",
@@ -157,33 +157,17 @@ def create_qr(
     slug = uuid.uuid4().hex[:10]
     dynamic_url = _build_dynamic_url(request, slug)
 
-    style_conf = get_qr_style(payload.style)
-    result = generate_qr_png(
-        payload=dynamic_url,
-        size=600,
-        fg=style_conf["fg"],
-        bg=style_conf["bg"],
-        gradient=style_conf.get("gradient"),
-        frame_color=style_conf.get("frame_color"),
-        module_style=style_conf.get("module_style"),
-        eye_style=style_conf.get("eye_style"),
-    )
-    qr_bytes = result if isinstance(result, bytes) else result.get("bytes", b"")
-    qr_file = QR_DIR / f"{qr_type}_{slug}.png"
-    with open(qr_file, "wb") as f:
-        f.write(qr_bytes)
-
     qr = QRCode(
         user_id=user.id,
         slug=slug,
         type=qr_type,
         title=payload.title or f"{qr_type.upper()} QR",
         dynamic_url=dynamic_url,
-        image_path=str(qr_file),
         style=payload.style,
         active=payload.active,
     )
     qr.set_data(payload.data or {})
+    qr.image_path = qr_image_path(qr)
     db.add(qr)
     db.commit()
     db.refresh(qr)
@@ -221,8 +205,10 @@ def update_qr(
         qr.active = payload.active
     if payload.data is not None:
         qr.set_data(payload.data)
+    qr.image_path = qr_image_path(qr)
 
     db.commit()
+    invalidate_resolved_qr(qr.slug)
     db.refresh(qr)
     return _serialize_qr(qr)
 
@@ -238,4 +224,75 @@ def delete_qr(
         raise HTTPException(status_code=404, detail="QR not found")
     db.delete(qr)
     db.commit()
+    invalidate_resolved_qr(slug)
     return {"ok": True, "slug": slug}
+
+
+@router.post("/bulk-jobs", status_code=202)
+async def create_bulk_job(
+    request: Request,
+    file: UploadFile = File(...),
+    formats: str = Form("png"),
+    db: Session = Depends(get_db),
+    user=Depends(get_api_user),
+):
+    """CSV/NDJSON mit Spalten type, title, style, data -> Hintergrund-Job, Fortschritt per GET."""
+    try:
+        wanted = parse_formats(formats)
+        rows = parse_rows(await file.read(), file.filename or "")
+    except BulkInputError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    for row in rows:
+        if not row.get("error") and row["type"] not in ALLOWED_TYPES:
+            row["error"] = f"Unsupported qr type: {row['type']}"
+
+    job = QRBulkJob(
+        id=uuid.uuid4().hex,
+        user_id=user.id,
+        status="queued",
+        formats=",".join(wanted),
+        total=len(rows),
+    )
+    db.add(job)
+    db.commit()
+    bulk_runner.submit(job.id, rows, _build_dynamic_url(request, ""))
+
+    result = serialize_job(job)
+    result["poll_url"] = f"/api/v1/bulk-jobs/{job.id}"
+    result["archive_url"] = f"/api/v1/bulk-jobs/{job.id}/archive"
+    return result
+
+
+def _get_bulk_job(db: Session, job_id: str, user) -> QRBulkJob:
+    job = db.get(QRBulkJob, job_id)
+    if not job or job.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Bulk job not found")
+    return job
+
+
+@router.get("/bulk-jobs/{job_id}")
+def get_bulk_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    user=Depends(get_api_user),
+):
+    return serialize_job(_get_bulk_job(db, job_id, user))
+
+
+@router.get("/bulk-jobs/{job_id}/archive")
+def download_bulk_job(
+    job_id: str,
+    db: Session = Depends(get_db),
+    user=Depends(get_api_user),
+):
+    job = _get_bulk_job(db, job_id, user)
+    if job.status == "expired":
+        raise HTTPException(status_code=410, detail="Bulk job export has expired")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail=f"Bulk job is {job.status}")
+    return StreamingResponse(
+        iter_job_archive(job.id),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="qr-bulk-{job.id}.zip"'},
+    )
@@ -15,6 +15,7 @@ from models.plan import Plan
 from models.login_device import LoginDevice
 from utils.two_factor import verify_totp
 from utils.app_url import resolve_app_base_url
+from utils.user_agent import classify_user_agent
 
 # 📧 Mail-Funktion importieren (für Passwort-Reset)
 # type: ignore
@@ -53,18 +54,7 @@ def verify_reset_token(token: str) -> tuple[bool, str | None]:
 
 
 def _detect_device_name(user_agent: str) -> str:
-    ua = (user_agent or "").lower()
-    if "iphone" in ua or "ipad" in ua:
-        return "iPhone/iPad"
-    if "android" in ua:
-        return "Android"
-    if "windows" in ua:
-        return "Windows"
-    if "macintosh" in ua or "mac os" in ua:
-        return "Mac"
-    if "linux" in ua:
-        return "Linux"
-    return "Unbekannt"
+    return classify_user_agent(user_agent).device_name
 
 
 def _registration_plans(db: Session) -> list[Plan]:
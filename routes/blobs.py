@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+
+from utils.blob_storage import KEY_PREFIX, blob_digest, blob_store, content_type_for, is_blob_key
+
+router = APIRouter(tags=["Blobs"])
+
+# Inhaltsadressiert: ein Schlüssel ändert nie seinen Inhalt
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+@router.get(f"/{KEY_PREFIX}/{{key:path}}", include_in_schema=False)
+def serve_blob(key: str, request: Request):
+    key = f"{KEY_PREFIX}/{key}"
+    if not is_blob_key(key):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    etag = f'"{blob_digest(key)}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": IMMUTABLE})
+
+    path = blob_store.local_path(key)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return FileResponse(path, media_type=content_type_for(key), headers={"ETag": etag, "Cache-Control": IMMUTABLE})
@@ -14,7 +14,6 @@ from fastapi import APIRouter, Request, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
 from typing import List
 from datetime import date, datetime, timedelta, timezone, time
 import calendar
@@ -23,19 +22,15 @@ from database import get_db
 from models.user import User
 from models.qrcode import QRCode
 from models.qr_scan import QRScan
-from models.qr_conversion import QRConversion
-from models.lead_capture import LeadCapture
-from models.feedback_entry import FeedbackEntry
-from models.coupon_redemption import CouponRedemption
 from routes.auth import get_current_user  # Für Session-Authentifizierung
 from utils.billing_access import is_billing_exempt_user
+from utils.scan_stats import exclude_test_scans, funnel_counts, scan_stats
 
 # -------------------------------------------------------------------------
 # ⚙️ Router & Template Setup
 # -------------------------------------------------------------------------
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
 templates = Jinja2Templates(directory="templates")
-TEST_IPS = {"127.0.0.1", "::1", "localhost"}
 PLAN_LIMITS = {
     "basic": 10,
     "pro": 50,
@@ -44,27 +39,13 @@ PLAN_LIMITS = {
 }
 
 
-def _detect_device_label(scan: QRScan) -> str:
-    ua = ((getattr(scan, "user_agent", None) or getattr(scan, "device", "") or "")).lower()
-    if not ua:
-        return "Andere"
-    if "iphone" in ua or "ipad" in ua or "ios" in ua:
-        return "iPhone/iPad"
-    if "android" in ua:
-        return "Android"
-    if "windows" in ua or "macintosh" in ua or "mac os" in ua or "linux" in ua:
-        return "Desktop"
-    if "bot" in ua or "spider" in ua or "crawler" in ua or "curl/" in ua:
-        return "Bot/Tool"
-    return "Andere"
-
-
-def _to_utc(ts: datetime | None) -> datetime | None:
-    if ts is None:
-        return None
-    if ts.tzinfo is None:
-        return ts.replace(tzinfo=timezone.utc)
-    return ts.astimezone(timezone.utc)
+# Rollup-Geräteklasse -> Dashboard-Label ("bot" wird nicht angezeigt)
+DEVICE_CLASS_LABELS = {
+    "ios": "iPhone/iPad",
+    "android": "Android",
+    "desktop": "Desktop",
+    "other": "Andere",
+}
 
 
 def _plan_usage(user: User, total_qrcodes: int) -> tuple[str, str, int, int, int, bool, str, str]:
@@ -136,45 +117,18 @@ def dashboard(
     # 🧮 Basisstatistiken berechnen
     total_qrcodes = len(qr_codes)
 
-    # Echte Scans aus der Datenbank laden
+    # Scan-Zahlen nur als Aggregate aus der DB (Rollups bzw. GROUP BY auf qr_scans)
     qr_ids = [qr.id for qr in qr_codes]
     qr_map = {qr.id: qr for qr in qr_codes}
-    all_scans: List[QRScan] = []
-    total_scans = 0
-    scans_today = 0
+    scan_counts = scan_stats(db)
 
     now_utc = datetime.now(timezone.utc)
     today = now_utc.date()
     start_today = datetime.combine(today, time.min, tzinfo=timezone.utc)
-    end_today = start_today + timedelta(days=1)
 
-    if qr_ids:
-        scan_query = db.query(QRScan).filter(QRScan.qr_id.in_(qr_ids))
-        if not include_test:
-            scan_query = (
-                scan_query
-                .filter(or_(QRScan.location.is_(None), ~QRScan.location.in_(TEST_IPS)))
-                .filter(or_(QRScan.user_agent.is_(None), ~QRScan.user_agent.ilike("curl/%")))
-                .filter(or_(QRScan.user_agent.is_(None), ~QRScan.user_agent.ilike("%postmanruntime%")))
-                .filter(or_(QRScan.user_agent.is_(None), ~QRScan.user_agent.ilike("%insomnia%")))
-                .filter(or_(QRScan.user_agent.is_(None), ~QRScan.user_agent.ilike("%httpie/%")))
-            )
-
-        total_scans = (
-            scan_query.with_entities(func.count(QRScan.id)).scalar()
-            or 0
-        )
-        scans_today = (
-            scan_query.with_entities(func.count(QRScan.id))
-            .filter(
-                QRScan.timestamp >= start_today,
-                QRScan.timestamp < end_today,
-            )
-            .scalar()
-            or 0
-        )
-        all_scans = scan_query.all()
-    
+    total_scans = scan_counts.total(qr_ids, include_test)
+    scans_today = scan_counts.total(qr_ids, include_test, since=start_today)
+
     active_qr_codes = len([q for q in qr_codes if q.active])
 
     # 📂 QR-Code-Aufschlüsselung nach Typ
@@ -189,32 +143,40 @@ def dashboard(
         "sms": len([q for q in qr_codes if getattr(q, "type", "") == "sms"]),
     }
 
-    # 📈 Echte Scan-Daten aus der Datenbank (nach Zeitraum)
+    # 📈 Scan-Verlauf (nach Zeitraum)
     chart_labels: list[str] = []
     scans_per_period: list[int] = []
-    filtered_scans: list[QRScan] = []
-    if lang == "en":
-        range_title = "Last 7 days"
-    elif lang == "ar":
-        range_title = "آخر 7 أيام"
+    if range_key == "30d":
+        period_start = datetime.combine(today - timedelta(days=29), time.min, tzinfo=timezone.utc)
+    elif range_key == "6m":
+        current = today.replace(day=1)
+        months: list[tuple[int, int]] = []
+        for _ in range(6):
+            months.append((current.year, current.month))
+            if current.month == 1:
+                current = current.replace(year=current.year - 1, month=12)
+            else:
+                current = current.replace(month=current.month - 1)
+        months = list(reversed(months))
+        first_year, first_month = months[0]
+        period_start = datetime.combine(date(first_year, first_month, 1), time.min, tzinfo=timezone.utc)
     else:
-        range_title = "Letzte 7 Tage"
-    period_start = datetime.combine(today - timedelta(days=6), time.min, tzinfo=timezone.utc)
+        period_start = datetime.combine(today - timedelta(days=6), time.min, tzinfo=timezone.utc)
     period_end = now_utc
 
+    # Tages-Buckets des Zeitraums: (Tag, Geräteklasse, qr_id) -> Scans
+    daily_rows = scan_counts.by_day(qr_ids, include_test, since=period_start)
+
+    per_day: dict[date, int] = {}
+    for row in daily_rows:
+        per_day[row.day] = per_day.get(row.day, 0) + row.scans
+    period_total = sum(per_day.values())
+
     if range_key == "7d":
-        from_date = today - timedelta(days=6)
-        start_range = datetime.combine(from_date, time.min, tzinfo=timezone.utc)
-        period_start = start_range
-        filtered_scans = (
-            [s for s in all_scans if (_to_utc(s.timestamp) or start_range) >= start_range]
-        )
         for i in range(6, -1, -1):
             d = today - timedelta(days=i)
             chart_labels.append(d.strftime("%a"))
-            scans_per_period.append(
-                len([s for s in filtered_scans if (_to_utc(s.timestamp) or start_range).date() == d])
-            )
+            scans_per_period.append(per_day.get(d, 0))
         if lang == "en":
             range_title = "Last 7 days"
         elif lang == "ar":
@@ -222,18 +184,10 @@ def dashboard(
         else:
             range_title = "Letzte 7 Tage"
     elif range_key == "30d":
-        from_date = today - timedelta(days=29)
-        start_range = datetime.combine(from_date, time.min, tzinfo=timezone.utc)
-        period_start = start_range
-        filtered_scans = (
-            [s for s in all_scans if (_to_utc(s.timestamp) or start_range) >= start_range]
-        )
         for i in range(29, -1, -1):
             d = today - timedelta(days=i)
             chart_labels.append(d.strftime("%d.%m"))
-            scans_per_period.append(
-                len([s for s in filtered_scans if (_to_utc(s.timestamp) or start_range).date() == d])
-            )
+            scans_per_period.append(per_day.get(d, 0))
         if lang == "en":
             range_title = "Last 30 days"
         elif lang == "ar":
@@ -241,35 +195,12 @@ def dashboard(
         else:
             range_title = "Letzte 30 Tage"
     else:  # 6m
-        current = today.replace(day=1)
-        months: list[tuple[int, int]] = []
-        for _ in range(6):
-            months.append((current.year, current.month))
-            if current.month == 1:
-                current = current.replace(year=current.year - 1, month=12)
-            else:
-                current = current.replace(month=current.month - 1)
-        months = list(reversed(months))
-
-        first_year, first_month = months[0]
-        from_date = date(first_year, first_month, 1)
-        start_range = datetime.combine(from_date, time.min, tzinfo=timezone.utc)
-        period_start = start_range
-        filtered_scans = (
-            [s for s in all_scans if (_to_utc(s.timestamp) or start_range) >= start_range]
-        )
+        per_month: dict[tuple[int, int], int] = {}
+        for d, count in per_day.items():
+            per_month[(d.year, d.month)] = per_month.get((d.year, d.month), 0) + count
         for y, m in months:
             chart_labels.append(f"{calendar.month_abbr[m]} {str(y)[2:]}")
-            scans_per_period.append(
-                len(
-                    [
-                        s
-                        for s in filtered_scans
-                        if (_to_utc(s.timestamp) or start_range).year == y
-                        and (_to_utc(s.timestamp) or start_range).month == m
-                    ]
-                )
-            )
+            scans_per_period.append(per_month.get((y, m), 0))
         if lang == "en":
             range_title = "Last 6 months"
         elif lang == "ar":
@@ -293,11 +224,11 @@ def dashboard(
     device_labels = []
     device_counts = []
     device_stats = {}
-    for scan in filtered_scans:
-        label = _detect_device_label(scan)
-        if label == "Bot/Tool":
+    for row in daily_rows:
+        label = DEVICE_CLASS_LABELS.get(row.device_class)
+        if label is None:  # Bot/Tool
             continue
-        device_stats[label] = device_stats.get(label, 0) + 1
+        device_stats[label] = device_stats.get(label, 0) + row.scans
 
     order = ["iPhone/iPad", "Android", "Desktop", "Andere"]
     for label in order:
@@ -332,37 +263,18 @@ def dashboard(
     top_qr_delta_pct: list[float] = []
 
     current_counts: dict[int, int] = {}
-    for s in filtered_scans:
-        current_counts[s.qr_id] = current_counts.get(s.qr_id, 0) + 1
+    for row in daily_rows:
+        current_counts[row.qr_id] = current_counts.get(row.qr_id, 0) + row.scans
 
+    # Vorzeitraum beginnt nicht auf Tagesgrenze -> Stunden-Buckets
     previous_counts: dict[int, int] = {}
-    if qr_ids:
-        duration = period_end - period_start
-        previous_start = period_start - duration
-        previous_end = period_start
-        prev_query = (
-            db.query(QRScan)
-            .filter(QRScan.qr_id.in_(qr_ids))
-            .filter(QRScan.timestamp >= previous_start, QRScan.timestamp < previous_end)
-        )
-        if not include_test:
-            prev_query = (
-                prev_query
-                .filter(or_(QRScan.location.is_(None), ~QRScan.location.in_(TEST_IPS)))
-                .filter(or_(QRScan.user_agent.is_(None), ~QRScan.user_agent.ilike("curl/%")))
-                .filter(or_(QRScan.user_agent.is_(None), ~QRScan.user_agent.ilike("%postmanruntime%")))
-                .filter(or_(QRScan.user_agent.is_(None), ~QRScan.user_agent.ilike("%insomnia%")))
-                .filter(or_(QRScan.user_agent.is_(None), ~QRScan.user_agent.ilike("%httpie/%")))
-            )
-        for s in prev_query.all():
-            previous_counts[s.qr_id] = previous_counts.get(s.qr_id, 0) + 1
-
-    total_counts: dict[int, int] = {}
-    for s in all_scans:
-        total_counts[s.qr_id] = total_counts.get(s.qr_id, 0) + 1
+    previous_start = period_start - (period_end - period_start)
+    for row in scan_counts.by_hour(qr_ids, include_test, since=previous_start, until=period_start):
+        previous_counts[row.qr_id] = previous_counts.get(row.qr_id, 0) + row.scans
 
     ranked_qr_ids = sorted(current_counts.keys(), key=lambda qid: current_counts[qid], reverse=True)[:10]
-    if not ranked_qr_ids:
+    if not ranked_qr_ids and qr_ids:
+        total_counts = scan_counts.by_qr(qr_ids, include_test)
         ranked_qr_ids = sorted(total_counts.keys(), key=lambda qid: total_counts[qid], reverse=True)[:10]
 
     for qid in ranked_qr_ids:
@@ -393,12 +305,9 @@ def dashboard(
     else:
         heatmap_day_labels = ["Mo", "Di", "Mi", "Do", "Fr", "Sa", "So"]
     heatmap_counts: dict[tuple[int, int], int] = {}
-    for s in filtered_scans:
-        ts = _to_utc(s.timestamp)
-        if ts is None:
-            continue
-        key = (ts.weekday(), ts.hour)
-        heatmap_counts[key] = heatmap_counts.get(key, 0) + 1
+    for row in scan_counts.by_hour(qr_ids, include_test, since=period_start):
+        key = (row.hour.weekday(), row.hour.hour)
+        heatmap_counts[key] = heatmap_counts.get(key, 0) + row.scans
     heatmap_points = [
         {"x": hour, "y": weekday, "v": count}
         for (weekday, hour), count in sorted(heatmap_counts.items())
@@ -408,52 +317,15 @@ def dashboard(
     # ---------------------------------------------------------------------
     # 🧭 Conversion-Funnel (Scans → Visits → Conversions)
     # ---------------------------------------------------------------------
-    scans_stage = len(filtered_scans)
+    scans_stage = period_total
     visits_stage = scans_stage
     conversions_stage = 0
     conversion_rate_label = "0%"
 
     if qr_ids:
-        visit_events = (
-            db.query(func.count(QRConversion.id))
-            .filter(QRConversion.qr_id.in_(qr_ids))
-            .filter(QRConversion.created_at >= period_start, QRConversion.created_at < period_end)
-            .filter(QRConversion.event_type == "visit")
-            .scalar()
-            or 0
-        )
-        conversion_events = (
-            db.query(func.count(QRConversion.id))
-            .filter(QRConversion.qr_id.in_(qr_ids))
-            .filter(QRConversion.created_at >= period_start, QRConversion.created_at < period_end)
-            .filter(QRConversion.event_type != "visit")
-            .scalar()
-            or 0
-        )
-        lead_conversions = (
-            db.query(func.count(LeadCapture.id))
-            .filter(LeadCapture.qr_id.in_(qr_ids))
-            .filter(LeadCapture.created_at >= period_start, LeadCapture.created_at < period_end)
-            .scalar()
-            or 0
-        )
-        feedback_conversions = (
-            db.query(func.count(FeedbackEntry.id))
-            .filter(FeedbackEntry.qr_id.in_(qr_ids))
-            .filter(FeedbackEntry.created_at >= period_start, FeedbackEntry.created_at < period_end)
-            .scalar()
-            or 0
-        )
-        coupon_conversions = (
-            db.query(func.count(CouponRedemption.id))
-            .filter(CouponRedemption.qr_id.in_(qr_ids))
-            .filter(CouponRedemption.redeemed_at >= period_start, CouponRedemption.redeemed_at < period_end)
-            .scalar()
-            or 0
-        )
-
-        visits_stage = max(scans_stage, int(visit_events))
-        raw_conversions = int(conversion_events + lead_conversions + feedback_conversions + coupon_conversions)
+        funnel = funnel_counts(db, qr_ids, period_start, period_end)
+        visits_stage = max(scans_stage, funnel["visits"])
+        raw_conversions = funnel["conversions"] + funnel["leads"] + funnel["feedback"] + funnel["coupons"]
         conversions_stage = min(raw_conversions, visits_stage)
 
     if visits_stage > 0:
@@ -502,9 +374,24 @@ def dashboard(
         qr_usage_percent = 0
         qr_usage_percent_label = "0%"
 
-    # 🕒 Letzte Scans (aus gefiltertem Zeitraum)
+    # 🕒 Letzte Scans (aus gefiltertem Zeitraum, nur die 25 neuesten Zeilen)
     recent_scans = []
-    for scan in sorted(filtered_scans, key=lambda s: s.timestamp, reverse=True)[:25]:
+    recent_rows = []
+    if qr_ids:
+        recent_query = (
+            db.query(QRScan.qr_id, QRScan.timestamp, QRScan.location, QRScan.device)
+            .filter(QRScan.qr_id.in_(qr_ids))
+            .filter(QRScan.timestamp >= period_start)
+        )
+        if not include_test:
+            recent_query = exclude_test_scans(recent_query)
+        recent_rows = (
+            recent_query
+            .order_by(QRScan.timestamp.desc())
+            .limit(25)
+            .all()
+        )
+    for scan in recent_rows:
         qr = qr_map.get(scan.qr_id)
         scan_device = (getattr(scan, "device", "-") or "-").strip()
         if scan_device and len(scan_device) > 32:
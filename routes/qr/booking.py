@@ -1,9 +1,7 @@
 from __future__ import annotations
 
-import base64
 import os
 import uuid
-from pathlib import Path
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Form, Request, HTTPException, UploadFile, File
@@ -15,12 +13,10 @@ from database import get_db
 from models.qrcode import QRCode
 from routes.qr.logo_utils import save_qr_logo
 from utils.qr_design import resolve_design
-from utils.qr_generator import generate_qr_png
+from utils.qr_image import qr_image_path
 
 router = APIRouter(prefix="/qr/booking", tags=["Booking QR"])
 templates = Jinja2Templates(directory="templates")
-QR_DIR = Path("static/generated_qr")
-QR_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def _build_dynamic_url(request: Request, slug: str) -> str:
@@ -62,7 +58,7 @@ async def generate_booking_qr(
         raise HTTPException(status_code=401, detail="Nicht eingeloggt")
     slug = uuid.uuid4().hex[:10]
     dynamic_url = _build_dynamic_url(request, slug)
-    logo_fs_path, logo_public_path = save_qr_logo(logo, slug, "booking_logo")
+    _, logo_public_path = save_qr_logo(logo, slug, "booking_logo")
 
     design = resolve_design(
         style=style,
@@ -78,31 +74,12 @@ async def generate_booking_qr(
         logo_bg_mode=logo_bg_mode,
         safe_mode=safe_mode,
     )
-    result = generate_qr_png(
-        payload=dynamic_url,
-        size=design.qr_size,
-        fg=design.fg,
-        bg=design.bg,
-        module_style=design.module_style,
-        eye_style=design.eye_style,
-        logo_path=logo_fs_path,
-        frame_style=design.frame_style,
-        logo_scale=design.logo_scale,
-        logo_bg_mode=design.logo_bg_mode,
-        quiet_zone=design.quiet_zone,
-        dpi=design.dpi,
-    )
-    qr_bytes = result if isinstance(result, bytes) else result.get("bytes", b"")
-    qr_file = QR_DIR / f"booking_{slug}.png"
-    with open(qr_file, "wb") as f:
-        f.write(qr_bytes)
 
     qr = QRCode(
         user_id=user_id,
         slug=slug,
         type="booking",
         dynamic_url=dynamic_url,
-        image_path=str(qr_file),
         logo_path=logo_public_path,
         style=design.style,
         color_fg=design.fg,
@@ -135,12 +112,12 @@ async def generate_booking_qr(
             },
         }
     )
+    qr.image_path = qr_image_path(qr)
     db.add(qr)
     db.commit()
     db.refresh(qr)
 
-    qr_image = base64.b64encode(qr_bytes).decode("utf-8")
     return templates.TemplateResponse(
         "qr_booking_result.html",
-        {"request": request, "qr": qr, "qr_image": qr_image, "dynamic_url": dynamic_url},
+        {"request": request, "qr": qr, "qr_image": qr.image_path, "dynamic_url": dynamic_url},
     )
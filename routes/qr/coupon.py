@@ -1,10 +1,8 @@
 from __future__ import annotations
 
-import base64
 import os
 import uuid
 from datetime import datetime, timezone
-from pathlib import Path
 from typing import Optional
 
 from fastapi import APIRouter, Depends, Form, HTTPException, Request, UploadFile, File
@@ -17,12 +15,10 @@ from models.coupon_redemption import CouponRedemption
 from models.qrcode import QRCode
 from routes.qr.logo_utils import save_qr_logo
 from utils.qr_design import resolve_design
-from utils.qr_generator import generate_qr_png
+from utils.qr_image import qr_image_path
 
 router = APIRouter(prefix="/qr/coupon", tags=["Coupon QR"])
 templates = Jinja2Templates(directory="templates")
-QR_DIR = Path("static/generated_qr")
-QR_DIR.mkdir(parents=True, exist_ok=True)
 
 
 def _build_dynamic_url(request: Request, slug: str) -> str:
@@ -78,7 +74,7 @@ async def generate_coupon_qr(
         raise HTTPException(status_code=401, detail="Nicht eingeloggt")
     slug = uuid.uuid4().hex[:10]
     dynamic_url = _build_dynamic_url(request, slug)
-    logo_fs_path, logo_public_path = save_qr_logo(logo, slug, "coupon_logo")
+    _, logo_public_path = save_qr_logo(logo, slug, "coupon_logo")
 
     design = resolve_design(
         style=style,
@@ -94,31 +90,12 @@ async def generate_coupon_qr(
         logo_bg_mode=logo_bg_mode,
         safe_mode=safe_mode,
     )
-    result = generate_qr_png(
-        payload=dynamic_url,
-        size=design.qr_size,
-        fg=design.fg,
-        bg=design.bg,
-        module_style=design.module_style,
-        eye_style=design.eye_style,
-        logo_path=logo_fs_path,
-        frame_style=design.frame_style,
-        logo_scale=design.logo_scale,
-        logo_bg_mode=design.logo_bg_mode,
-        quiet_zone=design.quiet_zone,
-        dpi=design.dpi,
-    )
-    qr_bytes = result if isinstance(result, bytes) else result.get("bytes", b"")
-    qr_file = QR_DIR / f"coupon_{slug}.png"
-    with open(qr_file, "wb") as f:
-        f.write(qr_bytes)
 
     qr = QRCode(
         user_id=user_id,
         slug=slug,
         type="coupon",
         dynamic_url=dynamic_url,
-        image_path=str(qr_file),
         logo_path=logo_public_path,
         style=design.style,
         color_fg=design.fg,
@@ -153,14 +130,14 @@ async def generate_coupon_qr(
             },
         }
     )
+    qr.image_path = qr_image_path(qr)
     db.add(qr)
     db.commit()
     db.refresh(qr)
 
-    qr_image = base64.b64encode(qr_bytes).decode("utf-8")
     return templates.TemplateResponse(
         "qr_coupon_result.html",
-        {"request": request, "qr": qr, "qr_image": qr_image, "dynamic_url": dynamic_url},
+        {"request": request, "qr": qr, "qr_image": qr.image_path, "dynamic_url": dynamic_url},
     )
 
 
@@ -8,13 +8,10 @@
 # Projekt: Ouhud QR
 # =============================================================================
 
-import os
 import json
-import shutil
 import html
 import zipfile
 from io import BytesIO
-from pathlib import Path
 from typing import Optional, Dict, Any
 from models.user import User
 from fastapi import (
@@ -30,8 +27,12 @@ from routes.qr.logo_utils import save_qr_logo
 from routes.utils import normalize_url
 from models.qrcode import QRCode
 from utils.access_control import can_edit_qr
+from utils.blob_storage import blob_store
 from utils.qr_design import resolve_design
-from utils.qr_generator import generate_qr_png
+from utils.qr_generator import ALL_FORMATS
+from utils.qr_image import WEBP_SUPPORTED, qr_image_path, stored_render_params
+from utils.render_cache import render_qr_cached
+from utils.resolve_cache import invalidate_resolved_qr
 
 router = APIRouter(prefix="/qr", tags=["QR Edit"])
 templates = Jinja2Templates(directory="templates")
@@ -279,7 +280,7 @@ async def update_qr(
             if link
         )
         avatar_html = (
-            f'<img class="social-avatar" src="{html.escape(qr.logo_path)}" alt="Profilbild">'
+            f'<img class="social-avatar" src="{html.escape(blob_store.url(qr.logo_path))}" alt="Profilbild">'
             if qr.logo_path
             else ""
         )
@@ -498,47 +499,13 @@ async def update_qr(
         merged_data["logo_path"] = qr.logo_path
     qr.set_data(merged_data)
 
-    # 🔁 QR-Bild + SVG/PDF neu rendern
-    if qr.image_path:
-        payload = qr.dynamic_url or f"/d/{qr.slug}"
-        logo_fs_path = None
-        if qr.logo_path:
-            candidate = qr.logo_path.lstrip("/")
-            if os.path.exists(candidate):
-                logo_fs_path = candidate
-
-        regen = generate_qr_png(
-            payload=payload,
-            size=design.qr_size,
-            fg=design.fg,
-            bg=design.bg,
-            logo_path=logo_fs_path,
-            module_style=design.module_style,
-            eye_style=design.eye_style,
-            frame_style=design.frame_style,
-            logo_scale=design.logo_scale,
-            logo_bg_mode=design.logo_bg_mode,
-            quiet_zone=design.quiet_zone,
-            dpi=design.dpi,
-        )
-        regen_bytes = regen["bytes"] if isinstance(regen, dict) else b""
-        if regen_bytes:
-            image_path = Path(str(qr.image_path))
-            image_path.parent.mkdir(parents=True, exist_ok=True)
-            image_path.write_bytes(regen_bytes)
-
-            svg_bytes = regen.get("svg_bytes", b"") if isinstance(regen, dict) else b""
-            if svg_bytes:
-                svg_path = image_path.with_suffix(".svg")
-                svg_path.write_bytes(svg_bytes)
-                qr.svg_path = str(svg_path)
-
-            pdf_bytes = regen.get("pdf_bytes", b"") if isinstance(regen, dict) else b""
-            if pdf_bytes:
-                pdf_path = image_path.with_suffix(".pdf")
-                pdf_path.write_bytes(pdf_bytes)
-        
+    # 🔁 Neues Design = neue Bild-Version; gerendert wird beim ersten Abruf
+    params = stored_render_params(qr)
+    qr.image_path = qr_image_path(qr, params=params)
+    qr.svg_path = qr_image_path(qr, "svg", params=params)
+
     db.commit()
+    invalidate_resolved_qr(qr.slug)
     print(f"[UPDATE] QR '{qr.slug}' ({qr.type}) erfolgreich aktualisiert.")
     return RedirectResponse(f"/qr/edit/{slug}?msg=ok", status_code=303)
 
@@ -559,32 +526,14 @@ def export_qr(
     if not can_edit_qr(db, user.id, qr):
         raise HTTPException(status_code=403, detail="Keine Berechtigung")
 
-    data = qr.get_data() or {}
-    design = data.get("design") if isinstance(data.get("design"), dict) else {}
-    payload = qr.dynamic_url or f"/d/{qr.slug}"
     fmt = str(format or "png").strip().lower()
-    if fmt not in {"png", "svg", "pdf", "zip"}:
+    if fmt not in {"png", "svg", "svgz", "pdf", "zip"} and not (fmt == "webp" and WEBP_SUPPORTED):
         fmt = "png"
 
-    logo_fs_path = None
-    if qr.logo_path:
-        candidate = qr.logo_path.lstrip("/")
-        if os.path.exists(candidate):
-            logo_fs_path = candidate
-
-    regen = generate_qr_png(
-        payload=payload,
-        size=int(qr.qr_size or design.get("qr_size") or 600),
-        fg=str(qr.color_fg or design.get("fg") or "#0D2A78"),
-        bg=str(qr.color_bg or design.get("bg") or "#FFFFFF"),
-        logo_path=logo_fs_path,
-        module_style=str(design.get("module_style") or "square"),
-        eye_style=str(design.get("eye_style") or "square"),
-        frame_style=str(qr.frame_style or design.get("frame_style") or "none"),
-        logo_scale=int(design.get("logo_scale") or 20),
-        logo_bg_mode=str(design.get("logo_bg_mode") or "auto-white"),
-        quiet_zone=int(design.get("quiet_zone") or 4),
-        dpi=int(design.get("dpi") or 300),
+    # Nur das angefragte Format rendern (ZIP braucht alle drei); Wiederholungen kommen aus dem Render-Cache
+    regen = render_qr_cached(
+        formats=ALL_FORMATS if fmt == "zip" else (fmt,),
+        **stored_render_params(qr),
     )
 
     if fmt == "zip":
@@ -599,8 +548,17 @@ def export_qr(
     headers = {"Content-Disposition": f'attachment; filename=\"qr_{slug}.{fmt}\"'}
     if fmt == "svg":
         return Response(content=regen.get("svg_bytes", b""), media_type="image/svg+xml", headers=headers)
+    if fmt == "svgz":
+        # Als Datei-Download (.svgz) ausliefern, nicht als Content-Encoding
+        return Response(content=regen.get("svgz_bytes", b""), media_type="image/svg+xml", headers=headers)
     if fmt == "pdf":
         return Response(content=regen.get("pdf_bytes", b""), media_type="application/pdf", headers=headers)
+    # Raster-Exporte nennen den verwendeten Encoder (z. B. indexed-1bit)
+    encoder = regen["encoding"].get(f"{fmt}_encoder")
+    if encoder:
+        headers["X-QR-Encoder"] = encoder
+    if fmt == "webp":
+        return Response(content=regen.get("webp_bytes", b""), media_type="image/webp", headers=headers)
     return Response(content=regen.get("bytes", b""), media_type="image/png", headers=headers)
 
 
@@ -670,22 +628,7 @@ async def update_qr_image(
         raise HTTPException(status_code=403, detail="Keine Berechtigung zum Bearbeiten")
 
     # 🔹 Logo speichern (falls vorhanden)
-    logo_path: Optional[str] = None
-    if logo and logo.filename:
-        logo_dir = os.path.join("static", "logos")
-        os.makedirs(logo_dir, exist_ok=True)
-
-        # Sicheren Dateinamen erstellen
-        import uuid
-        ext = os.path.splitext(logo.filename or "upload.png")[1]
-        safe_name = f"{uuid.uuid4().hex}{ext}"
-        file_path = os.path.join(logo_dir, safe_name)
-
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(logo.file, buffer)
-
-        # Relativen Pfad für Frontend speichern
-        logo_path = f"/{file_path}"
+    _, logo_path = save_qr_logo(logo, slug, "image_logo")
 
     # 🔹 Farben & Logo als JSON verschlüsselt speichern
     qr.set_data({
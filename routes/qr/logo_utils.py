@@ -5,14 +5,16 @@ from typing import Optional, Tuple
 
 from fastapi import UploadFile
 
-LOGO_DIR = Path("static/logos")
-LOGO_DIR.mkdir(parents=True, exist_ok=True)
+from utils.blob_storage import blob_store
 
 ALLOWED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
 
 
 def save_qr_logo(upload: UploadFile | None, slug: str, prefix: str = "qr_logo") -> Tuple[Optional[str], Optional[str]]:
-    """Save uploaded logo and return (filesystem_path, public_path)."""
+    """
+    Save uploaded logo in the blob store and return (filesystem_path, storage_key).
+    The key is content-addressed; slug/prefix are kept for call compatibility.
+    """
     if not upload or not upload.filename:
         return None, None
 
@@ -20,10 +22,5 @@ def save_qr_logo(upload: UploadFile | None, slug: str, prefix: str = "qr_logo")
     if ext not in ALLOWED_EXTENSIONS:
         return None, None
 
-    filename = f"{prefix}_{slug}{ext}"
-    fs_path = LOGO_DIR / filename
-    with open(fs_path, "wb") as f:
-        f.write(upload.file.read())
-
-    public_path = f"/static/logos/{filename}"
-    return str(fs_path), public_path
+    key = blob_store.put(upload.file.read(), "logos", ext)
+    return blob_store.local_path(key), key
@@ -5,8 +5,6 @@
 
 from __future__ import annotations
 import uuid
-import base64
-from pathlib import Path
 from typing import Optional, List
 
 from fastapi import APIRouter, Request, Form, Depends, HTTPException, UploadFile, File
@@ -18,16 +16,13 @@ from database import get_db
 from models.qrcode import QRCode
 from routes.qr.dynamic_url import build_dynamic_url
 from routes.qr.logo_utils import save_qr_logo
-from utils.qr_generator import generate_qr_png
 from utils.qr_design import resolve_design
+from utils.qr_image import qr_image_path
 
 router = APIRouter(prefix="/qr/multilink", tags=["Multilink QR"])
 
 templates = Jinja2Templates(directory="templates")
 
-QR_DIR = Path("static/generated_qr")
-QR_DIR.mkdir(parents=True, exist_ok=True)
-
 
 @router.get("/", response_class=HTMLResponse)
 def show_form(request: Request) -> HTMLResponse:
@@ -62,7 +57,7 @@ async def create_multilink_qr(
     if not user_id:
         raise HTTPException(status_code=401, detail="Nicht eingeloggt")
     slug = uuid.uuid4().hex[:10]
-    logo_fs_path, logo_public_path = save_qr_logo(logo, slug, "multilink_logo")
+    _, logo_public_path = save_qr_logo(logo, slug, "multilink_logo")
     
     # Dynamische URL
     dynamic_url = build_dynamic_url(request, slug)
@@ -82,27 +77,6 @@ async def create_multilink_qr(
         logo_bg_mode=logo_bg_mode,
         safe_mode=safe_mode,
     )
-    result = generate_qr_png(
-        payload=dynamic_url,
-        size=design.qr_size,
-        fg=design.fg,
-        bg=design.bg,
-        module_style=design.module_style,
-        eye_style=design.eye_style,
-        logo_path=logo_fs_path,
-        frame_style=design.frame_style,
-        logo_scale=design.logo_scale,
-        logo_bg_mode=design.logo_bg_mode,
-        quiet_zone=design.quiet_zone,
-        dpi=design.dpi,
-    )
-    
-    qr_bytes = result if isinstance(result, bytes) else result.get("bytes", b"")
-    
-    # Bild speichern
-    qr_file = QR_DIR / f"multilink_{slug}.png"
-    with open(qr_file, "wb") as f:
-        f.write(qr_bytes)
     
     # In DB speichern
     qr = QRCode(
@@ -110,7 +84,6 @@ async def create_multilink_qr(
         slug=slug,
         type="multilink",
         dynamic_url=dynamic_url,
-        image_path=str(qr_file),
         logo_path=logo_public_path,
         style=design.style,
         color_fg=design.fg,
@@ -143,14 +116,12 @@ async def create_multilink_qr(
             },
         }
     )
+    qr.image_path = qr_image_path(qr)
     db.add(qr)
     db.commit()
     db.refresh(qr)
     
-    # Base64 für Preview
-    qr_base64 = base64.b64encode(qr_bytes).decode("utf-8")
-    
     return templates.TemplateResponse(
         "qr_multilink_result.html",
-        {"request": request, "qr": qr, "qr_image": qr_base64, "dynamic_url": dynamic_url},
+        {"request": request, "qr": qr, "qr_image": qr.image_path, "dynamic_url": dynamic_url},
     )
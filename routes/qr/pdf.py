@@ -6,8 +6,6 @@
 
 from __future__ import annotations
 import uuid
-import base64
-from pathlib import Path
 from typing import Optional
 
 import os
@@ -22,17 +20,14 @@ from models.qrcode import QRCode
 from routes.auth import get_current_user
 from routes.qr.logo_utils import save_qr_logo
 from utils.access_control import can_edit_qr
-from utils.qr_generator import generate_qr_png
 from utils.qr_design import resolve_design
+from utils.blob_storage import blob_store
+from utils.qr_image import qr_image_path
 
 router = APIRouter(prefix="/qr/pdf", tags=["PDF QR"])
 
 templates = Jinja2Templates(directory="templates")
 
-QR_DIR = Path("static/generated_qr")
-PDF_DIR = Path("static/uploads/pdfs")
-QR_DIR.mkdir(parents=True, exist_ok=True)
-PDF_DIR.mkdir(parents=True, exist_ok=True)
 
 def _build_dynamic_url(request: Request, slug: str) -> str:
     base_url = str(request.base_url).rstrip("/")
@@ -99,16 +94,11 @@ async def create_pdf_qr(
     if not user_id:
         raise HTTPException(status_code=401, detail="Nicht eingeloggt")
     slug = uuid.uuid4().hex[:10]
-    logo_fs_path, logo_public_path = save_qr_logo(logo, slug, "pdf_logo")
+    _, logo_public_path = save_qr_logo(logo, slug, "pdf_logo")
     
     # PDF speichern
     file_ext = file.filename.split(".")[-1] if file.filename else "pdf"
-    pdf_filename = f"{slug}.{file_ext}"
-    pdf_path = PDF_DIR / pdf_filename
-    
-    content = await file.read()
-    with open(pdf_path, "wb") as f:
-        f.write(content)
+    pdf_path = blob_store.put(await file.read(), "pdfs", file_ext)
     
     # Dynamische URL
     dynamic_url = _build_dynamic_url(request, slug)
@@ -128,33 +118,12 @@ async def create_pdf_qr(
         logo_bg_mode=logo_bg_mode,
         safe_mode=safe_mode,
     )
-    result = generate_qr_png(
-        payload=dynamic_url,
-        size=design.qr_size,
-        fg=design.fg,
-        bg=design.bg,
-        module_style=design.module_style,
-        eye_style=design.eye_style,
-        logo_path=logo_fs_path,
-        frame_style=design.frame_style,
-        logo_scale=design.logo_scale,
-        logo_bg_mode=design.logo_bg_mode,
-        quiet_zone=design.quiet_zone,
-        dpi=design.dpi,
-    )
-    
-    qr_bytes = result if isinstance(result, bytes) else result.get("bytes", b"")
-    
-    # Bild speichern
-    qr_file = QR_DIR / f"pdf_{slug}.png"
-    with open(qr_file, "wb") as f:
-        f.write(qr_bytes)
     
     # Temporäres QR-Objekt erstellen um Daten zu verschlüsseln
     temp_qr = QRCode()
     temp_qr.set_data(
         {
-            "pdf_path": str(pdf_path),
+            "pdf_path": pdf_path,
             "title": title,
             "logo_path": logo_public_path,
             "design": {
@@ -184,7 +153,6 @@ async def create_pdf_qr(
         type="pdf",
         encrypted_content=encrypted_content,  # 🔐 Verschlüsselt
         dynamic_url=dynamic_url,
-        image_path=str(qr_file),
         logo_path=logo_public_path,
         style=design.style,
         color_fg=design.fg,
@@ -193,16 +161,14 @@ async def create_pdf_qr(
         frame_style=design.frame_style,
         title=title or f"PDF: {file.filename}",
     )
+    qr.image_path = qr_image_path(qr)
     db.add(qr)
     db.commit()
     db.refresh(qr)
     
-    # Base64 für Preview
-    qr_base64 = base64.b64encode(qr_bytes).decode("utf-8")
-    
     return templates.TemplateResponse(
         "qr_pdf_result.html",
-        {"request": request, "qr": qr, "qr_image": qr_base64, "dynamic_url": dynamic_url},
+        {"request": request, "qr": qr, "qr_image": qr.image_path, "dynamic_url": dynamic_url},
     )
 
 
@@ -234,13 +200,7 @@ async def update_pdf_qr(
     # Optional: Neue PDF-Datei hochladen
     if file and file.filename:
         file_ext = file.filename.split(".")[-1] if file.filename else "pdf"
-        pdf_filename = f"{qr.slug}.{file_ext}"
-        pdf_path = PDF_DIR / pdf_filename
-        
-        content = await file.read()
-        with open(pdf_path, "wb") as f:
-            f.write(content)
-        existing_data["pdf_path"] = str(pdf_path)
+        existing_data["pdf_path"] = blob_store.put(await file.read(), "pdfs", file_ext)
     
     # Daten verschlüsselt speichern
     qr.set_data(existing_data)  # 🔐 Verschlüsseln
@@ -5,9 +5,7 @@
 
 from __future__ import annotations
 import uuid
-import base64
 import html
-from pathlib import Path
 from typing import Optional
 
 from fastapi import APIRouter, Request, Form, Depends, HTTPException, UploadFile, File
@@ -20,16 +18,14 @@ from models.qrcode import QRCode
 from routes.qr.dynamic_url import build_dynamic_url
 from routes.qr.logo_utils import save_qr_logo
 from routes.utils import normalize_url
-from utils.qr_generator import generate_qr_png
 from utils.qr_design import resolve_design
+from utils.blob_storage import blob_store
+from utils.qr_image import qr_image_path
 
 router = APIRouter(prefix="/qr/social", tags=["Social QR"])
 
 templates = Jinja2Templates(directory="templates")
 
-QR_DIR = Path("static/generated_qr")
-QR_DIR.mkdir(parents=True, exist_ok=True)
-
 
 @router.get("/", response_class=HTMLResponse)
 def show_form(request: Request) -> HTMLResponse:
@@ -74,7 +70,7 @@ async def create_social_qr(
     if not user_id:
         raise HTTPException(status_code=401, detail="Nicht eingeloggt")
     slug = uuid.uuid4().hex[:10]
-    logo_fs_path, logo_public_path = save_qr_logo(logo, slug, "social_logo")
+    _, logo_public_path = save_qr_logo(logo, slug, "social_logo")
 
     links = {
         "Website": normalize_url(website) if website else "",
@@ -101,7 +97,7 @@ async def create_social_qr(
         if link
     )
     avatar_html = (
-        f'<img class="social-avatar" src="{html.escape(logo_public_path)}" alt="Profilbild">'
+        f'<img class="social-avatar" src="{html.escape(blob_store.url(logo_public_path))}" alt="Profilbild">'
         if logo_public_path
         else ""
     )
@@ -151,27 +147,6 @@ async def create_social_qr(
         logo_bg_mode=logo_bg_mode,
         safe_mode=safe_mode,
     )
-    result = generate_qr_png(
-        payload=dynamic_url,
-        size=design.qr_size,
-        fg=design.fg,
-        bg=design.bg,
-        module_style=design.module_style,
-        eye_style=design.eye_style,
-        logo_path=logo_fs_path,
-        frame_style=design.frame_style,
-        logo_scale=design.logo_scale,
-        logo_bg_mode=design.logo_bg_mode,
-        quiet_zone=design.quiet_zone,
-        dpi=design.dpi,
-    )
-    
-    qr_bytes = result if isinstance(result, bytes) else result.get("bytes", b"")
-    
-    # Bild speichern
-    qr_file = QR_DIR / f"social_{slug}.png"
-    with open(qr_file, "wb") as f:
-        f.write(qr_bytes)
     
     # In DB speichern
     qr = QRCode(
@@ -179,7 +154,6 @@ async def create_social_qr(
         slug=slug,
         type="social",
         dynamic_url=dynamic_url,
-        image_path=str(qr_file),
         logo_path=logo_public_path,
         style=design.style,
         color_fg=design.fg,
@@ -223,14 +197,12 @@ async def create_social_qr(
             },
         }
     )
+    qr.image_path = qr_image_path(qr)
     db.add(qr)
     db.commit()
     db.refresh(qr)
     
-    # Base64 für Preview
-    qr_base64 = base64.b64encode(qr_bytes).decode("utf-8")
-    
     return templates.TemplateResponse(
         "qr_social_result.html",
-        {"request": request, "qr": qr, "qr_image": qr_base64, "dynamic_url": dynamic_url, "name": display_name},
+        {"request": request, "qr": qr, "qr_image": qr.image_path, "dynamic_url": dynamic_url, "name": display_name},
     )
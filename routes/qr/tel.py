@@ -6,8 +6,6 @@
 from __future__ import annotations
 import os
 import uuid
-import base64
-from pathlib import Path
 from typing import Optional
 
 from fastapi import APIRouter, Request, Form, Depends, HTTPException, UploadFile, File
@@ -18,15 +16,13 @@ from sqlalchemy.orm import Session
 from database import get_db
 from models.qrcode import QRCode
 from routes.qr.logo_utils import save_qr_logo
-from utils.qr_generator import generate_qr_png
 from utils.qr_design import resolve_design
+from utils.qr_image import qr_image_path
 
 router = APIRouter(prefix="/qr/tel", tags=["Tel QR"])
 
 templates = Jinja2Templates(directory="templates")
 
-QR_DIR = Path("static/generated_qr")
-QR_DIR.mkdir(parents=True, exist_ok=True)
 
 def _build_dynamic_url(request: Request, slug: str) -> str:
     base_url = str(request.base_url).rstrip("/")
@@ -68,7 +64,7 @@ async def create_tel_qr(
     if not user_id:
         raise HTTPException(status_code=401, detail="Nicht eingeloggt")
     slug = uuid.uuid4().hex[:10]
-    logo_fs_path, logo_public_path = save_qr_logo(logo, slug, "tel_logo")
+    _, logo_public_path = save_qr_logo(logo, slug, "tel_logo")
     
     # Tel URL erstellen
     tel_url = f"tel:{phone}"
@@ -76,9 +72,6 @@ async def create_tel_qr(
     # Dynamische URL
     dynamic_url = _build_dynamic_url(request, slug)
     
-    # QR-Code generieren
-    payload = dynamic_url
-    
     design = resolve_design(
         style=style,
         fg_color=fg_color,
@@ -93,27 +86,6 @@ async def create_tel_qr(
         logo_bg_mode=logo_bg_mode,
         safe_mode=safe_mode,
     )
-    result = generate_qr_png(
-        payload=payload,
-        size=design.qr_size,
-        fg=design.fg,
-        bg=design.bg,
-        module_style=design.module_style,
-        eye_style=design.eye_style,
-        logo_path=logo_fs_path,
-        frame_style=design.frame_style,
-        logo_scale=design.logo_scale,
-        logo_bg_mode=design.logo_bg_mode,
-        quiet_zone=design.quiet_zone,
-        dpi=design.dpi,
-    )
-    
-    qr_bytes = result if isinstance(result, bytes) else result.get("bytes", b"")
-    
-    # Bild speichern
-    qr_file = QR_DIR / f"tel_{slug}.png"
-    with open(qr_file, "wb") as f:
-        f.write(qr_bytes)
     
     # Inhalt verschlüsseln
     temp_qr = QRCode()
@@ -147,7 +119,6 @@ async def create_tel_qr(
         type="tel",
         encrypted_content=temp_qr.encrypted_content,
         dynamic_url=dynamic_url,
-        image_path=str(qr_file),
         logo_path=logo_public_path,
         style=design.style,
         color_fg=design.fg,
@@ -156,19 +127,17 @@ async def create_tel_qr(
         frame_style=design.frame_style,
         title=title or f"Tel: {phone}",
     )
+    qr.image_path = qr_image_path(qr)
     db.add(qr)
     db.commit()
     db.refresh(qr)
     
-    # Base64 für Preview
-    qr_base64 = base64.b64encode(qr_bytes).decode("utf-8")
-    
     return templates.TemplateResponse(
         "qr_tel_result.html",
         {
             "request": request,
             "qr": qr,
-            "qr_image": qr_base64,
+            "qr_image": qr.image_path,
             "dynamic_url": dynamic_url,
             "tel": tel_url,
             "phone": phone,
@@ -6,8 +6,6 @@
 
 from __future__ import annotations
 import uuid
-import base64
-from pathlib import Path
 from typing import Optional
 
 from fastapi import APIRouter, Request, Form, Depends, HTTPException, UploadFile, File
@@ -21,16 +19,13 @@ from routes.auth import get_current_user
 from routes.qr.dynamic_url import build_dynamic_url
 from routes.qr.logo_utils import save_qr_logo
 from utils.access_control import can_edit_qr
-from utils.qr_generator import generate_qr_png
 from utils.qr_design import resolve_design
+from utils.qr_image import qr_image_path
 
 router = APIRouter(prefix="/qr/url", tags=["URL QR"])
 
 templates = Jinja2Templates(directory="templates")
 
-QR_DIR = Path("static/generated_qr")
-QR_DIR.mkdir(parents=True, exist_ok=True)
-
 
 @router.get("/", response_class=HTMLResponse)
 def show_form(request: Request) -> HTMLResponse:
@@ -64,7 +59,7 @@ async def create_url_qr(
     if not user_id:
         raise HTTPException(status_code=401, detail="Nicht eingeloggt")
     slug = uuid.uuid4().hex[:10]
-    logo_fs_path, logo_public_path = save_qr_logo(logo, slug, "url_logo")
+    _, logo_public_path = save_qr_logo(logo, slug, "url_logo")
     
     # Dynamische URL für den QR-Code
     dynamic_url = build_dynamic_url(request, slug)
@@ -85,28 +80,6 @@ async def create_url_qr(
         safe_mode=safe_mode,
     )
 
-    result = generate_qr_png(
-        payload=dynamic_url,
-        size=design.qr_size,
-        fg=design.fg,
-        bg=design.bg,
-        module_style=design.module_style,
-        eye_style=design.eye_style,
-        logo_path=logo_fs_path,
-        frame_style=design.frame_style,
-        logo_scale=design.logo_scale,
-        logo_bg_mode=design.logo_bg_mode,
-        quiet_zone=design.quiet_zone,
-        dpi=design.dpi,
-    )
-    
-    qr_bytes = result if isinstance(result, bytes) else result.get("bytes", b"")
-    
-    # Bild speichern
-    qr_file = QR_DIR / f"url_{slug}.png"
-    with open(qr_file, "wb") as f:
-        f.write(qr_bytes)
-    
     # Temporäres QR-Objekt erstellen um Daten zu verschlüsseln
     temp_qr = QRCode()
     temp_qr.set_data(
@@ -144,7 +117,6 @@ async def create_url_qr(
         type="url",
         encrypted_content=encrypted_content,  # 🔐 Verschlüsselt
         dynamic_url=dynamic_url,
-        image_path=str(qr_file),
         logo_path=logo_public_path,
         style=design.style,
         color_fg=design.fg,
@@ -153,19 +125,17 @@ async def create_url_qr(
         frame_style=design.frame_style,
         title=name,
     )
+    qr.image_path = qr_image_path(qr)
     db.add(qr)
     db.commit()
     db.refresh(qr)
     
-    # Base64 für Preview
-    qr_base64 = base64.b64encode(qr_bytes).decode("utf-8")
-    
     return templates.TemplateResponse(
         "qr_url_result.html",
         {
             "request": request,
             "qr": qr,
-            "qr_image": qr_base64,
+            "qr_image": qr.image_path,
             "dynamic_url": dynamic_url,
             "target_url": url,
         },
@@ -7,8 +7,6 @@
 from __future__ import annotations
 import os
 import uuid
-import base64
-from pathlib import Path
 from typing import Optional
 
 from fastapi import APIRouter, Request, Form, Depends, HTTPException, UploadFile, File
@@ -19,37 +17,21 @@ from sqlalchemy.orm import Session
 from database import get_db
 from models.qrcode import QRCode
 from routes.auth import get_current_user
+from routes.qr.logo_utils import save_qr_logo
 from routes.utils import normalize_url
 from utils.access_control import can_edit_qr
+from utils.download_artifacts import artifact_cache, artifact_response, build_artifact, content_version
 from utils.qr_design import resolve_design
-from utils.qr_generator import generate_qr_png
+from utils.qr_image import qr_image_path
 
 router = APIRouter(prefix="/qr/vcard", tags=["vCard QR"])
 
 templates = Jinja2Templates(directory="templates")
 
-QR_DIR = Path("static/generated_qr")
-QR_DIR.mkdir(parents=True, exist_ok=True)
-LOGO_DIR = Path("static/logos")
-LOGO_DIR.mkdir(parents=True, exist_ok=True)
-
-
 def _save_logo(upload: UploadFile | None, slug: str, prefix: str = "vcard_logo") -> tuple[Optional[str], Optional[str]]:
-    """Speichert ein hochgeladenes Bild und gibt (filesystem_path, public_path) zurück."""
-    if not upload or not upload.filename:
-        return None, None
-
-    ext = Path(upload.filename).suffix.lower() or ".png"
-    if ext not in {".png", ".jpg", ".jpeg", ".webp"}:
-        return None, None
-
-    filename = f"{prefix}_{slug}{ext}"
-    fs_path = LOGO_DIR / filename
-    with open(fs_path, "wb") as f:
-        f.write(upload.file.read())
+    """Speichert ein hochgeladenes Bild im Blob-Store und gibt (filesystem_path, storage_key) zurück."""
+    return save_qr_logo(upload, slug, prefix)
 
-    public_path = f"/static/logos/{filename}"
-    return str(fs_path), public_path
 
 def _build_dynamic_url(request: Request, slug: str) -> str:
     base_url = str(request.base_url).rstrip("/")
@@ -112,16 +94,7 @@ def edit_vcard_form(
     )
 
 
-@router.get("/{slug}.vcf")
-def download_vcard(slug: str, db: Session = Depends(get_db)):
-    """Download vCard as .vcf file."""
-    from fastapi.responses import FileResponse
-    
-    qr = db.query(QRCode).filter(QRCode.slug == slug, QRCode.type == "vcard").first()
-    if not qr:
-        raise HTTPException(404, "vCard nicht gefunden")
-    
-    vcard_data = qr.get_data() or {}  # 🔐 Automatisch entschlüsselt
+def _download_vcard_text(vcard_data: dict) -> str:
     vcard_text = vcard_data.get("vcard_text") or vcard_data.get("vcard", "")
     
     if not vcard_text:
@@ -150,12 +123,21 @@ def download_vcard(slug: str, db: Session = Depends(get_db)):
         if website:
             vcard_text += f"URL:{website}\n"
         vcard_text += "END:VCARD\n"
-    
-    path = f"/tmp/vcard_{slug}.vcf"
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(vcard_text)
-    
-    return FileResponse(path, filename=f"{slug}.vcf", media_type="text/vcard")
+    return vcard_text
+
+
+@router.get("/{slug}.vcf")
+def download_vcard(slug: str, request: Request, db: Session = Depends(get_db)):
+    """Download vCard as .vcf file (im Speicher, mit ETag / 304)."""
+    qr = db.query(QRCode).filter(QRCode.slug == slug, QRCode.type == "vcard").first()
+    if not qr:
+        raise HTTPException(404, "vCard nicht gefunden")
+
+    artifact = artifact_cache.get_or_build(
+        ("vcard-file", slug, content_version(qr.encrypted_content)),
+        lambda: build_artifact(_download_vcard_text(qr.get_data() or {}), "text/vcard", f"{slug}.vcf"),
+    )
+    return artifact_response(request, artifact)
 
 
 # =============================================================================
@@ -259,7 +241,7 @@ async def create_vcard_qr(
     # Profilbild und QR-Logo getrennt speichern
     profile_fs_path, profile_public_path = _save_logo(profile_image, slug, "vcard_profile")
     qr_logo_upload = qr_logo or logo
-    qr_logo_fs_path, qr_logo_public_path = _save_logo(qr_logo_upload, slug, "vcard_qr_logo")
+    _, qr_logo_public_path = _save_logo(qr_logo_upload, slug, "vcard_qr_logo")
     
     design = resolve_design(
         style=style,
@@ -276,28 +258,6 @@ async def create_vcard_qr(
         safe_mode=safe_mode,
     )
 
-    result = generate_qr_png(
-        payload=dynamic_url,
-        size=design.qr_size,
-        fg=design.fg,
-        bg=design.bg,
-        module_style=design.module_style,
-        eye_style=design.eye_style,
-        logo_path=qr_logo_fs_path,
-        frame_style=design.frame_style,
-        logo_scale=design.logo_scale,
-        logo_bg_mode=design.logo_bg_mode,
-        quiet_zone=design.quiet_zone,
-        dpi=design.dpi,
-    )
-    
-    qr_bytes = result if isinstance(result, bytes) else result.get("bytes", b"")
-    
-    # Bild speichern
-    qr_file = QR_DIR / f"vcard_{slug}.png"
-    with open(qr_file, "wb") as f:
-        f.write(qr_bytes)
-    
     # Daten für Verschlüsselung vorbereiten
     vcard_data = {
         "vcard": vcard_text,
@@ -356,7 +316,6 @@ async def create_vcard_qr(
         type="vcard",
         encrypted_content=encrypted_content,  # 🔐 Verschlüsselt
         dynamic_url=dynamic_url,
-        image_path=str(qr_file),
         logo_path=qr_logo_public_path,
         style=design.style,
         color_fg=design.fg,
@@ -365,19 +324,17 @@ async def create_vcard_qr(
         frame_style=design.frame_style,
         title=f"{first_name} {last_name}",
     )
+    qr.image_path = qr_image_path(qr)
     db.add(qr)
     db.commit()
     db.refresh(qr)
     
-    # Base64 für Preview
-    qr_base64 = base64.b64encode(qr_bytes).decode("utf-8")
-    
     return templates.TemplateResponse(
         "vcard_result.html",
         {
             "request": request,
             "qr": qr,
-            "qr_image": qr_base64,
+            "qr_image": qr.image_path,
             "dynamic_url": dynamic_url,
             "vcard": vcard_data,
         },
@@ -10,8 +10,6 @@
 
 from __future__ import annotations
 import uuid
-import base64
-from pathlib import Path
 from typing import Union, Dict, Any, Optional
 
 from fastapi import APIRouter, Request, Form, Depends, HTTPException
@@ -24,17 +22,13 @@ from models.qrcode import QRCode
 from routes.auth import get_current_user
 from routes.qr.dynamic_url import build_dynamic_url
 from utils.access_control import can_edit_qr
-from utils.qr_generator import generate_qr_png
-from utils.qr_config import get_qr_style
 from utils.encryption import encrypt_qr_content
+from utils.qr_image import qr_image_path
 
 router = APIRouter(prefix="/qr", tags=["QR-Codes"])
 
 templates = Jinja2Templates(directory="templates")
 
-QR_DIR = Path("static/generated_qr")
-QR_DIR.mkdir(parents=True, exist_ok=True)
-
 
 # =============================================================================
 # ✅ FORMULAR
@@ -198,39 +192,6 @@ async def create_qr(
     # ✅ Dynamische URL
     dynamic_url = build_dynamic_url(request, slug)
 
-    # -----------------------------------------------------------
-    # ✅ QR-Code erzeugen
-    # -----------------------------------------------------------
-    style_conf = get_qr_style(style)
-
-    def normalize_qr_result(result: Any) -> bytes:
-        """Konvertiert dict/bytes zu echten bytes."""
-        if isinstance(result, (bytes, bytearray)):
-            return bytes(result)
-        if isinstance(result, dict) and "bytes" in result:
-            return result["bytes"]
-        raise TypeError(f"Invalid QR result type: {type(result)}")
-
-    result = generate_qr_png(
-        payload=dynamic_url,
-        size=600,
-        fg=style_conf["fg"],
-        bg=style_conf["bg"],
-        gradient=style_conf.get("gradient"),
-        frame_color=style_conf.get("frame_color"),
-        module_style=style_conf.get("module_style"),
-        eye_style=style_conf.get("eye_style"),
-    )
-
-    qr_bytes = normalize_qr_result(result)
-
-    # -----------------------------------------------------------
-    # ✅ Bild speichern
-    # -----------------------------------------------------------
-    qr_file = QR_DIR / f"{qr_type}_{slug}.png"
-    with open(qr_file, "wb") as f:
-        f.write(qr_bytes)
-
     # -----------------------------------------------------------
     # ✅ In DB speichern
     # -----------------------------------------------------------
@@ -240,25 +201,21 @@ async def create_qr(
         type=qr_type.lower(),
         encrypted_content=encrypted,  # 🔐 Verschlüsselte Inhalte speichern
         dynamic_url=dynamic_url,
-        image_path=str(qr_file),
         style=style,
         title=f"{qr_type.upper()} QR",
     )
+    # Bild wird erst beim ersten Abruf von /qr/img/<slug>.png gerendert
+    qr.image_path = qr_image_path(qr)
     db.add(qr)
     db.commit()
     db.refresh(qr)
 
-    # -----------------------------------------------------------
-    # ✅ Base64 für Preview
-    # -----------------------------------------------------------
-    qr_base64 = base64.b64encode(qr_bytes).decode("utf-8")
-
     return templates.TemplateResponse(
         "qr_create_result.html",
         {
             "request": request,
             "qr": qr,
-            "qr_image": qr_base64,
+            "qr_image": qr.image_path,
             "dynamic_url": dynamic_url,
         },
     )
@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import Response
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models.qrcode import QRCode
+from utils.qr_image import (
+    IMAGE_FORMATS,
+    THUMB_FORMATS,
+    THUMB_WIDTHS,
+    design_version,
+    render_thumbnail,
+    size_bucket,
+    sized_params,
+    stored_render_params,
+    thumb_version,
+)
+from utils.qr_png import encoder_name
+from utils.render_cache import RESULT_KEYS, render_qr_cached_async
+
+router = APIRouter(prefix="/qr/img", tags=["QR-Bilder"])
+
+# Mit passendem ?v= ändert sich der Inhalt einer URL nie (neues Design = neue Version)
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=300"
+# Welcher Encoder das Rasterbild geschrieben hat (z. B. indexed-1bit, webp-lossless)
+ENCODER_HEADER = "X-QR-Encoder"
+
+
+def _load(db: Session, slug: str) -> QRCode:
+    qr: Optional[QRCode] = db.query(QRCode).filter(QRCode.slug == slug).first()
+    if qr is None:
+        raise HTTPException(status_code=404, detail="QR-Code nicht gefunden")
+    return qr
+
+
+# Vor /{slug}.{fmt} registriert, sonst landete "<slug>-128.webp" dort
+@router.get("/{slug}-{width:int}.{fmt}", include_in_schema=False)
+async def qr_thumbnail(
+    slug: str,
+    width: int,
+    fmt: str,
+    request: Request,
+    v: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Vorschaubild (64/128/256 px, PNG oder WebP) für Listen mit srcset."""
+    fmt = fmt.lower()
+    if width not in THUMB_WIDTHS or fmt not in THUMB_FORMATS:
+        raise HTTPException(status_code=404, detail="Not found")
+    params = stored_render_params(_load(db, slug))
+    version = thumb_version(params)
+
+    etag = f'"{version}-t{width}-{fmt}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE if v == version else REVALIDATE}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    data = await render_thumbnail(params, width, fmt)
+    headers[ENCODER_HEADER] = encoder_name(fmt, data) or ""
+    return Response(content=data, media_type=THUMB_FORMATS[fmt], headers=headers)
+
+
+@router.get("/{slug}.{fmt}", include_in_schema=False)
+async def qr_image(
+    slug: str,
+    fmt: str,
+    request: Request,
+    size: Optional[int] = None,
+    v: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """
+    QR-Bild on demand: beim ersten Abruf aus dem gespeicherten Design
+    gerendert, danach aus dem Render-Cache (Schlüssel enthält das Design).
+    Auch deaktivierte Codes werden ausgeliefert – das Bild enthält nur die
+    /d/-URL (die der Resolver sperrt) und bleibt im Dashboard sichtbar.
+    """
+    fmt = fmt.lower()
+    if fmt not in IMAGE_FORMATS:
+        raise HTTPException(status_code=404, detail="Not found")
+    params = stored_render_params(_load(db, slug))
+    version = design_version(params)
+    params = sized_params(params, size_bucket(size, params["size"]))
+
+    etag = f'"{version}-{params["size"]}-{fmt}"'
+    headers = {"ETag": etag, "Cache-Control": IMMUTABLE if v == version else REVALIDATE}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    result = await render_qr_cached_async(formats=(fmt,), **params)
+    encoder = result["encoding"].get(f"{fmt}_encoder")
+    if encoder:
+        headers[ENCODER_HEADER] = encoder
+    return Response(content=result[RESULT_KEYS[fmt]], media_type=IMAGE_FORMATS[fmt], headers=headers)
@@ -17,7 +17,6 @@ from typing import Union, Optional, Dict, Any
 
 import os
 import json
-import random
 from datetime import datetime, timezone
 from urllib.parse import urlencode, urlsplit, urlunsplit, parse_qsl
 from fastapi import APIRouter, Depends, HTTPException, Request
@@ -26,13 +25,27 @@ from fastapi.responses import (
     FileResponse,
     PlainTextResponse,
     HTMLResponse,
+    Response,
 )
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect, update
+from sqlalchemy.orm import Session, noload
 
 from database import get_db
 from models.qrcode import QRCode
-from models.qr_scan import QRScan
-from models.qr_conversion import QRConversion
+from utils.blob_storage import blob_store
+from utils.download_artifacts import (
+    DownloadArtifact,
+    artifact_cache,
+    artifact_response,
+    build_artifact,
+    content_version,
+)
+from utils.redirect_read_model import backfill_redirect, load_redirect
+from utils.rate_shield import allow_lookup, client_ip, retry_after_seconds
+from utils.resolve_cache import ResolvedQR, resolve_cache
+from utils.routing_rules import RequestAttributes
+from utils.scan_ingest import scan_ingestor
+from utils.user_agent import classify_user_agent
 
 router = APIRouter(tags=["QR-Resolver"])
 
@@ -42,6 +55,7 @@ ResponseType = Union[
     FileResponse,
     PlainTextResponse,
     HTMLResponse,
+    Response,
 ]
 
 
@@ -89,31 +103,97 @@ def _build_vcard_text(data: Dict[str, Any]) -> str:
     return vcard_text
 
 
-def _device_bucket(user_agent: str) -> str:
-    ua = (user_agent or "").lower()
-    if "iphone" in ua or "ipad" in ua:
-        return "ios"
-    if "android" in ua:
-        return "android"
-    if "windows" in ua or "macintosh" in ua or "linux" in ua:
-        return "desktop"
-    return "other"
+def _vcard_artifact(slug: str, data: Dict[str, Any]) -> Optional[DownloadArtifact]:
+    vcard_text = _build_vcard_text(data)
+    if not vcard_text:
+        return None
+    return build_artifact(vcard_text, "text/vcard", f"vcard_{slug}.vcf")
 
 
 TEST_IPS = {"127.0.0.1", "::1", "localhost"}
 
 
-def _is_test_user_agent(user_agent: str) -> bool:
-    ua = (user_agent or "").lower()
-    return (
-        ua.startswith("curl/")
-        or "postmanruntime" in ua
-        or "insomnia" in ua
-        or "httpie/" in ua
+def _client_ip(request: Request) -> Optional[str]:
+    peer = request.client.host if request.client else None
+    return client_ip(request.headers.get("x-forwarded-for"), peer)
+
+
+def load_resolved(db: Session, slug: str, client_ip: Optional[str] = None) -> Optional[ResolvedQR]:
+    """
+    Liefert den Auflösungsdatensatz für einen aktiven Slug.
+    Reihenfolge: Prozess-Cache -> Negativ-Cache -> Flood-Shield ->
+    qr_redirects (PK-Lookup) -> qr_codes.
+    Fehlt die Read-Model-Zeile (Altbestand), wird sie hier nachgetragen.
+    """
+    cached = resolve_cache.get(slug)
+    if cached is not None:
+        return cached
+    if resolve_cache.is_known_missing(slug):
+        return None
+    if not allow_lookup(slug, client_ip):
+        raise HTTPException(
+            429,
+            "Zu viele Anfragen",
+            headers={"Retry-After": str(retry_after_seconds())},
+        )
+
+    projected = load_redirect(db, slug)
+    if projected is not None:
+        if not projected.active:
+            resolve_cache.put_missing(slug)
+            return None
+        resolve_cache.put(projected)
+        return projected
+
+    qr: Optional[QRCode] = (
+        db.query(QRCode)
+        .options(noload(QRCode.scans))
+        .filter(QRCode.slug == slug, QRCode.active == True)
+        .first()
+    )
+    if not qr:
+        resolve_cache.put_missing(slug)
+        return None
+
+    record = ResolvedQR(
+        qr_id=int(qr.id),
+        slug=str(qr.slug),
+        type=str(qr.type or "").lower(),
+        user_id=int(qr.user_id),
+        active=bool(qr.active),
+        data=qr.get_data() or {},
+        version=content_version(qr.encrypted_content),
     )
+    _persist_encryption_upgrade(db, qr)
+    backfill_redirect(db, qr)
+    resolve_cache.put(record)
+    return record
+
 
+def _persist_encryption_upgrade(db: Session, qr: QRCode) -> None:
+    """
+    get_data() hat einen v1-Blob ggf. auf v2 umgeschrieben. Der Resolver
+    committet sonst nie, daher hier direkt speichern – ohne updated_at zu ändern.
+    """
+    history = inspect(qr).attrs.encrypted_content.history
+    if not history.has_changes():
+        return
+    table = QRCode.__table__
+    new_blob = qr.encrypted_content
+    # ORM-Objekt lösen, damit der Commit kein zweites UPDATE (mit onupdate) erzeugt
+    db.expunge(qr)
+    try:
+        db.execute(
+            update(table)
+            .where(table.c.id == qr.id)
+            .values(encrypted_content=new_blob, updated_at=table.c.updated_at)
+        )
+        db.commit()
+    except Exception:
+        db.rollback()
 
-def _should_track_scan(qr: QRCode, request: Request) -> bool:
+
+def _should_track_scan(qr: ResolvedQR, request: Request) -> bool:
     force_track = (request.query_params.get("track") or "").lower() in {"1", "true", "yes"}
     if force_track:
         return True
@@ -123,7 +203,7 @@ def _should_track_scan(qr: QRCode, request: Request) -> bool:
 
     if client_ip in TEST_IPS:
         return False
-    if _is_test_user_agent(user_agent):
+    if classify_user_agent(user_agent).is_test_tool:
         return False
 
     # Eigene Vorschau-Aufrufe des Besitzers nicht als echten Scan zählen
@@ -153,90 +233,67 @@ def _append_utm(url: str, utm: Dict[str, Any], slug: str) -> str:
     return urlunsplit(parts)
 
 
-def _rule_matches(rule: Dict[str, Any], request: Request) -> bool:
-    # Zeitfenster (UTC, HH:MM)
-    now = datetime.now(timezone.utc).strftime("%H:%M")
-    from_time = str(rule.get("time_from", "")).strip()
-    to_time = str(rule.get("time_to", "")).strip()
-    if from_time and to_time and not (from_time <= now <= to_time):
-        return False
-
-    # Land: via Header X-Country oder Query ?country=
-    req_country = (request.headers.get("x-country") or request.query_params.get("country") or "").upper()
-    countries = [str(c).upper() for c in (rule.get("countries") or [])]
-    if countries and req_country not in countries:
-        return False
-
-    # Sprache: Accept-Language
-    lang = (request.headers.get("accept-language") or "").lower()
-    langs = [str(l).lower() for l in (rule.get("languages") or [])]
-    if langs and not any(l in lang for l in langs):
-        return False
+def _resolve_url_target(qr: ResolvedQR, data: Dict[str, Any], attrs: RequestAttributes) -> str:
+    utm = data.get("utm") or {}
 
-    # Gerät
-    device = _device_bucket(request.headers.get("user-agent") or "")
-    devices = [str(d).lower() for d in (rule.get("devices") or [])]
-    if devices and device not in devices:
-        return False
-    return True
-
-
-def _pick_ab_target(ab_targets: list[dict[str, Any]]) -> Optional[str]:
-    if not ab_targets:
-        return None
-    urls = []
-    weights = []
-    for t in ab_targets:
-        u = t.get("url")
-        if not u:
-            continue
-        urls.append(str(u))
-        weights.append(float(t.get("weight", 1.0) or 1.0))
-    if not urls:
-        return None
-    return random.choices(urls, weights=weights, k=1)[0]
-
-
-def _resolve_url_target(qr: QRCode, data: Dict[str, Any], request: Request) -> str:
-    # 1) Regel-basiert
-    rules = data.get("rules") or []
-    for rule in rules:
-        if isinstance(rule, dict) and _rule_matches(rule, request):
-            target = str(rule.get("target_url") or "")
-            if target:
-                return _append_utm(target, data.get("utm") or {}, qr.slug)
+    # 1) Regel-basiert (vorkompiliert pro QR-Version)
+    target = qr.routing.match_rule(attrs)
+    if target:
+        return _append_utm(target, utm, qr.slug)
 
     # 2) A/B-Ziel
-    ab_target = _pick_ab_target(data.get("ab_targets") or [])
+    ab_target = qr.routing.pick_ab_target()
     if ab_target:
-        return _append_utm(ab_target, data.get("utm") or {}, qr.slug)
+        return _append_utm(ab_target, utm, qr.slug)
 
     # 3) Default
     default_target = data.get("url") or data.get("target_url") or "/"
-    return _append_utm(str(default_target), data.get("utm") or {}, qr.slug)
+    return _append_utm(str(default_target), utm, qr.slug)
 
 
-def _track_conversion(db: Session, qr: QRCode, request: Request, event_type: str = "visit") -> None:
-    try:
-        conv = QRConversion(
-            qr_id=qr.id,
-            slug=qr.slug,
-            event_type=event_type,
-            ip_address=request.client.host if request.client else None,
-            user_agent=(request.headers.get("user-agent") or "")[:255],
-            meta_json=json.dumps(
-                {
-                    "country": request.headers.get("x-country") or request.query_params.get("country"),
-                    "lang": request.headers.get("accept-language"),
-                    "device": _device_bucket(request.headers.get("user-agent") or ""),
-                },
-                ensure_ascii=False,
-            ),
+def _scan_row(qr: ResolvedQR, request: Request) -> Dict[str, Any]:
+    client_ip = request.client.host if request.client else "unknown"
+    user_agent = request.headers.get("user-agent", "unknown")
+    return {
+        "qr_id": qr.qr_id,
+        "device": user_agent[:50] if user_agent else "unknown",
+        "location": client_ip,
+        "user_agent": user_agent[:255] if user_agent else None,
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+
+def _conversion_row(
+    qr: ResolvedQR,
+    request: Request,
+    event_type: str = "visit",
+    value: Optional[float] = None,
+    currency: Optional[str] = None,
+    with_meta: bool = True,
+    attrs: Optional[RequestAttributes] = None,
+) -> Dict[str, Any]:
+    meta_json = None
+    if with_meta:
+        attrs = attrs or RequestAttributes.from_request(request)
+        meta_json = json.dumps(
+            {
+                "country": request.headers.get("x-country") or request.query_params.get("country"),
+                "lang": attrs.accept_language or None,
+                "device": attrs.device,
+            },
+            ensure_ascii=False,
         )
-        db.add(conv)
-        db.commit()
-    except Exception:
-        db.rollback()
+    return {
+        "qr_id": qr.qr_id,
+        "slug": qr.slug,
+        "event_type": event_type,
+        "value": value,
+        "currency": currency,
+        "meta_json": meta_json,
+        "ip_address": request.client.host if request.client else None,
+        "user_agent": (request.headers.get("user-agent") or "")[:255],
+        "created_at": datetime.now(timezone.utc),
+    }
 
 
 # =============================================================================
@@ -249,42 +306,33 @@ def resolve(slug: str, request: Request, db: Session = Depends(get_db)) -> Respo
     Entscheidet anhand des QR-Typs, wie weitergeleitet wird.
     """
     
-    # --- QR-Code finden -------------------------------------------------------
-    qr: Optional[QRCode] = (
-        db.query(QRCode)
-        .filter(QRCode.slug == slug, QRCode.active == True)
-        .first()
-    )
+    # --- QR-Code finden (Cache → DB) -----------------------------------------
+    qr = load_resolved(db, slug, _client_ip(request))
 
-    if not qr:
+    if not qr or not qr.active:
         raise HTTPException(404, "QR-Code nicht gefunden")
 
-# --- Scan tracking -------------------------------------------------------
+    # Routing-Merkmale einmal pro Request
+    attrs = RequestAttributes.from_request(request)
+
+    # --- Scan + Visit tracking (gebündelt, außerhalb des Redirect-Pfads) -----
     if _should_track_scan(qr, request):
-        client_ip = request.client.host if request.client else "unknown"
-        user_agent = request.headers.get("user-agent", "unknown")
-        scan = QRScan(
-            qr_id=qr.id,
-            device=user_agent[:50] if user_agent else "unknown",
-            location=client_ip,
-            user_agent=user_agent[:255] if user_agent else None,
-            timestamp=datetime.now(timezone.utc),
+        scan_ingestor.record_scan(
+            db,
+            scan=_scan_row(qr, request),
+            conversion=_conversion_row(qr, request, event_type="visit", attrs=attrs),
         )
-        db.add(scan)
-        db.commit()
 
-    qr_type = qr.type.lower()
-    
-    # 🔐 Verschlüsselte Daten entschlüsseln
-    data: Dict[str, Any] = qr.get_data() or {}
-    if _should_track_scan(qr, request):
-        _track_conversion(db, qr, request, event_type="visit")
+    qr_type = qr.type
+
+    # 🔐 Bereits beim Cache-Aufbau entschlüsselt
+    data: Dict[str, Any] = qr.data
 
     # -------------------------------------------------------------------------
     # ✅ URL
     # -------------------------------------------------------------------------
     if qr_type == "url":
-        return RedirectResponse(_resolve_url_target(qr, data, request))
+        return RedirectResponse(_resolve_url_target(qr, data, attrs))
 
     # -------------------------------------------------------------------------
     # ✅ EMAIL
@@ -345,17 +393,13 @@ def resolve(slug: str, request: Request, db: Session = Depends(get_db)) -> Respo
         if fmt != "vcf" and not download:
             return RedirectResponse(f"/qr/vcard/v/{slug}")
 
-        vcard_text = _build_vcard_text(data)
-        if not vcard_text:
+        artifact = artifact_cache.get_or_build(
+            ("vcard", qr.slug, qr.version),
+            lambda: _vcard_artifact(qr.slug, data),
+        )
+        if artifact is None:
             return RedirectResponse(f"/qr/vcard/v/{slug}")
-
-        filename = f"vcard_{slug}.vcf"
-        path = f"/tmp/{filename}"
-
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(vcard_text)
-
-        return FileResponse(path, filename=filename, media_type="text/vcard")
+        return artifact_response(request, artifact)
 
     # -------------------------------------------------------------------------
     # ✅ EVENT → .ics-Download
@@ -365,22 +409,21 @@ def resolve(slug: str, request: Request, db: Session = Depends(get_db)) -> Respo
         if not ics:
             raise HTTPException(400, "ICS-Inhalt fehlt")
 
-        filename = f"event_{slug}.ics"
-        path = f"/tmp/{filename}"
-
-        with open(path, "w", encoding="utf-8") as f:
-            f.write(ics)
-
-        return FileResponse(path, filename=filename, media_type="text/calendar")
+        artifact = artifact_cache.get_or_build(
+            ("ics", qr.slug, qr.version),
+            lambda: build_artifact(str(ics), "text/calendar", f"event_{qr.slug}.ics"),
+        )
+        return artifact_response(request, artifact)
 
     # -------------------------------------------------------------------------
     # ✅ PDF → Datei-Download
     # -------------------------------------------------------------------------
     if qr_type == "pdf":
-        pdf_path = data.get("pdf_path")
-        if not pdf_path or not os.path.exists(pdf_path):
+        pdf_path = blob_store.local_path(data.get("pdf_path"))
+        if not pdf_path:
             raise HTTPException(404, "PDF wurde nicht gefunden")
-        return FileResponse(pdf_path, filename=os.path.basename(pdf_path))
+        # Blob-Schlüssel sind Inhalts-Hashes -> Download-Name aus dem Slug
+        return FileResponse(pdf_path, filename=f"{qr.slug}{os.path.splitext(pdf_path)[1] or '.pdf'}")
 
     # -------------------------------------------------------------------------
     # ✅ SOCIAL LINK
@@ -427,9 +470,9 @@ def resolve(slug: str, request: Request, db: Session = Depends(get_db)) -> Respo
     # ✅ WALLET
     # -------------------------------------------------------------------------
     if qr_type == "wallet":
-        ua = (request.headers.get("user-agent") or "").lower()
-        is_ios = "iphone" in ua or "ipad" in ua or "ipod" in ua
-        is_android = "android" in ua
+        ua = classify_user_agent(request.headers.get("user-agent"))
+        is_ios = ua.os == "ios"
+        is_android = ua.os == "android"
 
         apple_target = data.get("apple_pass_url", "")
         google_target = data.get("google_pass_url", "")
@@ -459,9 +502,9 @@ def resolve(slug: str, request: Request, db: Session = Depends(get_db)) -> Respo
         android_store = data.get("android_store_url", "")
         web_fallback = data.get("web_fallback_url", "/")
 
-        ua = (request.headers.get("user-agent") or "").lower()
-        is_ios = "iphone" in ua or "ipad" in ua
-        is_android = "android" in ua
+        ua = classify_user_agent(request.headers.get("user-agent"))
+        is_ios = ua.os == "ios"
+        is_android = ua.os == "android"
 
         if not deep_link:
             return RedirectResponse(web_fallback)
@@ -520,19 +563,12 @@ def track_conversion(
     currency: Optional[str] = None,
     db: Session = Depends(get_db),
 ):
-    qr: Optional[QRCode] = db.query(QRCode).filter(QRCode.slug == slug, QRCode.active == True).first()
+    qr = load_resolved(db, slug, _client_ip(request))
     if not qr:
         raise HTTPException(404, "QR-Code nicht gefunden")
 
-    conv = QRConversion(
-        qr_id=qr.id,
-        slug=qr.slug,
-        event_type=event,
-        value=value,
-        currency=currency,
-        ip_address=request.client.host if request.client else None,
-        user_agent=(request.headers.get("user-agent") or "")[:255],
+    scan_ingestor.record_scan(
+        db,
+        conversion=_conversion_row(qr, request, event_type=event, value=value, currency=currency, with_meta=False),
     )
-    db.add(conv)
-    db.commit()
     return {"ok": True, "event": event, "slug": slug}
@@ -16,6 +16,7 @@ from models.qr_share import QRShare
 from models.workspace_member import WorkspaceMember
 from models.workspace_qr import WorkspaceQR
 from utils.access_control import get_qr_role
+from utils.qr_image import WEBP_SUPPORTED, stored_render_params, thumb_path, thumb_srcset
 
 # 📁 Router & Templates
 router = APIRouter(tags=["Profile"])
@@ -31,6 +32,18 @@ def _normalize_image_path(path: str | None) -> str:
     return path if path.startswith("/") else f"/{path}"
 
 
+def _build_qr_thumbs(qr: QRCode) -> dict[str, str]:
+    """64-px-Vorschau + srcset (PNG, optional WebP) statt des vollen QR-Bilds."""
+    if not qr.slug:
+        return {"thumb": _normalize_image_path(qr.image_path), "thumb_srcset": "", "thumb_srcset_webp": ""}
+    params = stored_render_params(qr)
+    return {
+        "thumb": f"/{thumb_path(qr, 64, 'png', params)}",
+        "thumb_srcset": thumb_srcset(qr, "png", params),
+        "thumb_srcset_webp": thumb_srcset(qr, "webp", params) if WEBP_SUPPORTED else "",
+    }
+
+
 def _build_qr_preview(qr: QRCode) -> str:
     data: dict[str, Any] = qr.get_data() or {}
     qr_type = (qr.type or "").lower()
@@ -159,6 +172,7 @@ def profile_page(request: Request, db: Session = Depends(get_db)):
             "access_role": get_qr_role(db, user_id, qr) or "viewer",
             "created_at": qr.created_at,
             "image_path": _normalize_image_path(qr.image_path),
+            **_build_qr_thumbs(qr),
             "preview": _build_qr_preview(qr),
             "view_url": _build_view_url(qr),
             "edit_url": _build_edit_url(qr),
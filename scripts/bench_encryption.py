@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script: bench_encryption.py
+Project: Ouhud QR
+Description:
+    Mikrobenchmark für QR-Inhaltsverschlüsselung:
+    Entschlüsselung im Legacy-Format v1 (PBKDF2 pro Datensatz)
+    gegenüber Format v2 (HKDF-Schlüssel einmal pro Prozess).
+
+    python scripts/bench_encryption.py [--v1-rounds 5] [--v2-rounds 20000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(BASE_DIR)
+
+from utils.encryption import QRContentEncryption  # noqa: E402
+
+SAMPLE = {
+    "url": "https://example.com/landing?campaign=spring",
+    "utm": {"source": "poster", "medium": "print", "campaign": "spring"},
+    "rules": [{"countries": ["DE", "AT"], "target_url": "https://example.de"}],
+    "design": {"style": "modern", "fg": "#0D2A78", "bg": "#FFFFFF", "qr_size": 600},
+}
+
+
+def _bench(label: str, fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    per_call = (time.perf_counter() - start) / rounds
+    print(f"{label:<12} {rounds:>7} Aufrufe   {per_call * 1e6:>12.1f} µs/Aufruf")
+    return per_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark v1 vs. v2 Entschlüsselung")
+    parser.add_argument("--v1-rounds", type=int, default=5)
+    parser.add_argument("--v2-rounds", type=int, default=20000)
+    args = parser.parse_args()
+
+    os.environ.setdefault("ENCRYPTION_KEY", "bench-key-bench-key-bench-key-32")
+    enc = QRContentEncryption()
+    v1_blob = enc._encrypt_v1(SAMPLE)
+    v2_blob = enc.encrypt(SAMPLE)
+    assert enc.decrypt(v1_blob) == enc.decrypt(v2_blob) == SAMPLE
+
+    print("Entschlüsselung (decrypt)")
+    v1 = _bench("v1 (PBKDF2)", lambda: enc.decrypt(v1_blob), args.v1_rounds)
+    v2 = _bench("v2 (HKDF)", lambda: enc.decrypt(v2_blob), args.v2_rounds)
+    print(f"Faktor: {v1 / v2:,.0f}x schneller")
+
+
+if __name__ == "__main__":
+    main()
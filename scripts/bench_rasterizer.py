@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script: bench_rasterizer.py
+Project: Ouhud QR
+Description:
+    Vergleicht den bisherigen Modul-Rasterpfad (StyledPilImage + Drawer pro
+    Modul + SolidFillColorMask pro Pixel) mit dem NumPy-Stamp-Rasterizer
+    aus utils.qr_raster – inkl. Eye-Overlays und NEAREST-Skalierung auf die
+    Zielgröße – und prüft, dass beide pixelgleich sind. Zeilen "+grad"
+    vergleichen RadialGradiantColorMask mit dem NumPy-Verlauf.
+
+    python scripts/bench_rasterizer.py [--rounds 5] [--sizes 600,1800]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(BASE_DIR)
+
+import numpy as np  # noqa: E402
+import qrcode.image.styles.colormasks as mask  # noqa: E402
+from PIL import Image, ImageColor  # noqa: E402
+
+from utils.qr_generator import _build_qr, _draw_eye_overlays, _styled_pil_modules  # noqa: E402
+from utils.qr_raster import rasterize_gradient, rasterize_modules  # noqa: E402
+
+PAYLOAD = "https://ouhud.com/d/bench-raster"
+FG, BG = "#0D2A78", "#FFFFFF"
+GRADIENT = ("#2563EB", "#F472B6")  # Theme "modern"/"ouhud"
+STYLES = ["square", "rounded", "dots", "soft", "thin-line"]
+
+
+def _legacy(qr, style: str, size: int, gradient: bool = False) -> Image.Image:
+    if gradient:
+        color_mask = mask.RadialGradiantColorMask(
+            center_color=ImageColor.getrgb(GRADIENT[0]), edge_color=ImageColor.getrgb(GRADIENT[1])
+        )
+    else:
+        color_mask = mask.SolidFillColorMask(front_color=ImageColor.getrgb(FG), back_color=ImageColor.getrgb(BG))
+    img = _styled_pil_modules(qr, style, color_mask)
+    _draw_eye_overlays(img, qr, FG, BG, "rounded")
+    return img.resize((size, size), Image.Resampling.NEAREST)
+
+
+def _numpy(qr, style: str, size: int, gradient: bool = False) -> Image.Image:
+    if gradient:
+        img = rasterize_gradient(qr, style, ImageColor.getrgb(GRADIENT[0]), ImageColor.getrgb(GRADIENT[1]))
+    else:
+        img = rasterize_modules(qr, style, ImageColor.getrgb(FG), ImageColor.getrgb(BG))
+    _draw_eye_overlays(img, qr, FG, BG, "rounded")
+    return img.resize((size, size), Image.Resampling.NEAREST)
+
+
+def _time(fn, rounds: int) -> tuple:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = fn()
+    return (time.perf_counter() - start) / rounds * 1000, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark QR-Rasterizer")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--sizes", default="600,1800")
+    args = parser.parse_args()
+
+    qr = _build_qr(PAYLOAD)
+    print(f"{'Stil':<15} {'Größe':>6} {'bisher ms':>10} {'numpy ms':>10} {'Faktor':>7}  pixelgleich")
+    for size in [int(s) for s in args.sizes.split(",") if s.strip()]:
+        for style, gradient in [(s, False) for s in STYLES] + [(s, True) for s in STYLES]:
+            legacy_ms, legacy_img = _time(lambda: _legacy(qr, style, size, gradient), args.rounds)
+            numpy_ms, numpy_img = _time(lambda: _numpy(qr, style, size, gradient), args.rounds)
+            same = np.array_equal(np.asarray(legacy_img), np.asarray(numpy_img))
+            label = f"{style}+grad" if gradient else style
+            print(f"{label:<15} {size:>6} {legacy_ms:>10.2f} {numpy_ms:>10.2f} {legacy_ms / numpy_ms:>6.1f}x  {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script: bench_render.py
+Project: Ouhud QR
+Description:
+    Vergleicht die Renderzeit von generate_qr_png (PNG + SVG + PDF +
+    Datei in static/generated_qr) mit render_qr für einzelne Formate.
+
+    python scripts/bench_render.py [--rounds 20] [--size 600]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(BASE_DIR)
+
+from utils.qr_generator import ALL_FORMATS, render_qr  # noqa: E402
+
+PAYLOAD = "https://ouhud.com/d/bench-render"
+
+
+def _bench(label: str, rounds: int, **kwargs) -> None:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        render_qr(payload=PAYLOAD, **kwargs)
+    per_call = (time.perf_counter() - start) / rounds
+    print(f"{label:<34} {per_call * 1000:>8.2f} ms/Render")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark QR-Rendering")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--size", type=int, default=600)
+    args = parser.parse_args()
+
+    # Dateien des Legacy-Pfads landen in einem Temp-Verzeichnis
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            _bench("legacy (png+svg+pdf+Datei)", args.rounds, size=args.size, formats=ALL_FORMATS, save_to_disk=True)
+            _bench("render_qr png", args.rounds, size=args.size)
+            _bench("render_qr svg", args.rounds, size=args.size, formats=("svg",))
+            _bench("render_qr pdf", args.rounds, size=args.size, formats=("pdf",))
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script: bench_render_pool.py
+Project: Ouhud QR
+Description:
+    Misst, wie lange der Event-Loop blockiert, während N Poster-Renders
+    laufen: synchron im Loop (bisher) gegen utils.render_pool. Ein Ticker
+    misst alle 10 ms die Verspätung; ausgegeben werden Gesamtzeit und
+    größte Loop-Verzögerung.
+
+    python scripts/bench_render_pool.py [--renders 8] [--size 1800] [--mode process]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(BASE_DIR)
+
+from utils.qr_generator import render_qr  # noqa: E402
+from utils.render_pool import RenderPool  # noqa: E402
+
+
+async def _ticker(stop: asyncio.Event, lags: list) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append((time.perf_counter() - start - 0.01) * 1000)
+
+
+async def _run(label: str, renders, count: int) -> None:
+    stop = asyncio.Event()
+    lags: list = []
+    ticker = asyncio.create_task(_ticker(stop, lags))
+    start = time.perf_counter()
+    await renders(count)
+    elapsed = (time.perf_counter() - start) * 1000
+    stop.set()
+    await ticker
+    print(f"{label:<28} gesamt {elapsed:>8.1f} ms   max. Loop-Verzögerung {max(lags or [0]):>7.1f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Render-Pool")
+    parser.add_argument("--renders", type=int, default=8)
+    parser.add_argument("--size", type=int, default=1800)
+    parser.add_argument("--mode", default="process", choices=["process", "thread"])
+    args = parser.parse_args()
+    params = {"payload": "https://ouhud.com/d/bench-pool", "size": args.size, "module_style": "rounded"}
+
+    async def sync_renders(count: int) -> None:
+        for _ in range(count):
+            render_qr(**params)
+            await asyncio.sleep(0)
+
+    pool = RenderPool(mode=args.mode)
+    await pool.render(**params)  # Worker starten (spawn) – nicht mitgemessen
+
+    async def pool_renders(count: int) -> None:
+        results = await asyncio.gather(*(pool.render(**params) for _ in range(count)))
+        worst = max(r["timings"]["queue_ms"] for r in results)
+        print(f"{'':<28} max. Warteschlange {worst:.1f} ms")
+
+    try:
+        await _run("synchron im Loop", sync_renders, args.renders)
+        await _run(f"render_pool ({args.mode}, {pool.workers})", pool_renders, args.renders)
+    finally:
+        pool.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script: bench_user_agent.py
+Project: Ouhud QR
+Description:
+    Mikrobenchmark für utils.user_agent.classify_user_agent:
+    kalter Aufruf (LRU leer) gegenüber warmem Aufruf (LRU-Treffer)
+    auf einem realistischen UA-Korpus – wahlweise aus der Datenbank.
+
+    python scripts/bench_user_agent.py [--rounds 200000] [--from-db 5000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(BASE_DIR)
+
+from utils.user_agent import _classify, classifier_stats, classify_user_agent  # noqa: E402
+
+CORPUS = [
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.4 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (iPad; CPU OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) CriOS/120.0.6099.119 Mobile/15E148 Safari/604.1",
+    "Mozilla/5.0 (Linux; Android 14; SM-S918B) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.6167.101 Mobile Safari/537.36",
+    "Mozilla/5.0 (Linux; Android 13; Pixel 7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/121.0.0.0 Safari/537.36 Edg/121.0.0.0",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.2 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:122.0) Gecko/20100101 Firefox/122.0",
+    "Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)",
+    "facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)",
+    "curl/8.4.0",
+    "PostmanRuntime/7.36.1",
+]
+
+
+def _load_from_db(limit: int) -> list:
+    from database import SessionLocal
+    from models.qr_scan import QRScan
+
+    with SessionLocal() as db:
+        rows = db.query(QRScan.user_agent).filter(QRScan.user_agent.isnot(None)).limit(limit).all()
+    return [row[0] for row in rows if row[0]]
+
+
+def _bench(label: str, fn, rounds: int) -> None:
+    start = time.perf_counter()
+    fn(rounds)
+    per_call = (time.perf_counter() - start) / rounds
+    print(f"{label:<28} {rounds:>8} Aufrufe   {per_call * 1e6:>8.2f} µs/Aufruf")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark UA-Klassifizierung")
+    parser.add_argument("--rounds", type=int, default=200000)
+    parser.add_argument("--from-db", type=int, default=0, help="UA-Strings aus qr_scans laden")
+    args = parser.parse_args()
+
+    corpus = _load_from_db(args.from_db) if args.from_db else CORPUS
+    if not corpus:
+        print("Kein UA-Korpus gefunden.")
+        return
+    stream = [random.choice(corpus) for _ in range(args.rounds)]
+
+    def cold(n: int) -> None:
+        for i in range(n):
+            _classify.cache_clear()
+            classify_user_agent(stream[i])
+
+    def warm(n: int) -> None:
+        for i in range(n):
+            classify_user_agent(stream[i])
+
+    print(f"Korpus: {len(corpus)} verschiedene UA-Strings")
+    _bench("kalt (ohne LRU-Treffer)", cold, max(1, args.rounds // 10))
+    _classify.cache_clear()
+    _bench("warm (LRU)", warm, args.rounds)
+    print(classifier_stats())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Script: rebuild_scan_rollups.py
+Project: Ouhud QR
+Description:
+    Baut die Dashboard-Rollups (qr_scan_rollup_hourly / _daily) aus qr_scans
+    neu auf – einmalig nach dem Deployment (Backfill) oder zur Reparatur.
+    Erst nach einem vollständigen Lauf (ohne --since) liest das Dashboard
+    die Rollups, vorher die Rohdaten aus qr_scans.
+    Löschen und Lesen der höchsten Scan-ID laufen in einer Transaktion;
+    gelesen werden nur Scans bis zu dieser ID, neuere zählt der laufende
+    Scan-Ingest selbst. Danach wird je Chunk committet – bricht der Lauf ab,
+    einfach erneut starten (der Neuaufbau löscht zuerst wieder).
+
+    python scripts/rebuild_scan_rollups.py [--since 2025-01-01] [--chunk 5000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(BASE_DIR)
+
+from sqlalchemy import func, select  # noqa: E402
+
+from database import SessionLocal, engine  # noqa: E402
+from models.qr_scan import QRScan  # noqa: E402
+from utils.scan_rollups import (  # noqa: E402
+    apply_scan_rollups,
+    clear_scan_rollups,
+    ensure_scan_rollup_tables,
+    mark_backfilled,
+)
+
+
+def rebuild(session, since=None, chunk: int = 5000) -> int:
+    """Löscht die Rollups (ab `since`) und zählt qr_scans neu ein. Liefert die Scan-Anzahl."""
+    scans = QRScan.__table__
+    if since is not None:
+        since = since.replace(hour=0, minute=0, second=0, microsecond=0)
+    # max_id erst nach dem Löschen lesen: Scans, deren Rollups vor dem Löschen
+    # gebucht wurden, zählt der Neuaufbau; alles danach der Scan-Ingest.
+    clear_scan_rollups(session, since)
+    max_id = session.execute(select(func.max(scans.c.id))).scalar() or 0
+    session.commit()
+
+    last_id = 0
+    total = 0
+    while last_id < max_id:
+        stmt = (
+            select(scans.c.id, scans.c.qr_id, scans.c.timestamp, scans.c.location,
+                   scans.c.user_agent, scans.c.device)
+            .where(scans.c.id > last_id, scans.c.id <= max_id)
+            .order_by(scans.c.id)
+            .limit(chunk)
+        )
+        if since is not None:
+            stmt = stmt.where(scans.c.timestamp >= since)
+        rows = [dict(row._mapping) for row in session.execute(stmt)]
+        if not rows:
+            break
+        apply_scan_rollups(session, rows)
+        session.commit()
+        last_id = rows[-1]["id"]
+        total += len(rows)
+    if since is None:
+        # vollständiger Aufbau -> Dashboard darf ab jetzt die Rollups lesen
+        mark_backfilled(session)
+        session.commit()
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Scan-Rollups neu aufbauen")
+    parser.add_argument("--since", help="Nur ab diesem Datum (YYYY-MM-DD, UTC) neu aufbauen")
+    parser.add_argument("--chunk", type=int, default=5000)
+    args = parser.parse_args()
+
+    since = None
+    if args.since:
+        since = datetime.strptime(args.since, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+    ensure_scan_rollup_tables(engine)
+    started = time.perf_counter()
+    with SessionLocal() as session:
+        total = rebuild(session, since=since, chunk=max(1, args.chunk))
+    print(f"✅ {total} Scans in {time.perf_counter() - started:.1f}s in die Rollups übernommen.")
+
+
+if __name__ == "__main__":
+    main()
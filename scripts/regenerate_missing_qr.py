@@ -5,21 +5,38 @@ Script: regenerate_missing_qr.py
 Author: Mohamad Hamza Mehmalat
 Project: Ouhud QR
 Created: 2025-10-19
-Updated: 2025-10-25
+Updated: 2026-10-17
 Description:
-    Dieses Skript überprüft alle QR-Code-Einträge in der MySQL-Datenbank und
-    regeneriert fehlende QR-Bilddateien im Verzeichnis 'static/generated_qr'.
+    QR-Bilder entstehen on demand unter /qr/img/<slug>.<fmt> aus dem
+    gespeicherten Design. Dieses Skript rendert sie im Voraus in den
+    Render-Cache (z. B. nach einer Theme-Änderung) und setzt image_path
+    auf die versionierte Bild-URL (Altpfade unter static/generated_qr bzw.
+    blobs/ werden dabei übernommen).
+
+    Zeilen werden nach ID in Chunks gelesen (Keyset), gerendert wird im
+    Render-Pool auf allen Kernen. Nach jedem Chunk wird die letzte ID in
+    eine Checkpoint-Datei geschrieben; ein erneuter Aufruf setzt dort fort.
+
+    Der Render-Cache liegt lokal auf dem Knoten (RENDER_CACHE_DIR) und ist
+    auf RENDER_CACHE_MAX_MB begrenzt (Standard 256 MB, LRU). Das Skript
+    wärmt also nur den Knoten, auf dem es läuft – auf jedem App-Knoten
+    ausführen oder RENDER_CACHE_DIR auf ein gemeinsames Volume legen.
+    Grob nötig: Codes × Formate × Bildgröße (PNG 600 px ≈ 2–10 KB, mit Logo
+    mehr). Schreibt ein Lauf mehr als das Limit, verdrängt er seine eigenen
+    Einträge wieder; das Skript warnt dann und nennt die geschriebene Menge.
+
+    python scripts/regenerate_missing_qr.py [--only-missing] [--force-style modern]
+        [--formats png,svg] [--chunk 2000] [--workers 0] [--dry-run] [--restart]
 """
 
+import argparse
+import json
 import os
 import sys
-import traceback
 import time
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Optional
-from models.qrcode import QRCode
-from typing import Literal, Tuple
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
 # ─────────────────────────────────────────────
 # 🧩 Projektpfad einbinden
 # ─────────────────────────────────────────────
@@ -29,15 +46,17 @@ sys.path.append(BASE_DIR)
 # ─────────────────────────────────────────────
 # 📦 Interne Importe
 # ─────────────────────────────────────────────
-from database import SessionLocal
-from models.qrcode import QRCode
-from utils.qr_generator import generate_qr_png
+from database import SessionLocal  # noqa: E402
+from models.qrcode import QRCode  # noqa: E402
+from utils.qr_image import IMAGE_FORMATS, qr_image_path, stored_render_params  # noqa: E402
+from utils.render_cache import RESULT_KEYS, RenderCache, render_cache, render_key  # noqa: E402
+from utils.render_pool import RenderPool  # noqa: E402
 
 # ─────────────────────────────────────────────
 # 📁 Pfade & Logdatei
 # ─────────────────────────────────────────────
-OUTPUT_DIR = os.path.join(BASE_DIR, "static", "generated_qr")
 LOG_FILE = os.path.join(BASE_DIR, "scripts", "qr_regeneration.log")
+CHECKPOINT_FILE = os.path.join(BASE_DIR, "cache", "qr_regeneration.checkpoint.json")
 
 # ─────────────────────────────────────────────
 # 🎨 Farbige Ausgabe
@@ -69,139 +88,196 @@ def log_message(message: str, level: str = "INFO") -> None:
         log.write(line + "\n")
 
 # ─────────────────────────────────────────────
-# 🔧 Wrapper für generate_qr_png()
+# 💾 Checkpoint
 # ─────────────────────────────────────────────
-def generate_qr_code_compat(
-    content: str,
-    filename: str,
-    color_fg: str = "#000000",
-    color_bg: str = "#FFFFFF",
-    style: str = "classic",
-    size: int = 300,
-    logo_path: Optional[str] = None,
-) -> None:
-    """Wrapper für generate_qr_png(), sorgt für Typkompatibilität."""
-    os.makedirs(os.path.dirname(filename), exist_ok=True)
+def load_checkpoint(path: str, options: Dict[str, Any]) -> int:
+    """Letzte verarbeitete ID – nur wenn der Checkpoint zu denselben Optionen gehört."""
     try:
-        result = generate_qr_png(
-            payload=content,
-            size=int(size),
-            fg=color_fg,
-            bg=color_bg,
-            logo_path=logo_path,
-            module_style="square",
-            eye_style="square",
-            frame_text=None,
-            frame_color="#4F46E5",
-            gradient=None,
-            logo_position="center",
-        )
-
-        if isinstance(result, (bytes, bytearray)):
-            with open(filename, "wb") as f:
-                f.write(result)
-        else:
-            log_message(f"ℹ️  QR-Code gespeichert (keine Byte-Daten zurückgegeben): {filename}", level="INFO")
-
-    except Exception as e:
-        log_message(f"❌ Fehler bei QR-Code {filename}: {e}", level="ERROR")
-        traceback.print_exc(file=sys.stdout)
-        raise
+        with open(path, encoding="utf-8") as fh:
+            state = json.load(fh)
+    except (OSError, ValueError):
+        return 0
+    return int(state.get("last_id") or 0) if state.get("options") == options else 0
 
 
+def save_checkpoint(path: str, options: Dict[str, Any], last_id: int) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"last_id": last_id, "options": options}, fh)
+    os.replace(tmp, path)
 
 # ─────────────────────────────────────────────
-# 🔄 Regeneration pro QR-Eintrag (typisiert)
+# 🔄 Regeneration
 # ─────────────────────────────────────────────
-def regenerate_single_qr(qr: QRCode) -> Tuple[Literal["skip", "regen", "error"], str]:
-    """
-    Verarbeitet einen einzelnen QR-Code-Eintrag.
+def _query(session, after_id: int, force_style: Optional[str]):
+    query = session.query(QRCode).filter(QRCode.slug.isnot(None), QRCode.id > after_id)
+    if force_style:
+        query = query.filter(QRCode.style == force_style)
+    return query
+
 
-    Parameter:
-        qr (QRCode): Ein einzelnes QR-Code-Datenbankobjekt aus der Tabelle `qr_codes`.
+def _format_eta(seconds: float) -> str:
+    seconds = int(max(0, seconds))
+    return f"{seconds // 3600:d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
 
-    Rückgabe:
-        tuple[str, str]: (Status, Dateiname)
-            Status ∈ {"skip", "regen", "error"}
-            - "skip"  → Datei existiert bereits
-            - "regen" → Datei neu generiert
-            - "error" → Fehler beim Erstellen
+
+def regenerate(
+    session,
+    pool: RenderPool,
+    formats: Sequence[str] = ("png",),
+    chunk: int = 2000,
+    only_missing: bool = False,
+    force_style: Optional[str] = None,
+    dry_run: bool = False,
+    cache: Optional[RenderCache] = None,
+    checkpoint: Optional[str] = None,
+    log: Callable[[str], None] = print,
+) -> Dict[str, int]:
     """
-    slug = str(getattr(qr, "slug", ""))
-    filename = f"qr_{slug}.png"
-    path = os.path.join(OUTPUT_DIR, filename)
+    Rendert QR-Codes chunkweise in den Render-Cache und aktualisiert image_path.
 
-    if os.path.exists(path):
-        return "skip", filename
+    only_missing: nur Codes, deren Formate noch nicht im Cache liegen.
+    force_style:  nur Codes mit diesem Stil, immer neu gerendert.
+    dry_run:      nichts rendern, schreiben oder checkpointen – nur zählen.
+    """
+    cache = cache or render_cache
+    formats = tuple(formats)
+    options = {"formats": list(formats), "only_missing": only_missing, "force_style": force_style}
+    last_id = load_checkpoint(checkpoint, options) if checkpoint and not dry_run else 0
+    if last_id:
+        log(f"↪️  Setze nach ID {last_id} fort (Checkpoint)")
 
-    try:
-        log_message(f"⚙️  Erstelle neues QR-Bild: {filename}")
-        generate_qr_code_compat(
-            content=str(getattr(qr, "content", "")),
-            filename=path,
-            color_fg=str(getattr(qr, "color_fg", "#000000") or "#000000"),
-            color_bg=str(getattr(qr, "color_bg", "#FFFFFF") or "#FFFFFF"),
-            style=str(getattr(qr, "style", "classic") or "classic"),
-            size=int(getattr(qr, "qr_size", 300) or 300),
-            logo_path=str(getattr(qr, "logo_path", None)) if getattr(qr, "logo_path", None) is not None else None,
+    total = _query(session, last_id, force_style).count()
+    counts = {"total": total, "seen": 0, "rendered": 0, "cached": 0, "paths_updated": 0, "errors": 0,
+              "bytes_written": 0}
+    started = time.perf_counter()
+    evictions = cache.stats()["evictions"]
+    if not cache.enabled and not dry_run:
+        log("⚠️  Render-Cache ist deaktiviert (RENDER_CACHE_MAX_MB=0) – es wird nur image_path migriert.")
+
+    while True:
+        rows: List[QRCode] = (
+            _query(session, last_id, force_style).order_by(QRCode.id).limit(max(1, chunk)).all()
         )
-        log_message(f"✅ Erfolgreich erstellt: {filename}", level="OK")
-        return "regen", filename
-    except Exception as e:
-        log_message(f"❌ Fehler bei {filename}: {e}", level="ERROR")
-        return "error", filename
+        if not rows:
+            break
 
+        jobs = []
+        for qr in rows:
+            try:
+                params = stored_render_params(qr)
+            except Exception as exc:
+                counts["errors"] += 1
+                log(f"❌ {qr.slug}: Design nicht lesbar ({exc})")
+                continue
+            path = qr_image_path(qr, params=params)
+            if path != qr.image_path:
+                counts["paths_updated"] += 1
+                if not dry_run:
+                    qr.image_path = path
+            keys = {fmt: render_key(fmt, params) for fmt in formats}
+            todo = [fmt for fmt in formats if force_style or not only_missing or keys[fmt] not in cache]
+            if not todo:
+                counts["cached"] += 1
+            elif not dry_run:
+                jobs.append((qr.slug, keys, pool.submit({**params, "formats": todo})))
+            else:
+                counts["rendered"] += 1
 
-# ─────────────────────────────────────────────
-# 🔄 Hauptfunktion (mit ThreadPool)
-# ─────────────────────────────────────────────
-def regenerate_missing_qr_codes(max_workers: int = 4) -> None:
-    """Überprüft die Datenbank und regeneriert alle fehlenden QR-Code-Bilder."""
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-    session = SessionLocal()
-    start_time = time.time()
+        for slug, keys, future in jobs:
+            try:
+                _, _, result = future.result()
+                for fmt, key in keys.items():
+                    if result.get(RESULT_KEYS[fmt]):
+                        cache.put(key, result[RESULT_KEYS[fmt]])
+                        counts["bytes_written"] += len(result[RESULT_KEYS[fmt]])
+                counts["rendered"] += 1
+            except Exception as exc:
+                counts["errors"] += 1
+                log(f"❌ {slug}: {exc}")
 
-    try:
-        qrs = session.query(QRCode).filter(QRCode.slug.isnot(None)).all()
-        total = len(qrs)
-        log_message(f"🔍 {total} QR-Code-Einträge gefunden – Überprüfung gestartet...")
-
-        regenerated_count = skipped_count = error_count = 0
-
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [executor.submit(regenerate_single_qr, qr) for qr in qrs]
-            for future in as_completed(futures):
-                status, _ = future.result()
-                if status == "regen":
-                    regenerated_count += 1
-                elif status == "skip":
-                    skipped_count += 1
-                else:
-                    error_count += 1
-
-        elapsed = time.time() - start_time
-        log_message("────────────────────────────────────────────")
-        log_message("✅ Fertig! Zusammenfassung:")
-        log_message(f"• Gesamt: {total}")
-        log_message(f"• Neu generiert: {regenerated_count}")
-        log_message(f"• Übersprungen: {skipped_count}")
-        log_message(f"• Fehler: {error_count}")
-        log_message(f"• Laufzeit: {elapsed:.2f} Sekunden")
-        log_message("────────────────────────────────────────────")
+        last_id = rows[-1].id
+        counts["seen"] += len(rows)
+        if not dry_run:
+            session.commit()
+            if checkpoint:
+                save_checkpoint(checkpoint, options, last_id)
+        session.expunge_all()
 
-    finally:
-        session.close()
-        log_message("💾 Datenbankverbindung geschlossen.", level="INFO")
+        elapsed = time.perf_counter() - started
+        rate = counts["seen"] / elapsed if elapsed > 0 else 0.0
+        eta = (total - counts["seen"]) / rate if rate else 0.0
+        log(f"⏱️  {counts['seen']}/{total} · {rate:.0f} Codes/s · ETA {_format_eta(eta)} · bis ID {last_id}")
+
+    if checkpoint and not dry_run and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    counts["evicted"] = cache.stats()["evictions"] - evictions
+    if cache.enabled and counts["bytes_written"] > cache.max_bytes:
+        log(
+            f"⚠️  {counts['bytes_written'] / 1048576:.1f} MB gerendert, der Render-Cache fasst nur "
+            f"{cache.max_bytes / 1048576:.0f} MB – {counts['evicted']} Einträge wurden verdrängt. "
+            "RENDER_CACHE_MAX_MB erhöhen oder weniger Formate vorrendern."
+        )
+    return counts
 
 # ─────────────────────────────────────────────
 # 🚀 Main-Ausführung
 # ─────────────────────────────────────────────
-if __name__ == "__main__":
+def main() -> None:
+    parser = argparse.ArgumentParser(description="QR-Bilder vorrendern und image_path migrieren")
+    parser.add_argument("--formats", default="png", help="Kommagetrennt: png,webp,svg,pdf")
+    parser.add_argument("--chunk", type=int, default=2000, help="Zeilen pro Chunk / Checkpoint")
+    parser.add_argument("--workers", type=int, default=0, help="Render-Prozesse (0 = alle Kerne)")
+    parser.add_argument("--only-missing", action="store_true", help="Nur Codes ohne Cache-Eintrag rendern")
+    parser.add_argument("--force-style", help="Nur Codes dieses Stils, immer neu rendern")
+    parser.add_argument("--dry-run", action="store_true", help="Nur zählen, nichts schreiben")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    parser.add_argument("--restart", action="store_true", help="Checkpoint verwerfen und von vorn beginnen")
+    args = parser.parse_args()
+
+    formats = tuple(dict.fromkeys(f.strip().lower() for f in args.formats.split(",") if f.strip()))
+    unknown = set(formats) - set(IMAGE_FORMATS)
+    if not formats or unknown:
+        parser.error(f"Unbekannte Formate: {', '.join(sorted(unknown)) or '-'}")
+    if args.restart and os.path.exists(args.checkpoint):
+        os.remove(args.checkpoint)
+
     print("============================================")
-    print("🧠  Ouhud QR – Fehlende QR-Bilder regenerieren")
+    print("🧠  Ouhud QR – QR-Bilder vorrendern")
     print("============================================\n")
 
-    log_message("📁 Starte Regenerationsprozess...", level="INFO")
-    regenerate_missing_qr_codes(max_workers=6)  # 6 Threads für mehr Speed
-    log_message("✅ Skript erfolgreich abgeschlossen.", level="OK")
-    print(f"\n📄 Log gespeichert unter: {LOG_FILE}\n")
+    pool = RenderPool(mode="process", workers=args.workers)
+    started = time.perf_counter()
+    try:
+        with SessionLocal() as session:
+            counts = regenerate(
+                session,
+                pool,
+                formats=formats,
+                chunk=args.chunk,
+                only_missing=args.only_missing,
+                force_style=args.force_style,
+                dry_run=args.dry_run,
+                checkpoint=args.checkpoint,
+                log=log_message,
+            )
+    finally:
+        pool.shutdown()
+
+    elapsed = time.perf_counter() - started
+    prefix = "🧪 Dry-Run – " if args.dry_run else ""
+    log_message("────────────────────────────────────────────")
+    log_message(f"{prefix}Gesamt: {counts['seen']} von {counts['total']} · {pool.workers} Worker")
+    log_message(f"• Gerendert: {counts['rendered']}")
+    log_message(f"• Bereits im Cache: {counts['cached']}")
+    log_message(f"• image_path aktualisiert: {counts['paths_updated']}")
+    log_message(f"• Geschrieben: {counts['bytes_written'] / 1048576:.1f} MB (verdrängt: {counts['evicted']})",
+                level="WARN" if counts["evicted"] else "INFO")
+    log_message(f"• Fehler: {counts['errors']}", level="ERROR" if counts["errors"] else "INFO")
+    log_message(f"• Laufzeit: {elapsed:.1f}s ({counts['seen'] / elapsed if elapsed else 0:.0f} Codes/s)")
+    log_message("────────────────────────────────────────────")
+
+
+if __name__ == "__main__":
+    main()
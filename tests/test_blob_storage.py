@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import routes.blobs as blob_routes
+from utils.blob_storage import BlobStore, LocalBlobBackend, SupabaseBlobBackend, blob_key, is_blob_key
+
+
+def _stand_in():
+    """Minimaler Supabase-Storage-Ersatz: HEAD/GET/POST auf /storage/v1/object/<bucket>/<key>."""
+    objects = {}
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        prefix = "/storage/v1/object/assets/"
+        assert request.url.path.startswith(prefix)
+        assert request.headers["authorization"] == "Bearer secret"
+        key = request.url.path[len(prefix):]
+        calls.append((request.method, key))
+        if request.method == "POST":
+            if key in objects:
+                return httpx.Response(409)
+            objects[key] = request.content
+            return httpx.Response(200, json={"Key": key})
+        if key not in objects:
+            return httpx.Response(404)
+        return httpx.Response(200, content=b"" if request.method == "HEAD" else objects[key])
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    return SupabaseBlobBackend("https://stand-in.local", "secret", "assets", client=client), objects, calls
+
+
+def test_local_store_dedupes_by_content(tmp_path):
+    store = BlobStore(LocalBlobBackend(str(tmp_path)))
+    key = store.put(b"\x89PNG-a", "qr", "png")
+    assert key == blob_key(b"\x89PNG-a", "qr", ".PNG") and is_blob_key(key)
+    assert store.put(b"\x89PNG-a", "qr", "png") == key
+    assert store.put(b"\x89PNG-b", "qr", "png") != key
+    assert store.read(key) == b"\x89PNG-a"
+    assert store.stats()["writes"] == 2 and store.stats()["deduped"] == 1
+    assert blob_key(b"x", "pdfs", "../p d;f").endswith(".pdf")
+
+
+def test_local_path_accepts_legacy_paths(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "static" / "logos").mkdir(parents=True)
+    (tmp_path / "static" / "logos" / "old.png").write_bytes(b"old")
+    store = BlobStore(LocalBlobBackend("storage"))
+    assert store.local_path("/static/logos/old.png") == "static/logos/old.png"
+    assert store.local_path("static/logos/missing.png") is None
+    assert store.local_path("static/../static/logos/old.png") == "static/logos/old.png"
+    assert store.local_path("/etc/passwd") is None
+    assert store.url("blobs/qr/ab/x.png") == "/blobs/qr/ab/x.png"
+    assert store.url("/static/logos/old.png") == "/static/logos/old.png"
+
+
+def test_remote_uploads_async_once_and_other_node_fetches(tmp_path):
+    remote, objects, calls = _stand_in()
+    node_a = BlobStore(LocalBlobBackend(str(tmp_path / "a")), remote=remote)
+    key = node_a.put(b"logo-bytes", "logos", "png")
+    node_a.put(b"logo-bytes", "logos", "png")
+    node_a.flush(timeout=5)
+    assert objects == {key: b"logo-bytes"}
+    assert calls.count(("POST", key)) == 1
+    assert node_a.stats()["uploads"] == 1
+
+    node_b = BlobStore(LocalBlobBackend(str(tmp_path / "b")), remote=remote)
+    path = node_b.local_path(key)
+    assert path and open(path, "rb").read() == b"logo-bytes"
+    assert node_b.stats()["fetches"] == 1
+    node_b.put(b"logo-bytes", "logos", "png")
+    node_b.flush(timeout=5)
+    assert calls.count(("POST", key)) == 1
+    node_a.shutdown()
+    node_b.shutdown()
+
+
+def test_blob_route_serves_immutable(tmp_path, monkeypatch):
+    store = BlobStore(LocalBlobBackend(str(tmp_path)))
+    monkeypatch.setattr(blob_routes, "blob_store", store)
+    key = store.put(b"<svg/>", "qr", "svg")
+    app = FastAPI()
+    app.include_router(blob_routes.router)
+    client = TestClient(app)
+
+    response = client.get(f"/{key}")
+    assert response.status_code == 200 and response.content == b"<svg/>"
+    assert response.headers["content-type"].startswith("image/svg+xml")
+    assert "immutable" in response.headers["cache-control"]
+    etag = response.headers["etag"]
+    assert client.get(f"/{key}", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/blobs/qr/../../etc/passwd").status_code == 404
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import zipfile
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import utils.bulk_jobs as bulk
+from models.bulk_job import QRBulkJob
+from models.plan import Plan
+from models.qr_conversion import QRConversion
+from models.qr_scan import QRScan
+from models.qrcode import QRCode
+from models.user import User
+from utils.bulk_jobs import (
+    BulkInputError,
+    BulkJobRunner,
+    cleanup_job_dirs,
+    fail_jobs,
+    iter_job_archive,
+    parse_formats,
+    parse_rows,
+)
+from utils.qr_image import stored_render_params
+from utils.render_cache import RenderCache, render_key
+
+
+def _session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    for model in (Plan, User, QRCode, QRScan, QRConversion, QRBulkJob):
+        model.__table__.create(bind=engine, checkfirst=True)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def test_parse_csv_and_ndjson_rows():
+    rows = parse_rows(
+        b'type,title,style,url,data\nurl,Label 1,,https://a.example,\nurl,Label 2,classic,,"{""url"": ""https://b.example""}"\n'
+        b'url,Bad,,,{oops\n'
+    )
+    assert rows[0] == {"type": "url", "title": "Label 1", "style": "modern", "data": {"url": "https://a.example"}}
+    assert rows[1]["style"] == "classic" and rows[1]["data"] == {"url": "https://b.example"}
+    assert rows[2]["error"] == "data is not valid JSON"
+
+    ndjson = b'{"type": "TEL", "data": {"phone": "+49"}}\n\nnot json\n'
+    rows = parse_rows(ndjson, "rows.ndjson")
+    assert rows[0]["type"] == "tel" and rows[0]["data"] == {"phone": "+49"}
+    assert rows[1]["error"] == "invalid JSON line"
+
+
+def test_parse_limits_and_formats():
+    with pytest.raises(BulkInputError):
+        parse_rows(b"type\nurl\nurl\nurl\n", max_rows=2)
+    with pytest.raises(BulkInputError):
+        parse_rows(b"type,title\n")
+    assert parse_formats("pdf, svg") == ("png", "svg", "pdf")
+    with pytest.raises(BulkInputError):
+        parse_formats("gif")
+
+
+def test_job_creates_rows_in_batches_and_streams_zip(monkeypatch, tmp_path):
+    monkeypatch.setattr(bulk, "BULK_DIR", tmp_path / "jobs")
+    monkeypatch.setattr(bulk, "render_cache", RenderCache(str(tmp_path / "render")))
+    factory = _session_factory()
+    db = factory()
+    db.add(QRBulkJob(id="job1", user_id=1, formats="png,svg,pdf", total=5))
+    db.commit()
+
+    rows = [{"type": "url", "title": f"Row {i}", "style": "modern", "data": {"url": f"https://x/{i}"}} for i in range(4)]
+    rows.insert(2, {"type": "", "title": "", "style": "modern", "data": {}})
+    runner = BulkJobRunner(mode="thread", workers=2, batch_size=2, session_factory=factory)
+    try:
+        runner.submit("job1", rows, "https://ouhud.com/d/").result(timeout=60)
+    finally:
+        runner.shutdown()
+
+    db.expire_all()
+    job = db.get(QRBulkJob, "job1")
+    assert (job.status, job.created_count, job.rendered_count, job.failed_count) == ("done", 4, 4, 1)
+    qrs = db.query(QRCode).filter(QRCode.user_id == 1).all()
+    assert len(qrs) == 4 and all(qr.get_data()["url"].startswith("https://x/") for qr in qrs)
+    assert all(qr.image_path.startswith(f"qr/img/{qr.slug}.png?v=") for qr in qrs)
+    # Exporte wärmen den Render-Cache für die Bild-URL vor
+    assert all(bulk.render_cache.get(render_key("png", stored_render_params(qr))) for qr in qrs)
+    db.close()
+
+    chunks = list(iter_job_archive("job1"))
+    assert len(chunks) > 1
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+        manifest = list(csv.DictReader(io.StringIO(zf.read("manifest.csv").decode())))
+        assert [m["row"] for m in manifest if m["status"] == "invalid"] == ["3"]
+        ok = [m for m in manifest if m["status"] == "ok"]
+        assert all(m["png_encoder"] for m in ok)
+        assert {m["dynamic_url"] for m in ok} == {qr.dynamic_url for qr in qrs}
+        slug = ok[0]["slug"]
+        assert zf.read(f"png/{slug}.png").startswith(b"\x89PNG")
+        assert zf.read(f"pdf/{slug}.pdf").startswith(b"%PDF")
+        assert zf.getinfo(f"png/{slug}.png").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo(f"svg/{slug}.svg").compress_type == zipfile.ZIP_DEFLATED
+    assert json.loads(json.dumps(bulk.serialize_job(job)))["progress"] == 1.0
+
+
+def test_open_jobs_are_failed_and_exports_expire(monkeypatch, tmp_path):
+    monkeypatch.setattr(bulk, "BULK_DIR", tmp_path / "jobs")
+    db = _session_factory()()
+    old = datetime.now(timezone.utc) - timedelta(hours=48)
+    db.add_all([
+        QRBulkJob(id="queued", user_id=1, status="queued"),
+        QRBulkJob(id="running", user_id=1, status="running"),
+        QRBulkJob(id="old", user_id=1, status="done", finished_at=old),
+        QRBulkJob(id="fresh", user_id=1, status="done", finished_at=datetime.now(timezone.utc)),
+    ])
+    db.commit()
+    for name in ("running", "old", "fresh", "stray"):
+        (tmp_path / "jobs" / name / "files").mkdir(parents=True)
+
+    assert fail_jobs(db, "interrupted by restart") == 2
+    assert cleanup_job_dirs(db, retention_hours=24) == 3
+    db.expire_all()
+    statuses = {job.id: (job.status, job.error) for job in db.query(QRBulkJob)}
+    assert statuses["queued"] == ("failed", "interrupted by restart") and statuses["running"][0] == "failed"
+    assert statuses["old"][0] == "expired" and statuses["fresh"][0] == "done"
+    assert sorted(path.name for path in (tmp_path / "jobs").iterdir()) == ["fresh"]
+    db.close()
+
+
+def test_shutdown_fails_queued_jobs(monkeypatch, tmp_path):
+    monkeypatch.setattr(bulk, "BULK_DIR", tmp_path / "jobs")
+    factory = _session_factory()
+    db = factory()
+    db.add(QRBulkJob(id="waiting", user_id=1, formats="png", total=1))
+    db.commit()
+
+    runner = BulkJobRunner(mode="thread", workers=1, session_factory=factory)
+    blocker = bulk.threading.Event()
+    runner._jobs.submit(blocker.wait, 10)  # einziger Job-Slot belegt -> "waiting" bleibt in der Warteschlange
+    runner.submit("waiting", [{"type": "url", "title": "", "style": "modern", "data": {}}], "https://x/")
+    runner.shutdown()
+    blocker.set()
+
+    db.expire_all()
+    job = db.get(QRBulkJob, "waiting")
+    assert (job.status, job.error) == ("failed", "cancelled by shutdown")
+    db.close()
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import get_db
+from main import app
+from models.plan import Plan
+from models.qr_conversion import QRConversion
+from models.qr_scan import QRScan
+from models.qrcode import QRCode
+from models.user import User
+from utils.download_artifacts import artifact_cache
+from utils.resolve_cache import resolve_cache
+from utils.scan_ingest import scan_ingestor
+
+
+@pytest.fixture
+def download_env():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    for model in (Plan, User, QRCode, QRScan, QRConversion):
+        model.__table__.create(bind=engine, checkfirst=True)
+
+    def override_get_db():
+        db = session_local()
+        try:
+            yield db
+        finally:
+            db.close()
+    app.dependency_overrides[get_db] = override_get_db
+    resolve_cache.clear()
+    artifact_cache.clear()
+    previous_mode = scan_ingestor.mode
+    scan_ingestor.configure(mode="sync")
+    with TestClient(app) as client:
+        yield client, session_local
+    scan_ingestor.configure(mode=previous_mode)
+    app.dependency_overrides.pop(get_db, None)
+    resolve_cache.clear()
+    artifact_cache.clear()
+    engine.dispose()
+
+
+def _create(session_local, slug: str, qr_type: str, data: dict) -> None:
+    with session_local() as db:
+        user = User(username=f"owner_{slug}", email=f"{slug}@example.com", password_hash="hash")
+        db.add(user)
+        db.flush()
+        qr = QRCode(user_id=user.id, slug=slug, type=qr_type, title="Download")
+        qr.set_data(data)
+        db.add(qr)
+        db.commit()
+
+
+def test_event_download_uses_etag_and_304(download_env):
+    client, session_local = download_env
+    ics = "BEGIN:VCALENDAR\nEND:VCALENDAR\n"
+    _create(session_local, "ics-slug", "event", {"ics": ics})
+
+    first = client.get("/d/ics-slug")
+    assert first.status_code == 200
+    assert first.text == ics
+    assert first.headers["content-type"].startswith("text/calendar")
+    assert "event_ics-slug.ics" in first.headers["content-disposition"]
+    assert "max-age" in first.headers["cache-control"]
+    etag = first.headers["etag"]
+
+    second = client.get("/d/ics-slug", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.content == b""
+    assert artifact_cache.stats()["hits"] >= 1
+    assert not os.path.exists("/tmp/event_ics-slug.ics")
+
+
+def test_vcard_download_changes_etag_after_edit(download_env):
+    client, session_local = download_env
+    _create(session_local, "vcf-slug", "vcard", {"first_name": "Ada", "last_name": "Lovelace"})
+
+    first = client.get("/qr/vcard/vcf-slug.vcf")
+    assert first.status_code == 200
+    assert "FN:Ada Lovelace" in first.text
+
+    with session_local() as db:
+        qr = db.query(QRCode).filter(QRCode.slug == "vcf-slug").one()
+        qr.set_data({"first_name": "Grace", "last_name": "Hopper"})
+        db.commit()
+
+    second = client.get("/qr/vcard/vcf-slug.vcf", headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert "FN:Grace Hopper" in second.text
+    assert second.headers["etag"] != first.headers["etag"]
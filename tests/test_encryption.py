@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from models.qrcode import QRCode
+from utils.encryption import V2_PREFIX, get_encryptor, is_legacy_ciphertext
+
+
+def test_new_blobs_use_v2_format():
+    blob = get_encryptor().encrypt({"url": "https://example.com"})
+    assert blob.startswith(V2_PREFIX)
+    assert not is_legacy_ciphertext(blob)
+    assert get_encryptor().decrypt(blob) == {"url": "https://example.com"}
+
+
+def test_v1_blobs_still_decrypt():
+    enc = get_encryptor()
+    legacy = enc._encrypt_v1({"url": "https://legacy.example.com"})
+    assert is_legacy_ciphertext(legacy)
+    assert enc.decrypt(legacy) == {"url": "https://legacy.example.com"}
+
+
+def test_tampered_v2_blob_is_rejected():
+    enc = get_encryptor()
+    blob = enc.encrypt({"url": "https://example.com"})
+    tampered = blob[:-4] + ("AAAA" if not blob.endswith("AAAA") else "BBBB")
+    assert enc.decrypt(tampered) is None
+
+
+def test_get_data_upgrades_legacy_blob():
+    qr = QRCode(slug="upgrade-me", type="url")
+    qr.encrypted_content = get_encryptor()._encrypt_v1({"url": "https://old.example.com"})
+
+    assert qr.get_data() == {"url": "https://old.example.com"}
+    assert qr.encrypted_content.startswith(V2_PREFIX)
+    assert get_encryptor().decrypt(qr.encrypted_content) == {"url": "https://old.example.com"}
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from PIL import Image
+
+import utils.logo_cache as lc
+import utils.qr_generator as qrgen
+from utils.logo_cache import LogoCache
+from utils.qr_generator import render_qr
+
+
+def _logo(path: Path, color=(200, 30, 30, 255), size=120) -> str:
+    Image.new("RGBA", (size, size), color).save(path)
+    return str(path)
+
+
+def test_variants_are_reused(tmp_path: Path):
+    cache = LogoCache()
+    logo = _logo(tmp_path / "logo.png")
+    first = cache.resized(logo, (60, 60))
+    assert cache.resized(logo, (60, 60)) is first
+    assert cache.plate(60) is cache.plate(60)
+    assert cache.stats()["hits"] == 2
+
+
+def test_same_content_shares_entry_and_change_invalidates(tmp_path: Path):
+    cache = LogoCache()
+    a = _logo(tmp_path / "a.png")
+    b = _logo(tmp_path / "b.png")
+    assert cache.decoded(a) is cache.decoded(b)
+
+    _logo(tmp_path / "b.png", color=(0, 0, 255, 255))
+    os.utime(b, ns=(1, 1))  # mtime sicher verschieden, auch bei grober Auflösung
+    assert cache.decoded(b).getpixel((0, 0)) == (0, 0, 255, 255)
+
+
+def test_eviction_is_bounded_by_bytes(tmp_path: Path):
+    cache = LogoCache(max_bytes=100 * 100 * 4 * 2)
+    logo = _logo(tmp_path / "logo.png", size=100)
+    cache.decoded(logo)
+    cache.resized(logo, (100, 100))
+    cache.resized(logo, (90, 90))
+    stats = cache.stats()
+    assert stats["bytes_in_use"] <= cache.max_bytes
+    assert stats["evictions"] == 1
+
+
+def test_warm_render_skips_decode(tmp_path: Path, monkeypatch):
+    cache = LogoCache()
+    monkeypatch.setattr(qrgen, "logo_cache", cache)
+    logo = _logo(tmp_path / "logo.png")
+    kwargs = dict(size=300, logo_path=logo, formats=("png",))
+    first = render_qr("https://ouhud.com/d/logo-cache", **kwargs)["bytes"]
+    misses = cache.stats()["misses"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("Logo sollte aus dem Cache kommen")
+
+    monkeypatch.setattr(lc.Image, "open", fail)
+    assert render_qr("https://ouhud.com/d/logo-cache", **kwargs)["bytes"] == first
+    assert cache.stats()["misses"] == misses
@@ -1,5 +1,7 @@
 import pytest
-from utils.qr_generator import generate_qr_png
+import utils.qr_generator as qrgen
+from PIL import Image
+from utils.qr_generator import _build_qr, generate_qr_png, render_qr
 from pathlib import Path
 from _pytest.tmpdir import TempPathFactory
 
@@ -7,4 +9,64 @@ def test_qr_generator_creates_file(tmp_path: Path):
     result = generate_qr_png(payload="https://ouhud.com/test", size=300)
     assert isinstance(result, dict)
     assert "path" in result
-    assert Path(result["path"]).exists(), f"Datei fehlt: {result['path']}"
\ No newline at end of file
+    assert Path(result["path"]).exists(), f"Datei fehlt: {result['path']}"
+
+
+def test_render_qr_only_png_without_disk(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    result = render_qr(payload="https://ouhud.com/test", size=300)
+    assert result["bytes"].startswith(b"\x89PNG")
+    assert result["svg_bytes"] == b""
+    assert result["pdf_bytes"] == b""
+    assert result["path"] is None
+    assert not (tmp_path / "static").exists()
+
+
+def test_render_qr_svg_skips_raster(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("Rasterbild für SVG nicht nötig")
+
+    monkeypatch.setattr(qrgen, "_render_raster", fail)
+    result = render_qr(payload="https://ouhud.com/test", size=300, formats=("svg",))
+    assert result["svg_bytes"].startswith(b"<?xml")
+    assert result["bytes"] == b""
+
+
+def test_render_qr_matches_legacy_output(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    legacy = generate_qr_png(payload="https://ouhud.com/test", size=300, filename="legacy.png")
+    single = render_qr(payload="https://ouhud.com/test", size=300, formats=("png", "svg", "pdf"))
+    assert single["bytes"] == legacy["bytes"]
+    assert single["svg_bytes"] == legacy["svg_bytes"]
+    assert single["pdf_bytes"].startswith(b"%PDF")
+
+
+def test_render_qr_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        render_qr(payload="https://ouhud.com/test", formats=("gif",))
+
+
+def test_error_correction_follows_covered_area(tmp_path):
+    logo = tmp_path / "logo.png"
+    Image.new("RGBA", (64, 64), (200, 30, 30, 255)).save(logo)
+    payload = "https://ouhud.com/d/ab12cd34ef"
+
+    plain = render_qr(payload=payload, size=600)["encoding"]
+    assert plain["error_correction"] == "M" and plain["selection"] == "auto"
+    assert plain["version"] < _build_qr(payload, error_correction="H").version
+
+    with_logo = render_qr(payload=payload, size=600, logo_path=str(logo), logo_scale=20)["encoding"]
+    assert with_logo["error_correction"] == "Q"
+    assert with_logo["covered_ratio"] > 0
+    behind = render_qr(payload=payload, size=600, logo_path=str(logo), logo_position="background")["encoding"]
+    assert behind["error_correction"] == "M"
+
+
+def test_explicit_level_and_minimum_version(tmp_path):
+    logo = tmp_path / "logo.png"
+    Image.new("RGBA", (64, 64), (200, 30, 30, 255)).save(logo)
+    result = render_qr(payload="https://ouhud.com/d/x", logo_path=str(logo), error_correction="L", qr_version=6)
+    assert result["encoding"]["error_correction"] == "L"
+    assert result["encoding"]["selection"] == "explicit"
+    assert result["encoding"]["version"] == 6
+    assert any("below the recommended Q" in w for w in result["quality_warnings"])
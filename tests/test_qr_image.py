@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import asyncio
+import io
+
+import pytest
+from PIL import Image
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import routes.qr_image as image_routes
+import utils.qr_image as qr_image_module
+import utils.render_cache as render_cache_module
+from database import get_db
+from models.plan import Plan
+from models.qr_conversion import QRConversion
+from models.qr_scan import QRScan
+from models.qrcode import QRCode
+from models.user import User
+from utils.qr_image import (
+    WEBP_SUPPORTED,
+    design_version,
+    qr_image_path,
+    render_thumbnail,
+    size_bucket,
+    sized_params,
+    stored_render_params,
+    thumb_srcset,
+    thumb_version,
+)
+from utils.qr_generator import covered_ratio, render_qr
+from utils.render_cache import RenderCache
+
+
+DESIGN = {"qr_size": 300, "fg": "#0D2A78", "bg": "#FFFFFF", "module_style": "rounded"}
+
+
+def _qr(slug: str = "img0000001", design: dict | None = None, **columns) -> QRCode:
+    qr = QRCode(user_id=1, slug=slug, type="url", dynamic_url=f"https://ouhud.com/d/{slug}", **columns)
+    data = {"url": "https://example.com"}
+    if design is not None:
+        data["design"] = design
+    qr.set_data(data)
+    return qr
+
+
+def test_params_follow_design_or_theme():
+    designed = stored_render_params(_qr(design={"module_style": "rounded", "qr_size": 512}, color_fg="#112233"))
+    assert designed["fg"] == "#112233"
+    designed = stored_render_params(_qr(design={"module_style": "rounded", "qr_size": 512, "fg": "#445566"}, qr_size=300))
+    assert designed["size"] == 512 and designed["fg"] == "#445566" and designed["module_style"] == "rounded"
+    assert designed["payload"] == "https://ouhud.com/d/img0000001"
+
+    themed = stored_render_params(_qr(style="modern"))
+    assert themed["size"] == 600 and "gradient" in themed
+
+
+def test_static_event_encodes_ics_text():
+    qr = QRCode(user_id=1, slug="evt0000001", type="event", dynamic_url=None, is_dynamic=False)
+    qr.set_data({"ics": "BEGIN:VCALENDAR\nEND:VCALENDAR\n", "is_dynamic": False, "design": DESIGN})
+    assert stored_render_params(qr)["payload"].startswith("BEGIN:VCALENDAR")
+    qr.set_data({"ics": "BEGIN:VCALENDAR\n", "is_dynamic": True, "design": DESIGN})
+    assert stored_render_params(qr)["payload"] == "/d/evt0000001"
+
+
+def test_version_changes_with_design_only():
+    qr = _qr(design={"module_style": "square"})
+    path = qr_image_path(qr)
+    assert path.startswith("qr/img/img0000001.png?v=")
+    assert qr_image_path(_qr(design={"module_style": "square"})) == path
+    assert qr_image_path(_qr(design={"module_style": "dots"})) != path
+    assert qr_image_path(qr, "svg", size=256).endswith("&size=256")
+
+
+@pytest.fixture
+def image_client(tmp_path, monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    for model in (Plan, User, QRCode, QRScan, QRConversion):
+        model.__table__.create(bind=engine, checkfirst=True)
+    cache = RenderCache(str(tmp_path / "render"))
+    monkeypatch.setattr(render_cache_module, "render_cache", cache)
+    monkeypatch.setattr(qr_image_module, "render_cache", cache)
+
+    def override_get_db():
+        db = session_local()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app = FastAPI()
+    app.include_router(image_routes.router)
+    app.dependency_overrides[get_db] = override_get_db
+    with session_local() as db:
+        db.add(_qr(design=DESIGN))
+        db.commit()
+    yield TestClient(app)
+    engine.dispose()
+
+
+def test_endpoint_renders_lazily_and_caches(image_client):
+    version = design_version(stored_render_params(_qr(design=DESIGN)))
+
+    response = image_client.get(f"/qr/img/img0000001.png?v={version}")
+    assert response.status_code == 200 and response.content.startswith(b"\x89PNG")
+    assert "immutable" in response.headers["cache-control"]
+    assert response.headers["x-qr-encoder"].startswith("indexed-")
+    # Bild + Metadaten-Eintrag
+    assert render_cache_module.render_cache.stats()["entries"] == 2
+
+    again = image_client.get(f"/qr/img/img0000001.png?v={version}")
+    assert again.content == response.content
+    assert again.headers["x-qr-encoder"] == response.headers["x-qr-encoder"]
+    assert render_cache_module.render_cache.stats()["hits"] == 1
+    assert image_client.get(
+        "/qr/img/img0000001.png", headers={"If-None-Match": response.headers["etag"]}
+    ).status_code == 304
+
+    stale = image_client.get("/qr/img/img0000001.svg?v=old&size=128")
+    assert stale.headers["content-type"].startswith("image/svg+xml")
+    assert "immutable" not in stale.headers["cache-control"]
+    assert image_client.get("/qr/img/img0000001.gif").status_code == 404
+    assert image_client.get("/qr/img/unknown.png").status_code == 404
+
+
+def test_sizes_are_rounded_to_buckets(image_client):
+    assert size_bucket(None, 300) == 300
+    assert (size_bucket(65, 300), size_bucket(129, 300), size_bucket(99999, 300)) == (128, 256, 4096)
+
+    etags = {image_client.get(f"/qr/img/img0000001.svg?size={size}").headers["etag"] for size in (65, 66, 100, 128)}
+    assert len(etags) == 1
+    assert render_cache_module.render_cache.stats()["entries"] == 2
+
+
+def test_inactive_codes_still_serve_images(image_client):
+    with next(image_client.app.dependency_overrides[get_db]()) as db:
+        db.query(QRCode).filter(QRCode.slug == "img0000001").update({"active": False})
+        db.commit()
+    assert image_client.get("/qr/img/img0000001.svg").status_code == 200
+
+
+def test_thumbnail_srcset_and_sizes():
+    qr = _qr(design=DESIGN)
+    srcset = thumb_srcset(qr, "webp")
+    assert srcset.count("w, ") == 2 and srcset.startswith("/qr/img/img0000001-64.webp?v=")
+    assert srcset.endswith(" 256w")
+
+    if WEBP_SUPPORTED:
+        result = render_qr(payload="https://ouhud.com/d/x", size=128, formats=("png", "webp"))
+        assert result["webp_bytes"][8:12] == b"WEBP" and result["encoding"]["webp_encoder"] == "webp-lossless"
+
+
+def test_thumbnail_endpoint(image_client):
+    version = thumb_version(stored_render_params(_qr(design=DESIGN)))
+    response = image_client.get(f"/qr/img/img0000001-128.png?v={version}")
+    assert response.status_code == 200 and response.headers["content-type"] == "image/png"
+    assert "immutable" in response.headers["cache-control"]
+    # direkt in Vorschaugröße gerendert, exakt wie im srcset angegeben
+    assert Image.open(io.BytesIO(response.content)).size == (128, 128)
+    assert render_cache_module.render_cache.stats()["entries"] == 2
+    if WEBP_SUPPORTED:
+        webp = image_client.get(f"/qr/img/img0000001-128.webp?v={version}")
+        assert webp.headers["content-type"] == "image/webp" and len(webp.content) < len(response.content)
+    assert image_client.get(f"/qr/img/img0000001-128.png?v={version}").content == response.content
+    assert image_client.get("/qr/img/img0000001-100.png").status_code == 404
+
+    framed = asyncio.run(render_thumbnail({**stored_render_params(_qr(design=DESIGN)), "frame_style": "pill"}, 64,
+                                          cache=render_cache_module.render_cache))
+    assert Image.open(io.BytesIO(framed)).size == (64, 64)
+    assert image_client.get("/qr/img/img0000001-64.gif").status_code == 404
+
+
+def test_small_sizes_keep_the_design_matrix(tmp_path):
+    logo = tmp_path / "logo.png"
+    Image.new("RGBA", (80, 80), (200, 30, 30, 255)).save(logo)
+    params = {**stored_render_params(_qr(design={**DESIGN, "qr_size": 600})), "logo_path": str(logo)}
+    full = render_qr(**params)["encoding"]
+
+    for size in (64 - 16, 128):
+        small = sized_params(params, size)
+        encoding = render_qr(**small)["encoding"]
+        assert (encoding["error_correction"], encoding["version"], encoding["modules"]) == (
+            full["error_correction"], full["version"], full["modules"])
+        # Logo wächst nicht über seinen Anteil hinaus -> gleiche verdeckte Fläche wie im vollen Bild
+        assert covered_ratio(size, str(logo), 20, "center", "auto-white", "none") == pytest.approx(
+            full["covered_ratio"], abs=0.05)
+    assert sized_params(params, 600) == params
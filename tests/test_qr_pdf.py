@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import re
+import zlib
+
+from PIL import Image
+
+from utils.qr_generator import render_qr
+
+
+def _objects(pdf: bytes) -> dict:
+    return {int(m.group(1)): m.start() for m in re.finditer(rb"(\d+) 0 obj", pdf)}
+
+
+def test_pdf_xref_points_at_objects():
+    pdf = render_qr("https://ouhud.com/d/pdf", size=600, formats=("pdf",))["pdf_bytes"]
+    assert pdf.startswith(b"%PDF-1.4") and pdf.rstrip().endswith(b"%%EOF")
+    xref = int(pdf.rsplit(b"startxref", 1)[1].split()[0])
+    entries = pdf[xref:].split(b"\n")[3:]
+    objects = _objects(pdf)
+    for number in sorted(objects):
+        assert int(entries[number - 1][:10]) == objects[number]
+
+
+def test_pdf_is_vector_and_sized_like_png():
+    pdf = render_qr("https://ouhud.com/d/pdf", size=600, dpi=300, formats=("pdf",))["pdf_bytes"]
+    # 600 px + 2 * 8 px Rand bei 300 dpi
+    assert b"/MediaBox [0 0 147.84 147.84]" in pdf
+    assert b"/Subtype /Image" not in pdf
+    stream = pdf.split(b"stream\n", 1)[1].rsplit(b"\nendstream", 1)[0]
+    content = zlib.decompress(stream)
+    assert b" re\n" in content and content.count(b"\nf\n") >= 1
+
+
+def test_logo_embedded_once_and_frame_text_as_font(tmp_path):
+    logo = tmp_path / "logo.png"
+    Image.new("RGBA", (64, 64), (200, 30, 30, 128)).save(logo)
+    pdf = render_qr(
+        "https://ouhud.com/d/pdf", size=600, logo_path=str(logo), frame_style="pill", frame_text="Scan me",
+        formats=("pdf",),
+    )["pdf_bytes"]
+    assert pdf.count(b"/Subtype /Image") == 2  # RGB + SMask
+    assert pdf.count(b"/SMask") == 1
+    assert b"/BaseFont /Helvetica" in pdf
+
+
+def test_gradient_uses_shading():
+    pdf = render_qr("https://ouhud.com/d/pdf", gradient=("#2563EB", "#F472B6"), formats=("pdf",))["pdf_bytes"]
+    assert b"/ShadingType 3" in pdf
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from utils.qr_generator import render_qr
+from utils.qr_png import encode_png, encoder_name
+
+
+def _same_pixels(original: Image.Image, data: bytes) -> bool:
+    decoded = Image.open(BytesIO(data)).convert("RGBA")
+    return np.array_equal(np.asarray(original.convert("RGBA")), np.asarray(decoded))
+
+
+def test_two_color_code_is_one_bit_and_lossless():
+    result = render_qr(payload="https://ouhud.com/d/png1", size=600, fg="#000000", bg="#FFFFFF")
+    assert result["encoding"]["png_encoder"] == "indexed-1bit"
+    with Image.open(BytesIO(result["bytes"])) as image:
+        assert image.mode in {"1", "P"}
+
+    # gleiche Pixel wie das bisherige RGBA-PNG, aber deutlich kleiner
+    rgba = Image.open(BytesIO(result["bytes"])).convert("RGBA")
+    legacy = BytesIO()
+    rgba.save(legacy, format="PNG")
+    assert len(result["bytes"]) * 3 < len(legacy.getvalue())
+    assert _same_pixels(rgba, result["bytes"])
+
+
+def test_palette_depth_and_transparency():
+    image = Image.new("RGBA", (40, 40), (255, 255, 255, 255))
+    for i, color in enumerate([(255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 128)]):
+        image.paste(color, (i * 10, 0, i * 10 + 10, 40))
+    data, encoder = encode_png(image)
+    assert encoder == "indexed-2bit"
+    assert _same_pixels(image, data)
+
+
+def test_many_colors_fall_back_to_truecolor():
+    gradient = np.tile(np.arange(256, dtype=np.uint8), (64, 3)).reshape(64, 256, 3)
+    gradient[..., 1] = gradient[..., 0][:, ::-1]
+    gradient[:32, :, 2] = 7
+    image = Image.fromarray(gradient, "RGB").convert("RGBA")
+    data, encoder = encode_png(image)
+    assert encoder == "rgb"
+    assert _same_pixels(image, data)
+
+    image.putpixel((0, 0), (1, 2, 3, 0))
+    assert encode_png(image)[1] == "rgba"
+
+
+def test_webp_is_opt_in_format():
+    result = render_qr(payload="https://ouhud.com/d/png2", size=300, formats=("webp",))
+    assert result["bytes"] == b"" and result["encoding"]["png_encoder"] is None
+    assert result["webp_bytes"][:4] == b"RIFF" and result["encoding"]["webp_encoder"] == "webp-lossless"
+    assert encoder_name("webp", result["webp_bytes"]) == "webp-lossless"
+
+
+def test_encoder_name_read_back_from_bytes():
+    image = Image.new("RGBA", (8, 8), (255, 255, 255, 255))
+    image.putpixel((0, 0), (0, 0, 0, 255))
+    assert encoder_name("png", encode_png(image)[0]) == "indexed-1bit"
+    image.putpixel((1, 0), (9, 9, 9, 0))
+    image.putpixel((2, 0), (200, 0, 0, 255))
+    assert encoder_name("png", encode_png(image)[0]) == "indexed-2bit"
+    noise = Image.fromarray(np.random.default_rng(1).integers(0, 256, (64, 64, 3), dtype=np.uint8), "RGB")
+    assert encoder_name("png", encode_png(noise)[0]) == encode_png(noise)[1] == "rgb"
+    assert encoder_name("svg", b"<svg/>") is None
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import qrcode.image.styles.colormasks as mask
+from PIL import ImageColor
+
+import utils.qr_generator as qrgen
+from utils.qr_generator import _build_qr, _styled_pil_modules, render_qr
+from utils.qr_raster import EYE, gradient_field, module_ids, rasterize_gradient, rasterize_modules
+
+
+@pytest.mark.parametrize("style", ["square", "rounded", "dots", "soft", "squircle", "thin-line"])
+@pytest.mark.parametrize("fg,bg", [("#0D2A78", "#FFFFFF"), ("#000000", "#FFFFFF"), ("#f0a", "#101010")])
+def test_numpy_modules_match_styled_pil(style, fg, bg):
+    qr = _build_qr("https://ouhud.com/d/raster", quiet_zone=2)
+    fg_rgb, bg_rgb = ImageColor.getrgb(fg), ImageColor.getrgb(bg)
+    legacy = _styled_pil_modules(qr, style, mask.SolidFillColorMask(front_color=fg_rgb, back_color=bg_rgb))
+    fast = rasterize_modules(qr, style, fg_rgb, bg_rgb)
+    assert fast.size == legacy.size
+    assert np.array_equal(np.asarray(fast), np.asarray(legacy))
+
+
+def test_eye_modules_use_square_stamp():
+    qr = _build_qr("https://ouhud.com/d/raster", quiet_zone=4)
+    ids = module_ids(qr)
+    assert ids.shape == (len(qr.modules) + 8,) * 2
+    assert ids[4, 4] == EYE  # obere linke Ecke des ersten Finder-Patterns
+    assert ids[0, 0] == 0
+
+
+def test_render_qr_png_identical_to_legacy_path(monkeypatch):
+    kwargs = dict(size=450, fg="#0D2A78", bg="#FFFFFF", module_style="rounded", eye_style="ring", formats=("png",))
+    fast = render_qr("https://ouhud.com/d/raster", **kwargs)["bytes"]
+
+    def legacy(qr, module_style, fg, bg):
+        return _styled_pil_modules(qr, module_style, mask.SolidFillColorMask(front_color=fg, back_color=bg))
+
+    monkeypatch.setattr(qrgen, "rasterize_modules", legacy)
+    assert render_qr("https://ouhud.com/d/raster", **kwargs)["bytes"] == fast
+
+
+@pytest.mark.parametrize("style", ["square", "rounded", "dots", "soft"])
+@pytest.mark.parametrize("start,end", [("#2563EB", "#F472B6"), ("#000000", "#0D2A78")])
+def test_numpy_radial_gradient_matches_color_mask(style, start, end):
+    qr = _build_qr("https://ouhud.com/d/raster", quiet_zone=2)
+    start_rgb, end_rgb = ImageColor.getrgb(start), ImageColor.getrgb(end)
+    legacy = _styled_pil_modules(qr, style, mask.RadialGradiantColorMask(center_color=start_rgb, edge_color=end_rgb))
+    fast = rasterize_gradient(qr, style, start_rgb, end_rgb)
+    assert np.array_equal(np.asarray(fast), np.asarray(legacy.convert("RGBA")))
+
+
+def test_gradient_kinds_and_field_cache():
+    qr = _build_qr("https://ouhud.com/d/raster", quiet_zone=2)
+    images = {kind: np.asarray(rasterize_gradient(qr, "square", (255, 0, 0), (0, 0, 255), kind))
+              for kind in ("radial", "linear", "diagonal")}
+    assert not np.array_equal(images["radial"], images["linear"])
+    assert not np.array_equal(images["linear"], images["diagonal"])
+    assert gradient_field("linear", 330) is gradient_field("linear", 330)
+    assert gradient_field("linear", 330)[0, -1] == 1.0
+
+
+def test_render_qr_accepts_gradient_kind():
+    kwargs = dict(size=300, module_style="rounded", formats=("png",))
+    radial = render_qr("https://ouhud.com/d/raster", gradient=("#2563EB", "#F472B6"), **kwargs)["bytes"]
+    linear = render_qr("https://ouhud.com/d/raster", gradient=("#2563EB", "#F472B6", "linear"), **kwargs)["bytes"]
+    assert radial and linear and radial != linear
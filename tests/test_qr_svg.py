@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import gzip
+from xml.etree import ElementTree
+
+import numpy as np
+
+from utils.qr_generator import _build_qr, render_qr
+from utils.qr_svg import merged_rects, module_layer
+
+
+def test_merged_rects_cover_exactly_the_dark_modules():
+    matrix = _build_qr("https://ouhud.com/d/svg-merge").get_matrix()
+    covered = np.zeros((len(matrix), len(matrix)), dtype=int)
+    for x, y, w, h in merged_rects(matrix):
+        covered[y:y + h, x:x + w] += 1
+    assert np.array_equal(covered, np.array(matrix, dtype=int))
+
+
+def test_square_modules_are_one_path():
+    matrix = _build_qr("https://ouhud.com/d/svg-merge").get_matrix()
+    layer = module_layer(matrix, cell=10, pad=12, module_style="square", fg="#0D2A78")
+    assert layer.count("<path") == 1 and "<rect" not in layer
+
+
+def test_dots_reuse_one_shape():
+    matrix = _build_qr("https://ouhud.com/d/svg-merge").get_matrix()
+    layer = module_layer(matrix, cell=10, pad=12, module_style="dots", fg="#0D2A78")
+    assert layer.count("<circle") == 1
+    assert layer.count("<use") == sum(map(sum, matrix))
+
+
+def test_svgz_is_gzipped_svg_and_deterministic():
+    first = render_qr("https://ouhud.com/d/svg-merge", size=300, formats=("svg", "svgz"))
+    second = render_qr("https://ouhud.com/d/svg-merge", size=300, formats=("svgz",))
+    assert gzip.decompress(first["svgz_bytes"]) == first["svg_bytes"]
+    assert second["svgz_bytes"] == first["svgz_bytes"]
+    assert second["svg_bytes"] == b"" and second["bytes"] == b""
+
+
+def test_use_elements_carry_xlink_href_for_svg11_tools():
+    svg = render_qr("https://ouhud.com/d/svg-xlink", size=300, module_style="dots", formats=("svg",))["svg_bytes"]
+    root = ElementTree.fromstring(svg)  # ohne xmlns:xlink wäre das kein wohlgeformtes XML
+    uses = root.findall(".//{http://www.w3.org/2000/svg}use")
+    assert uses and all(use.get("{http://www.w3.org/1999/xlink}href") == "#m" == use.get("href") for use in uses)
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import get_db
+from main import app
+from models.plan import Plan
+from models.qr_conversion import QRConversion
+from models.qr_scan import QRScan
+from models.qrcode import QRCode
+from models.user import User
+from utils import rate_shield
+from utils.rate_shield import TokenBucketShield
+from utils.resolve_cache import ResolveCache, resolve_cache
+from utils.scan_ingest import scan_ingestor
+
+
+def test_token_bucket_sheds_and_refills():
+    shield = TokenBucketShield(rate=1, burst=2)
+    assert shield.allow("ip", now=0.0)
+    assert shield.allow("ip", now=0.0)
+    assert not shield.allow("ip", now=0.0)
+    assert shield.allow("ip", now=1.0)
+    assert shield.allow("other", now=0.0)
+    assert shield.stats()["shed"] == 1
+
+
+def test_disabled_shield_allows_everything():
+    shield = TokenBucketShield(rate=0, burst=1)
+    assert all(shield.allow("ip") for _ in range(100))
+
+
+def test_negative_entries_expire_and_invalidate():
+    cache = ResolveCache(negative_ttl=60)
+    cache.put_missing("gone")
+    assert cache.is_known_missing("gone")
+    cache.invalidate("gone")
+    assert not cache.is_known_missing("gone")
+
+    short = ResolveCache(negative_ttl=0)
+    short.put_missing("gone")
+    assert not short.is_known_missing("gone")
+
+
+@pytest.fixture
+def shield_env():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    for model in (Plan, User, QRCode, QRScan, QRConversion):
+        model.__table__.create(bind=engine, checkfirst=True)
+
+    def override_get_db():
+        db = session_local()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    resolve_cache.clear()
+    previous_mode = scan_ingestor.mode
+    scan_ingestor.configure(mode="sync")
+    with TestClient(app) as client:
+        yield client, session_local
+    scan_ingestor.configure(mode=previous_mode)
+    app.dependency_overrides.pop(get_db, None)
+    resolve_cache.clear()
+    engine.dispose()
+
+
+def test_unknown_slug_is_served_from_negative_cache(shield_env):
+    client, session_local = shield_env
+    before = resolve_cache.stats()["negative_hits"]
+
+    assert client.get("/d/no-such-slug", follow_redirects=False).status_code == 404
+    assert client.get("/dyn/no-such-slug", follow_redirects=False).status_code == 404
+    assert resolve_cache.stats()["negative_hits"] == before + 1
+
+    # Neu angelegter QR-Code mit diesem Slug ist sofort erreichbar
+    with session_local() as db:
+        user = User(username="neg_owner", email="neg@example.com", password_hash="hash")
+        db.add(user)
+        db.flush()
+        qr = QRCode(user_id=user.id, slug="no-such-slug", type="url", title="Neu")
+        qr.set_data({"url": "https://now.example.com"})
+        db.add(qr)
+        db.commit()
+
+    response = client.get("/d/no-such-slug", follow_redirects=False)
+    assert response.headers["location"] == "https://now.example.com"
+
+
+def test_flood_of_unique_slugs_is_shed(shield_env, monkeypatch):
+    client, _ = shield_env
+    monkeypatch.setattr(rate_shield, "ip_shield", TokenBucketShield(rate=0.01, burst=3))
+
+    codes = [client.get(f"/d/random-{i}", follow_redirects=False).status_code for i in range(6)]
+
+    assert codes[:3] == [404, 404, 404]
+    assert codes[3:] == [429, 429, 429]
+
+
+def test_ip_shield_is_off_by_default_and_keys_on_trusted_hop():
+    assert not rate_shield.ip_shield.enabled
+    assert rate_shield.client_ip("198.51.100.7, 10.0.0.2", "10.0.0.1", hops=0) == "10.0.0.1"
+    # ein vertrauenswürdiger Proxy: dessen Eintrag (ganz rechts) zählt, nicht der vom Client gesetzte
+    assert rate_shield.client_ip("6.6.6.6, 198.51.100.7", "10.0.0.1", hops=1) == "198.51.100.7"
+    assert rate_shield.client_ip("198.51.100.7, 10.0.0.2", "10.0.0.1", hops=2) == "198.51.100.7"
+    assert rate_shield.client_ip(None, "10.0.0.1", hops=1) == "10.0.0.1"
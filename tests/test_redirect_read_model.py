@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import get_db
+from main import app
+from models.plan import Plan
+from models.qr_conversion import QRConversion
+from models.qr_redirect import QRRedirect
+from models.qr_scan import QRScan
+from models.qrcode import QRCode
+from models.user import User
+from utils.encryption import decrypt_qr_content
+from utils.redirect_read_model import ensure_redirect_table
+from utils.resolve_cache import resolve_cache
+from utils.scan_ingest import scan_ingestor
+
+
+@pytest.fixture
+def redirect_env():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    for model in (Plan, User, QRCode, QRScan, QRConversion):
+        model.__table__.create(bind=engine, checkfirst=True)
+    ensure_redirect_table(engine)
+
+    def override_get_db():
+        db = session_local()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    resolve_cache.clear()
+    previous_mode = scan_ingestor.mode
+    scan_ingestor.configure(mode="sync")
+    with TestClient(app) as client:
+        yield client, session_local
+    scan_ingestor.configure(mode=previous_mode)
+    app.dependency_overrides.pop(get_db, None)
+    resolve_cache.clear()
+    engine.dispose()
+
+
+def _create_qr(session_local, slug: str, url: str) -> None:
+    with session_local() as db:
+        user = User(username=f"owner_{slug}", email=f"{slug}@example.com", password_hash="hash")
+        db.add(user)
+        db.flush()
+        qr = QRCode(user_id=user.id, slug=slug, type="url", title="Redirect")
+        qr.set_data({"url": url, "design": {"fg": "#000000"}})
+        db.add(qr)
+        db.commit()
+
+
+def test_insert_update_delete_maintain_redirect_row(redirect_env):
+    _, session_local = redirect_env
+    _create_qr(session_local, "rm-slug", "https://first.example.com")
+
+    with session_local() as db:
+        row = db.get(QRRedirect, "rm-slug")
+        assert row is not None and row.active
+        assert decrypt_qr_content(row.payload) == {"url": "https://first.example.com"}
+
+        qr = db.query(QRCode).filter(QRCode.slug == "rm-slug").one()
+        qr.slug = "rm-renamed"
+        qr.active = False
+        db.commit()
+
+    with session_local() as db:
+        assert db.get(QRRedirect, "rm-slug") is None
+        assert db.get(QRRedirect, "rm-renamed").active is False
+
+        db.delete(db.query(QRCode).filter(QRCode.slug == "rm-renamed").one())
+        db.commit()
+        assert db.query(QRRedirect).count() == 0
+
+
+def test_resolver_reads_redirect_row_and_repairs_missing(redirect_env):
+    client, session_local = redirect_env
+    _create_qr(session_local, "rm-resolve", "https://target.example.com")
+
+    with session_local() as db:
+        db.execute(delete(QRRedirect.__table__))
+        db.commit()
+
+    first = client.get("/d/rm-resolve", follow_redirects=False)
+    assert first.headers["location"] == "https://target.example.com"
+    with session_local() as db:
+        assert db.get(QRRedirect, "rm-resolve") is not None
+
+    resolve_cache.clear()
+    second = client.get("/d/rm-resolve", follow_redirects=False)
+    assert second.headers["location"] == "https://target.example.com"
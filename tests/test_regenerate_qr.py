@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import os
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.plan import Plan
+from models.qr_conversion import QRConversion
+from models.qr_scan import QRScan
+from models.qrcode import QRCode
+from models.user import User
+from scripts.regenerate_missing_qr import regenerate, save_checkpoint
+from utils.qr_image import stored_render_params
+from utils.render_cache import RenderCache, render_key
+from utils.render_pool import RenderPool
+
+
+def _session(count: int = 5):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (Plan, User, QRCode, QRScan, QRConversion):
+        model.__table__.create(bind=engine, checkfirst=True)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    for i in range(count):
+        qr = QRCode(user_id=1, slug=f"regen{i:05d}", type="url", dynamic_url=f"https://ouhud.com/d/regen{i:05d}",
+                    style="classic" if i == 0 else "modern", image_path=f"static/generated_qr/qr_regen{i:05d}.png")
+        qr.set_data({"url": f"https://example.com/{i}"})
+        session.add(qr)
+    session.commit()
+    return session
+
+
+def test_regenerate_warms_cache_and_migrates_paths(tmp_path):
+    session = _session()
+    cache = RenderCache(str(tmp_path / "render"))
+    checkpoint = str(tmp_path / "checkpoint.json")
+    pool = RenderPool(mode="thread", workers=2)
+    lines = []
+    try:
+        counts = regenerate(session, pool, formats=("png", "svg"), chunk=2, cache=cache,
+                            checkpoint=checkpoint, log=lines.append)
+        assert (counts["seen"], counts["rendered"], counts["paths_updated"], counts["errors"]) == (5, 5, 5, 0)
+        assert any("Codes/s" in line and "ETA" in line for line in lines)
+        assert not os.path.exists(checkpoint)
+        for qr in session.query(QRCode).all():
+            params = stored_render_params(qr)
+            assert qr.image_path.startswith(f"qr/img/{qr.slug}.png?v=")
+            assert render_key("png", params) in cache and render_key("svg", params) in cache
+
+        again = regenerate(session, pool, formats=("png", "svg"), only_missing=True, cache=cache, log=lines.append)
+        assert (again["rendered"], again["cached"], again["paths_updated"]) == (0, 5, 0)
+
+        forced = regenerate(session, pool, force_style="classic", cache=cache, dry_run=True, log=lines.append)
+        assert (forced["total"], forced["rendered"]) == (1, 1)
+    finally:
+        pool.shutdown()
+
+
+def test_regenerate_resumes_after_checkpoint(tmp_path):
+    session = _session()
+    checkpoint = str(tmp_path / "checkpoint.json")
+    third = session.query(QRCode).order_by(QRCode.id).all()[2].id
+    save_checkpoint(checkpoint, {"formats": ["png"], "only_missing": False, "force_style": None}, third)
+    pool = RenderPool(mode="thread", workers=1)
+    try:
+        counts = regenerate(session, pool, cache=RenderCache(str(tmp_path / "render")),
+                            checkpoint=checkpoint, log=lambda _: None)
+    finally:
+        pool.shutdown()
+    assert (counts["total"], counts["rendered"]) == (2, 2)
+    assert session.query(QRCode).filter(QRCode.image_path.like("static/%")).count() == 3
+
+
+def test_regenerate_warns_when_the_run_outgrows_the_cache(tmp_path):
+    session = _session()
+    cache = RenderCache(str(tmp_path / "render"), max_bytes=4096)
+    pool = RenderPool(mode="thread", workers=1)
+    lines = []
+    try:
+        counts = regenerate(session, pool, formats=("png", "svg"), cache=cache, log=lines.append)
+    finally:
+        pool.shutdown()
+    assert counts["bytes_written"] > cache.max_bytes and counts["evicted"] > 0
+    assert any("RENDER_CACHE_MAX_MB" in line for line in lines)
+    assert cache.stats()["bytes_in_use"] <= cache.max_bytes
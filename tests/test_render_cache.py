@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+
+import utils.render_cache as rc
+from utils.render_cache import RenderCache, render_key, render_qr_cached, render_qr_cached_async
+
+PARAMS = {"payload": "https://ouhud.com/d/cache-test", "size": 240, "fg": "#0D2A78", "bg": "#FFFFFF"}
+
+
+def test_key_is_stable_and_covers_format_and_params():
+    assert render_key("png", PARAMS) == render_key("png", dict(reversed(list(PARAMS.items()))))
+    assert render_key("png", PARAMS) != render_key("svg", PARAMS)
+    assert render_key("png", PARAMS) != render_key("png", {**PARAMS, "size": 300})
+
+
+def test_logo_counts_by_content(tmp_path: Path):
+    a = tmp_path / "a.png"
+    b = tmp_path / "b.png"
+    a.write_bytes(b"logo-1")
+    b.write_bytes(b"logo-1")
+    assert render_key("png", {**PARAMS, "logo_path": str(a)}) == render_key("png", {**PARAMS, "logo_path": str(b)})
+    b.write_bytes(b"logo-2-changed")
+    assert render_key("png", {**PARAMS, "logo_path": str(a)}) != render_key("png", {**PARAMS, "logo_path": str(b)})
+
+
+def test_lru_eviction_by_bytes(tmp_path: Path):
+    cache = RenderCache(str(tmp_path), max_bytes=10)
+    cache.put("aa1", b"12345")
+    cache.put("bb2", b"12345")
+    assert cache.get("aa1") == b"12345"  # aa1 wird zuletzt benutzt
+    cache.put("cc3", b"123")
+
+    assert cache.get("bb2") is None
+    assert cache.get("cc3") == b"123"
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes_in_use"] == 8
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2 and stats["misses"] == 1
+    assert not (tmp_path / "bb" / "bb2").exists()
+
+
+def test_index_rebuilt_from_disk(tmp_path: Path):
+    RenderCache(str(tmp_path), max_bytes=100).put("dd4", b"persisted")
+    reopened = RenderCache(str(tmp_path), max_bytes=100)
+    assert reopened.get("dd4") == b"persisted"
+    assert reopened.stats()["bytes_in_use"] == len(b"persisted")
+
+
+def test_repeat_render_is_a_cache_read(tmp_path: Path, monkeypatch):
+    cache = RenderCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+    first = render_qr_cached(formats=("png", "svg"), cache=cache, **PARAMS)
+    assert first["cache_hits"] == []
+
+    def fail(**kwargs):
+        raise AssertionError("sollte aus dem Cache kommen")
+
+    monkeypatch.setattr(rc, "render_qr", fail)
+    second = render_qr_cached(formats=("png", "svg"), cache=cache, **PARAMS)
+    assert second["cache_hits"] == ["png", "svg"]
+    assert second["bytes"] == first["bytes"]
+    assert second["svg_bytes"] == first["svg_bytes"]
+    assert second["pdf_bytes"] == b""
+    # Encoding-Entscheidung, Encoder und Warnungen bleiben auch bei Cache-Treffern sichtbar
+    assert second["encoding"] == first["encoding"]
+    assert second["encoding"]["png_encoder"] == "indexed-1bit" and "svg_encoder" not in second["encoding"]
+    assert (second["encoding"]["error_correction"], second["encoding"]["version"]) == ("M", 3)
+    assert second["quality_warnings"] == first["quality_warnings"]
+    assert second["contrast_ratio"] == first["contrast_ratio"]
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 2
+
+
+def test_cached_result_reports_the_encoding_decision(tmp_path: Path):
+    cache = RenderCache(str(tmp_path), max_bytes=10 * 1024 * 1024)
+    params = {**PARAMS, "fg": "#CCCCCC", "error_correction": "L"}
+    fresh = render_qr_cached(formats=("svg",), cache=cache, **params)
+    assert fresh["encoding"]["selection"] == "explicit" and fresh["encoding"]["error_correction"] == "L"
+    assert any("contrast" in warning for warning in fresh["quality_warnings"])
+
+    # Bild von einem Skript abgelegt, ohne Metadaten -> aus der Matrix nachgetragen, ohne zu rendern
+    other = RenderCache(str(tmp_path / "other"), max_bytes=10 * 1024 * 1024)
+    other.put(render_key("svg", params), fresh["svg_bytes"])
+    hit = render_qr_cached(formats=("svg",), cache=other, **params)
+    assert hit["cache_hits"] == ["svg"] and hit["encoding"] == fresh["encoding"]
+    assert hit["quality_warnings"] == fresh["quality_warnings"]
+    assert render_key("meta", params) in other
+
+
+def test_unknown_format_rejected(tmp_path: Path):
+    with pytest.raises(ValueError):
+        render_qr_cached(formats=("gif",), cache=RenderCache(str(tmp_path)), **PARAMS)
+
+
+def test_async_cache_io_runs_off_the_event_loop(tmp_path: Path):
+    threads = []
+
+    class SpyCache(RenderCache):
+        def get(self, key, record=True):
+            threads.append(threading.get_ident())
+            return super().get(key, record)
+
+        def put(self, key, data):
+            threads.append(threading.get_ident())
+            super().put(key, data)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        await render_qr_cached_async(formats=("svg",), cache=SpyCache(str(tmp_path)), **PARAMS)
+        return loop_thread
+
+    loop_thread = asyncio.run(run())
+    # Bild und Metadaten: je ein Lesen und Schreiben
+    assert len(threads) == 4 and loop_thread not in threads
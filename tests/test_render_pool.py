@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+import utils.render_pool as rp
+from utils.qr_generator import render_qr
+from utils.render_pool import RenderPool, RenderPoolBusy
+
+PARAMS = {"payload": "https://ouhud.com/d/pool", "size": 240, "formats": ("png",)}
+
+
+@pytest.mark.asyncio
+async def test_thread_pool_renders_with_timings():
+    pool = RenderPool(mode="thread", workers=2)
+    try:
+        result = await pool.render(**PARAMS)
+    finally:
+        pool.shutdown()
+    assert result["bytes"] == render_qr(**PARAMS)["bytes"]
+    assert set(result["timings"]) == {"queue_ms", "render_ms"}
+    assert pool.stats()["completed"] == 1 and pool.stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_process_pool_renders_off_loop():
+    pool = RenderPool(mode="process", workers=1)
+    try:
+        result = await pool.render(**PARAMS)
+    finally:
+        pool.shutdown()
+    assert result["bytes"] == render_qr(**PARAMS)["bytes"]
+    assert result["timings"]["render_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_full_pool_rejects_after_wait(monkeypatch):
+    release = threading.Event()
+
+    def slow_render(**params):
+        release.wait(5)
+        return {"bytes": b"ok"}
+
+    monkeypatch.setattr(rp, "render_qr", slow_render)
+    pool = RenderPool(mode="thread", workers=1, max_queue=0, wait_timeout=0.05)
+    first = asyncio.create_task(pool.render(**PARAMS))
+    await asyncio.sleep(0.05)
+    try:
+        with pytest.raises(RenderPoolBusy):
+            await pool.render(**PARAMS)
+    finally:
+        release.set()
+        assert (await first)["bytes"] == b"ok"
+        pool.shutdown()
+    assert pool.stats()["rejected"] == 1
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import get_db
+from main import app
+from models.plan import Plan
+from models.qr_conversion import QRConversion
+from models.qr_scan import QRScan
+from models.qrcode import QRCode
+from models.user import User
+from utils.blob_storage import LocalBlobBackend, blob_store
+from utils.resolve_cache import ResolveCache, ResolvedQR, resolve_cache
+from utils.scan_ingest import scan_ingestor
+
+
+def _record(slug: str, url: str = "https://example.com") -> ResolvedQR:
+    return ResolvedQR(qr_id=1, slug=slug, type="url", user_id=1, active=True, data={"url": url})
+
+
+def test_cache_counts_hits_and_misses():
+    cache = ResolveCache(max_entries=10, ttl=60)
+    assert cache.get("a") is None
+    cache.put(_record("a"))
+    assert cache.get("a") is not None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResolveCache(max_entries=2, ttl=60)
+    cache.put(_record("a"))
+    cache.put(_record("b"))
+    cache.get("a")
+    cache.put(_record("c"))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_entries_expire():
+    cache = ResolveCache(max_entries=10, ttl=0)
+    cache.put(_record("a"))
+    assert cache.get("a") is None
+
+
+@pytest.fixture
+def resolver_env():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    session_local = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    for model in (Plan, User, QRCode, QRScan, QRConversion):
+        model.__table__.create(bind=engine, checkfirst=True)
+
+    def override_get_db():
+        db = session_local()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    resolve_cache.clear()
+    previous_mode = scan_ingestor.mode
+    scan_ingestor.configure(mode="sync")
+    with TestClient(app) as client:
+        yield client, session_local
+    scan_ingestor.configure(mode=previous_mode)
+    app.dependency_overrides.pop(get_db, None)
+    resolve_cache.clear()
+    engine.dispose()
+
+
+def test_set_data_invalidates_resolved_slug(resolver_env):
+    client, session_local = resolver_env
+    with session_local() as db:
+        user = User(username="cache_owner", email="cache@example.com", password_hash="hash")
+        db.add(user)
+        db.flush()
+        qr = QRCode(user_id=user.id, slug="cache-slug", type="url", title="Cache")
+        qr.set_data({"url": "https://first.example.com"})
+        db.add(qr)
+        db.commit()
+
+    first = client.get("/d/cache-slug", follow_redirects=False)
+    assert first.headers["location"] == "https://first.example.com"
+    assert resolve_cache.get("cache-slug") is not None
+
+    with session_local() as db:
+        qr = db.query(QRCode).filter(QRCode.slug == "cache-slug").one()
+        qr.set_data({"url": "https://second.example.com"})
+        db.commit()
+
+    second = client.get("/d/cache-slug", follow_redirects=False)
+    assert second.headers["location"] == "https://second.example.com"
+
+
+def test_pdf_slug_serves_stored_blob(resolver_env, tmp_path, monkeypatch):
+    client, session_local = resolver_env
+    monkeypatch.setattr(blob_store, "local", LocalBlobBackend(str(tmp_path)))
+    pdf_key = blob_store.put(b"%PDF-1.4 menu", "pdfs", "pdf")
+    with session_local() as db:
+        user = User(username="pdf_owner", email="pdf@example.com", password_hash="hash")
+        db.add(user)
+        db.flush()
+        qr = QRCode(user_id=user.id, slug="pdf-slug", type="pdf", title="Speisekarte")
+        qr.set_data({"pdf_path": pdf_key})
+        db.add(qr)
+        db.commit()
+
+    response = client.get("/d/pdf-slug")
+    assert response.status_code == 200
+    assert response.content == b"%PDF-1.4 menu"
+    assert response.headers["content-type"] == "application/pdf"
+    assert 'filename="pdf-slug.pdf"' in response.headers["content-disposition"]
+
+    with session_local() as db:
+        qr = db.query(QRCode).filter(QRCode.slug == "pdf-slug").one()
+        qr.set_data({"pdf_path": "blobs/pdfs/00/" + "0" * 64 + ".pdf"})
+        db.commit()
+    assert client.get("/d/pdf-slug").status_code == 404
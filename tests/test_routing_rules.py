@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timezone
+
+from utils.routing_rules import RequestAttributes, _language_tokens, compile_routing
+
+
+def _attrs(country: str = "", lang: str = "", device: str = "desktop") -> RequestAttributes:
+    return RequestAttributes(
+        country=country.upper(),
+        languages=_language_tokens(lang),
+        device=device,
+        accept_language=lang,
+    )
+
+
+NOON = datetime(2026, 1, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def test_first_matching_rule_wins():
+    routing = compile_routing({
+        "rules": [
+            {"target_url": "", "countries": ["DE"]},
+            {"target_url": "https://de.example", "countries": ["de"], "devices": ["ios"]},
+            {"target_url": "https://de-any.example", "countries": ["DE"]},
+            {"target_url": "https://fallback.example"},
+        ]
+    })
+    assert routing.match_rule(_attrs("de", device="ios"), NOON) == "https://de.example"
+    assert routing.match_rule(_attrs("de", device="android"), NOON) == "https://de-any.example"
+    assert routing.match_rule(_attrs("fr"), NOON) == "https://fallback.example"
+
+
+def test_languages_match_full_tag_and_primary_subtag():
+    routing = compile_routing({
+        "rules": [
+            {"target_url": "https://at.example", "languages": ["de-AT"]},
+            {"target_url": "https://de.example", "languages": ["de"]},
+        ]
+    })
+    assert routing.match_rule(_attrs(lang="de-AT,de;q=0.9"), NOON) == "https://at.example"
+    assert routing.match_rule(_attrs(lang="de-CH"), NOON) == "https://de.example"
+    assert routing.match_rule(_attrs(lang="en-US"), NOON) is None
+
+
+def test_time_windows_do_not_wrap_and_invalid_never_match():
+    routing = compile_routing({
+        "rules": [
+            {"target_url": "https://night.example", "time_from": "22:00", "time_to": "06:00"},
+            {"target_url": "https://broken.example", "time_from": "soon", "time_to": "later"},
+            {"target_url": "https://day.example", "time_from": "8:00", "time_to": "18:00"},
+        ]
+    })
+    assert routing.match_rule(_attrs(), NOON) == "https://day.example"
+    late = datetime(2026, 1, 1, 23, 0, tzinfo=timezone.utc)
+    assert routing.match_rule(_attrs(), late) is None
+
+
+def test_many_rules_pick_the_right_one():
+    rules = [{"target_url": f"https://c{i}.example", "countries": [f"C{i}"]} for i in range(300)]
+    routing = compile_routing({"rules": rules})
+    assert routing.rule_count == 300
+    assert routing.match_rule(_attrs("c257"), NOON) == "https://c257.example"
+    assert routing.match_rule(_attrs("zz"), NOON) is None
+
+
+def test_ab_targets_follow_weights():
+    routing = compile_routing({
+        "ab_targets": [
+            {"url": "https://a.example", "weight": 3},
+            {"url": "https://b.example", "weight": 1},
+            {"url": ""},
+        ]
+    })
+    rng = random.Random(7)
+    picks = [routing.pick_ab_target(rng) for _ in range(4000)]
+    share_a = picks.count("https://a.example") / len(picks)
+    assert 0.70 < share_a < 0.80
+    assert set(picks) == {"https://a.example", "https://b.example"}
+    assert compile_routing({}).pick_ab_target() is None
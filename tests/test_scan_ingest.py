@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.plan import Plan
+from models.qr_conversion import QRConversion
+from models.qr_scan import QRScan
+from models.qrcode import QRCode
+from models.user import User
+import utils.scan_ingest as scan_ingest
+from utils.scan_ingest import CONVERSION, SCAN, ScanIngestor
+
+
+def _session_factory():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    for model in (Plan, User, QRCode, QRScan, QRConversion):
+        model.__table__.create(bind=engine, checkfirst=True)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _scan(qr_id: int = 1) -> dict:
+    return {
+        "qr_id": qr_id,
+        "device": "test",
+        "location": "10.0.0.1",
+        "user_agent": "Mozilla/5.0",
+        "timestamp": datetime.now(timezone.utc),
+    }
+
+
+def _visit(qr_id: int = 1) -> dict:
+    return {
+        "qr_id": qr_id,
+        "slug": "ingest",
+        "event_type": "visit",
+        "value": None,
+        "currency": None,
+        "meta_json": None,
+        "ip_address": "10.0.0.1",
+        "user_agent": "Mozilla/5.0",
+        "created_at": datetime.now(timezone.utc),
+    }
+
+
+def test_buffered_ingest_drains_on_shutdown():
+    session_local = _session_factory()
+    ingestor = ScanIngestor(batch_size=50, flush_interval=30, session_factory=session_local)
+
+    for _ in range(120):
+        ingestor.record_scan(None, scan=_scan(), conversion=_visit())
+    ingestor.shutdown()
+
+    with session_local() as db:
+        assert db.query(QRScan).count() == 120
+        assert db.query(QRConversion).count() == 120
+    stats = ingestor.stats()
+    assert stats["written"] == 240
+    assert stats["flushes"] >= 5
+    assert stats["dropped"] == 0
+
+
+def test_backlog_is_bounded():
+    session_local = _session_factory()
+    ingestor = ScanIngestor(max_backlog=3, flush_interval=30, session_factory=session_local)
+    ingestor._ensure_worker = lambda: None  # Worker nicht starten: Queue läuft voll
+
+    ingestor.submit(None, [(SCAN, _scan()) for _ in range(5)])
+
+    assert ingestor.stats()["backlog"] == 3
+    assert ingestor.stats()["dropped"] == 2
+
+
+def test_sync_mode_writes_immediately():
+    session_local = _session_factory()
+    ingestor = ScanIngestor(mode="sync", session_factory=session_local)
+
+    with session_local() as db:
+        ingestor.submit(db, [(SCAN, _scan()), (CONVERSION, _visit())])
+        assert db.query(QRScan).count() == 1
+        assert db.query(QRConversion).count() == 1
+
+
+def test_rollup_failure_keeps_raw_scans(monkeypatch):
+    session_local = _session_factory()
+    calls = []
+
+    def broken_rollups(session, scans):
+        calls.append(len(scans))
+        raise RuntimeError("Deadlock auf Rollup-Zeile")
+
+    monkeypatch.setattr(scan_ingest, "apply_scan_rollups", broken_rollups)
+    ingestor = ScanIngestor(mode="sync", session_factory=session_local, retries=2, retry_backoff=0)
+    ingestor.submit(None, [(SCAN, _scan()), (CONVERSION, _visit())])
+    ingestor._flush([(SCAN, _scan()), (SCAN, _scan())])
+
+    with session_local() as db:
+        assert db.query(QRScan).count() == 3 and db.query(QRConversion).count() == 1
+    # sync ohne Wiederholung, Flush mit zwei Wiederholungen
+    assert calls == [1, 2, 2, 2]
+    assert ingestor.stats()["rollup_errors"] == 2 and ingestor.stats()["written"] == 4
+
+
+def test_flush_retries_transient_errors_then_counts_loss(monkeypatch):
+    session_local = _session_factory()
+    ingestor = ScanIngestor(mode="sync", session_factory=session_local, retries=2, retry_backoff=0)
+    original = ingestor._insert_batch
+    failures = iter([True, False])
+
+    def flaky(session, batch):
+        if next(failures, True):
+            raise RuntimeError("MySQL server has gone away")
+        original(session, batch)
+
+    monkeypatch.setattr(ingestor, "_insert_batch", flaky)
+    ingestor._flush([(SCAN, _scan()), (SCAN, _scan())])
+    with session_local() as db:
+        assert db.query(QRScan).count() == 2
+    assert ingestor.stats()["errors"] == 1 and ingestor.stats()["lost"] == 0
+
+    # alle Versuche scheitern -> Batch zählt als verloren
+    ingestor._flush([(SCAN, _scan())])
+    assert ingestor.stats()["errors"] == 4 and ingestor.stats()["lost"] == 1
+    assert ingestor.stats()["written"] == 2
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import get_db
+from main import app
+from models.coupon_redemption import CouponRedemption
+from models.feedback_entry import FeedbackEntry
+from models.lead_capture import LeadCapture
+from models.plan import Plan
+from models.qr_conversion import QRConversion
+from models.qr_scan import QRScan
+from models.qrcode import QRCode
+from models.scan_rollup import ScanRollupDaily, ScanRollupHourly
+from models.user import User
+from routes.auth import get_current_user
+from scripts.rebuild_scan_rollups import rebuild
+from utils.scan_ingest import SCAN, ScanIngestor
+from utils.scan_rollups import DAILY, _update_or_insert, aggregate_scans, ensure_scan_rollup_tables
+from utils.scan_stats import RawScanStats, RollupScanStats, scan_stats
+
+IPHONE = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X)"
+WINDOWS = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+
+
+@pytest.fixture
+def session_local():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    for model in (Plan, User, QRCode, QRScan, QRConversion, LeadCapture, FeedbackEntry, CouponRedemption):
+        model.__table__.create(bind=engine, checkfirst=True)
+    ensure_scan_rollup_tables(engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with factory() as db:
+        user = User(username="rollup_owner", email="rollup@example.com", password_hash="hash")
+        db.add(user)
+        db.flush()
+        qr = QRCode(user_id=user.id, slug="rollup-slug", type="url", title="Rollup")
+        qr.set_data({"url": "https://example.com"})
+        db.add(qr)
+        db.commit()
+    yield factory
+    engine.dispose()
+
+
+def _scan(ts: datetime, ua: str, location: str = "203.0.113.7") -> dict:
+    return {"qr_id": 1, "device": ua[:50], "location": location, "user_agent": ua, "timestamp": ts}
+
+
+def _daily(db) -> dict:
+    return {
+        (row.bucket.date(), row.device_class, row.is_test): row.scans
+        for row in db.query(ScanRollupDaily).all()
+    }
+
+
+def test_ingest_upserts_hourly_and_daily_rollups(session_local):
+    ingestor = ScanIngestor(mode="sync", session_factory=session_local)
+    ts = datetime(2026, 3, 2, 14, 30, tzinfo=timezone.utc)
+
+    ingestor.submit(None, [(SCAN, _scan(ts, IPHONE)), (SCAN, _scan(ts, WINDOWS))])
+    ingestor.submit(None, [(SCAN, _scan(ts + timedelta(minutes=5), IPHONE))])
+    ingestor.submit(None, [(SCAN, _scan(ts, "curl/8.4.0", location="127.0.0.1"))])
+
+    with session_local() as db:
+        daily = _daily(db)
+        assert daily[(ts.date(), "ios", False)] == 2
+        assert daily[(ts.date(), "desktop", False)] == 1
+        assert daily[(ts.date(), "bot", True)] == 1
+        hours = {row.bucket.hour for row in db.query(ScanRollupHourly).all()}
+        assert hours == {14}
+
+
+def test_rebuild_matches_incremental_rollups(session_local):
+    ingestor = ScanIngestor(mode="sync", session_factory=session_local)
+    start = datetime(2026, 3, 1, 8, 0, tzinfo=timezone.utc)
+    events = [(SCAN, _scan(start + timedelta(hours=7 * i), IPHONE if i % 2 else WINDOWS)) for i in range(20)]
+    ingestor.submit(None, events)
+
+    with session_local() as db:
+        incremental = _daily(db)
+        commits = []
+        event.listen(db, "after_commit", lambda _session: commits.append(1))
+        assert rebuild(db, chunk=3) == 20
+        assert _daily(db) == incremental
+    # Löschen + max_id, 7 Chunks, Backfill-Marker – je eigene Transaktion
+    assert len(commits) == 9
+
+
+def test_portable_upsert_adds_to_existing_rows(session_local):
+    ts = datetime(2026, 3, 2, 14, 30, tzinfo=timezone.utc)
+    _, daily = aggregate_scans([_scan(ts, IPHONE), _scan(ts, WINDOWS)])
+    rows = [dict(zip(("qr_id", "bucket", "device_class", "is_test", "is_bot"), key), scans=n)
+            for key, n in daily.items()]
+    with session_local() as db:
+        _update_or_insert(db, DAILY, rows)
+        _update_or_insert(db, DAILY, rows[:1])
+        db.commit()
+        counts = _daily(db)
+    assert sorted(counts.values()) == [1, 2]
+
+
+def test_stats_stay_raw_until_backfill_completes(monkeypatch):
+    monkeypatch.delenv("SCAN_STATS_BACKEND", raising=False)
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (Plan, User, QRCode, QRScan):
+        model.__table__.create(bind=engine, checkfirst=True)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with factory() as db:
+        db.execute(insert(QRScan.__table__), [_scan(datetime(2025, 1, 5, tzinfo=timezone.utc), IPHONE)])
+        db.commit()
+
+    # Deploy auf eine Datenbank mit Historie: Rollups sind leer -> weiter Rohdaten
+    ensure_scan_rollup_tables(engine)
+    with factory() as db:
+        assert isinstance(scan_stats(db), RawScanStats)
+        rebuild(db, since=datetime(2025, 1, 1, tzinfo=timezone.utc))
+        assert isinstance(scan_stats(db), RawScanStats)
+        rebuild(db)
+        assert isinstance(scan_stats(db), RollupScanStats)
+    engine.dispose()
+
+
+def test_dashboard_reads_rollups(session_local):
+    now = datetime.now(timezone.utc)
+    with session_local() as db:
+        rows = [_scan(now - timedelta(minutes=i), IPHONE) for i in range(3)]
+        db.execute(insert(QRScan.__table__), rows)
+        rebuild(db)
+        user = db.query(User).one()
+
+    def override_get_db():
+        db = session_local()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        with TestClient(app) as client:
+            response = client.get("/dashboard/")
+    finally:
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_current_user, None)
+
+    assert response.status_code == 200
+    assert "rollup-slug" in response.text
+    assert "iPhone/iPad" in response.text
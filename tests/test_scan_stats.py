@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from models.coupon_redemption import CouponRedemption
+from models.feedback_entry import FeedbackEntry
+from models.lead_capture import LeadCapture
+from models.plan import Plan
+from models.qr_conversion import QRConversion
+from models.qr_scan import QRScan
+from models.qrcode import QRCode
+from models.user import User
+from utils.scan_ingest import SCAN, ScanIngestor
+from utils.scan_rollups import ensure_scan_rollup_tables
+from utils.scan_stats import RawScanStats, RollupScanStats, funnel_counts, scan_stats
+
+IPHONE = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X)"
+WINDOWS = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+CURL = "curl/8.4.0"
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    for model in (Plan, User, QRCode, QRScan, QRConversion, LeadCapture, FeedbackEntry, CouponRedemption):
+        model.__table__.create(bind=engine, checkfirst=True)
+    ensure_scan_rollup_tables(engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    with factory() as session:
+        user = User(username="stats_owner", email="stats@example.com", password_hash="hash")
+        session.add(user)
+        session.flush()
+        for slug in ("stats-a", "stats-b"):
+            qr = QRCode(user_id=user.id, slug=slug, type="url", title=slug)
+            qr.set_data({"url": "https://example.com"})
+            session.add(qr)
+        session.commit()
+
+        base = datetime(2026, 3, 2, 9, 15, tzinfo=timezone.utc)  # Montag
+        scans = [
+            (1, base, IPHONE, "203.0.113.7"),
+            (1, base + timedelta(minutes=20), IPHONE, "203.0.113.8"),
+            (1, base + timedelta(days=1, hours=5), WINDOWS, "203.0.113.9"),
+            (2, base + timedelta(days=1, hours=5), WINDOWS, "203.0.113.9"),
+            (2, base + timedelta(days=2), CURL, "198.51.100.1"),
+            (2, base + timedelta(days=2), IPHONE, "127.0.0.1"),
+        ]
+        events = [
+            (SCAN, {"qr_id": qid, "device": ua[:50], "location": loc, "user_agent": ua, "timestamp": ts})
+            for qid, ts, ua, loc in scans
+        ]
+        ScanIngestor(mode="sync").submit(session, events)
+        yield session
+    engine.dispose()
+
+
+SINCE = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize("include_test", [False, True])
+def test_raw_and_rollup_backends_agree(db, include_test):
+    raw, rollup = RawScanStats(db), RollupScanStats(db)
+    qr_ids = [1, 2]
+
+    assert raw.total(qr_ids, include_test) == rollup.total(qr_ids, include_test) == (6 if include_test else 4)
+    assert sorted(raw.by_day(qr_ids, include_test, SINCE), key=repr) == sorted(
+        rollup.by_day(qr_ids, include_test, SINCE), key=repr
+    )
+    assert sorted(raw.by_hour(qr_ids, include_test, SINCE), key=repr) == sorted(
+        rollup.by_hour(qr_ids, include_test, SINCE), key=repr
+    )
+    assert raw.by_qr(qr_ids, include_test) == rollup.by_qr(qr_ids, include_test)
+
+
+def test_buckets_carry_device_class_and_hour(db):
+    rows = RawScanStats(db).by_day([1, 2], False, SINCE)
+    by_key = {(row.day.isoformat(), row.device_class, row.qr_id): row.scans for row in rows}
+    assert by_key == {
+        ("2026-03-02", "ios", 1): 2,
+        ("2026-03-03", "desktop", 1): 1,
+        ("2026-03-03", "desktop", 2): 1,
+    }
+
+    hours = RawScanStats(db).by_hour([1], False, SINCE, until=datetime(2026, 3, 3, tzinfo=timezone.utc))
+    assert [(row.hour, row.scans) for row in hours] == [(datetime(2026, 3, 2, 9), 2)]
+    assert hours[0].hour.weekday() == 0
+
+
+def test_empty_qr_list_skips_queries(db):
+    for backend in (RawScanStats(db), RollupScanStats(db)):
+        assert backend.total([], False) == 0
+        assert backend.by_day([], False, SINCE) == []
+        assert backend.by_hour([], False, SINCE) == []
+        assert backend.by_qr([], False) == {}
+
+
+def test_backend_selection(db, monkeypatch):
+    monkeypatch.delenv("SCAN_STATS_BACKEND", raising=False)
+    assert isinstance(scan_stats(db), RollupScanStats)
+    monkeypatch.setenv("SCAN_STATS_BACKEND", "raw")
+    assert isinstance(scan_stats(db), RawScanStats)
+
+
+def test_funnel_counts_in_one_query(db):
+    start = datetime(2026, 3, 1, tzinfo=timezone.utc)
+    inside = datetime(2026, 3, 2, 12, tzinfo=timezone.utc)
+    outside = datetime(2026, 2, 1, tzinfo=timezone.utc)
+    db.add_all([
+        QRConversion(qr_id=1, slug="stats-a", event_type="visit", created_at=inside),
+        QRConversion(qr_id=1, slug="stats-a", event_type="visit", created_at=outside),
+        QRConversion(qr_id=2, slug="stats-b", event_type="click", created_at=inside),
+        LeadCapture(qr_id=1, created_at=inside),
+        FeedbackEntry(qr_id=2, score=5, created_at=inside),
+        CouponRedemption(qr_id=1, code="SAVE10", redeemed_at=inside),
+    ])
+    db.commit()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    try:
+        counts = funnel_counts(db, [1, 2], start, start + timedelta(days=30))
+    finally:
+        event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+    assert counts == {"visits": 1, "conversions": 1, "leads": 1, "feedback": 1, "coupons": 1}
+    assert len(statements) == 1
+    assert funnel_counts(db, [], start, start) == dict.fromkeys(counts, 0)
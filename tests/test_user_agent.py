@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import pytest
+
+from utils.user_agent import classifier_stats, classify_user_agent
+
+IPHONE = "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148"
+ANDROID = "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 Chrome/121.0 Mobile Safari/537.36"
+MAC = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 Version/17.2 Safari/605.1.15"
+WINDOWS = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/121.0 Safari/537.36"
+
+
+@pytest.mark.parametrize(
+    "ua, device_class, os_name, label, device_name",
+    [
+        (IPHONE, "ios", "ios", "iPhone/iPad", "iPhone/iPad"),
+        (ANDROID, "android", "android", "Android", "Android"),
+        (MAC, "desktop", "macos", "Desktop", "Mac"),
+        (WINDOWS, "desktop", "windows", "Desktop", "Windows"),
+        ("", "other", "unknown", "Andere", "Unbekannt"),
+    ],
+)
+def test_device_classes(ua, device_class, os_name, label, device_name):
+    info = classify_user_agent(ua)
+    assert info.device_class == device_class
+    assert info.os == os_name
+    assert info.label == label
+    assert info.device_name == device_name
+
+
+def test_bots_and_test_tools():
+    assert classify_user_agent("Mozilla/5.0 (compatible; Googlebot/2.1)").is_bot
+    assert classify_user_agent("curl/8.4.0").is_test_tool
+    assert classify_user_agent("PostmanRuntime/7.36.1").is_test_tool
+    assert classify_user_agent("curl/8.4.0").label == "Bot/Tool"
+    assert not classify_user_agent(IPHONE).is_test_tool
+
+
+def test_results_are_memoized():
+    before = classifier_stats()["hits"]
+    classify_user_agent(ANDROID)
+    classify_user_agent(ANDROID)
+    assert classifier_stats()["hits"] >= before + 1
@@ -0,0 +1,307 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, fallback: int) -> int:
+    try:
+        return int(os.getenv(name, "") or fallback)
+    except ValueError:
+        return fallback
+
+
+# Schlüssel = Site-Pfad ohne führenden Slash, z. B. blobs/qr/3f/3f9a…e1.png;
+# Templates können ihn wie die bisherigen static/…-Pfade mit "/" davor einbinden.
+KEY_PREFIX = "blobs"
+LEGACY_ROOT = "static"
+_KEY_RE = re.compile(r"^blobs/[a-z0-9_-]+/[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]{1,8}$")
+
+
+def blob_key(data: bytes, namespace: str, ext: str) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    ext = re.sub(r"[^a-z0-9]", "", str(ext or "").lower())[:8] or "bin"
+    return f"{KEY_PREFIX}/{namespace}/{digest[:2]}/{digest}.{ext}"
+
+
+def is_blob_key(value: Optional[str]) -> bool:
+    return bool(value) and bool(_KEY_RE.match(str(value).lstrip("/")))
+
+
+def blob_digest(key: str) -> str:
+    return Path(key).stem
+
+
+def content_type_for(key: str) -> str:
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+
+class LocalBlobBackend:
+    """Blobs unter `root/<key>`; Schreiben atomar über Temp-Datei + rename."""
+
+    def __init__(self, root: str = "storage"):
+        self.root = Path(root)
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).is_file()
+
+    def put(self, key: str, data: bytes) -> None:
+        target = self.path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, target)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            return self.path(key).read_bytes()
+        except OSError:
+            return None
+
+
+class SupabaseBlobBackend:
+    """
+    Supabase-Storage (REST, S3-kompatibler Bucket) über httpx. `client` kann
+    für Tests durch einen Client mit httpx.MockTransport ersetzt werden.
+    """
+
+    def __init__(self, url: str, api_key: str, bucket: str, client: Optional[httpx.Client] = None,
+                 timeout: float = 10.0):
+        self.url = url.rstrip("/")
+        self.bucket = bucket
+        self._client = client or httpx.Client(timeout=timeout)
+        self._headers = {"Authorization": f"Bearer {api_key}", "apikey": api_key}
+
+    def _object_url(self, key: str) -> str:
+        return f"{self.url}/storage/v1/object/{self.bucket}/{key}"
+
+    def exists(self, key: str) -> bool:
+        response = self._client.head(self._object_url(key), headers=self._headers)
+        if response.status_code == 404 or response.status_code == 400:
+            return False
+        response.raise_for_status()
+        return True
+
+    def put(self, key: str, data: bytes) -> None:
+        headers = {
+            **self._headers,
+            "Content-Type": content_type_for(key),
+            "Cache-Control": "max-age=31536000",
+            "x-upsert": "false",
+        }
+        response = self._client.post(self._object_url(key), content=data, headers=headers)
+        # 409 = existiert schon; bei gleichem Schlüssel ist der Inhalt identisch
+        if response.status_code == 409:
+            return
+        response.raise_for_status()
+
+    def get(self, key: str) -> Optional[bytes]:
+        response = self._client.get(self._object_url(key), headers=self._headers)
+        if response.status_code in {400, 404}:
+            return None
+        response.raise_for_status()
+        return response.content
+
+
+class BlobStore:
+    """
+    Inhaltsadressierte Ablage für generierte Assets (QR-Bilder, Logos, PDFs).
+
+    Jeder Blob liegt lokal (Cache bzw. einziger Speicher ohne Remote). Mit
+    Remote-Backend wird er zusätzlich asynchron hochgeladen; andere Knoten
+    holen fehlende Blobs beim ersten Zugriff in ihren lokalen Cache.
+    Gleicher Inhalt = gleicher Schlüssel, doppelte Uploads entfallen.
+    """
+
+    def __init__(self, local: Optional[LocalBlobBackend] = None, remote: Optional[Any] = None,
+                 upload_workers: int = 4, upload_retries: int = 3):
+        self.local = local or LocalBlobBackend()
+        self.remote = remote
+        self.upload_retries = max(1, int(upload_retries))
+        self._upload_workers = max(1, int(upload_workers))
+        self._uploader: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._known_remote: set = set()
+        self._pending: Dict[str, Future] = {}
+        self.writes = 0
+        self.deduped = 0
+        self.uploads = 0
+        self.upload_skipped = 0
+        self.upload_failures = 0
+        self.fetches = 0
+
+    # ------------------------------------------------------------------
+    # Schreiben
+    # ------------------------------------------------------------------
+    def put(self, data: bytes, namespace: str, ext: str) -> str:
+        """Speichert `data` und gibt den Schlüssel zurück (blobs/<namespace>/…)."""
+        key = blob_key(data, namespace, ext)
+        if self.local.exists(key):
+            with self._lock:
+                self.deduped += 1
+        else:
+            self.local.put(key, data)
+            with self._lock:
+                self.writes += 1
+        if self.remote is not None:
+            self._schedule_upload(key)
+        return key
+
+    def _schedule_upload(self, key: str) -> None:
+        with self._lock:
+            if key in self._known_remote or key in self._pending:
+                return
+            if self._uploader is None:
+                self._uploader = ThreadPoolExecutor(max_workers=self._upload_workers, thread_name_prefix="blob-upload")
+            self._pending[key] = self._uploader.submit(self._upload, key)
+
+    def _upload(self, key: str) -> None:
+        try:
+            for attempt in range(self.upload_retries):
+                try:
+                    if self.remote.exists(key):
+                        with self._lock:
+                            self.upload_skipped += 1
+                    else:
+                        data = self.local.get(key)
+                        if data is None:
+                            return
+                        self.remote.put(key, data)
+                        with self._lock:
+                            self.uploads += 1
+                    with self._lock:
+                        self._known_remote.add(key)
+                    return
+                except Exception as exc:
+                    if attempt + 1 >= self.upload_retries:
+                        logger.warning("Blob-Upload %s fehlgeschlagen: %s", key, exc)
+                        with self._lock:
+                            self.upload_failures += 1
+                        return
+                    time.sleep(0.2 * (2 ** attempt))
+        finally:
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Wartet auf laufende Uploads (Shutdown, Tests, Skripte)."""
+        with self._lock:
+            pending = list(self._pending.values())
+        for future in pending:
+            future.result(timeout=timeout)
+
+    # ------------------------------------------------------------------
+    # Lesen
+    # ------------------------------------------------------------------
+    def local_path(self, value: Optional[str]) -> Optional[str]:
+        """
+        Dateipfad für einen Schlüssel oder einen Altpfad unter static/;
+        fehlt ein Blob lokal, wird er vom Remote-Backend nachgeladen.
+        None, wenn nichts gefunden wird.
+        """
+        if not value:
+            return None
+        value = str(value)
+        if not is_blob_key(value):
+            # Altpfade nur innerhalb von static/ (Werte können aus Formularen stammen)
+            candidate = os.path.normpath(value.lstrip("/"))
+            if not candidate.startswith(LEGACY_ROOT + os.sep) or not os.path.isfile(candidate):
+                return None
+            return candidate
+        key = value.lstrip("/")
+        if self.local.exists(key):
+            return str(self.local.path(key))
+        if self.remote is None:
+            return None
+        try:
+            data = self.remote.get(key)
+        except Exception as exc:
+            logger.warning("Blob-Download %s fehlgeschlagen: %s", key, exc)
+            return None
+        if data is None or blob_key(data, key.split("/")[1], Path(key).suffix) != key:
+            return None
+        self.local.put(key, data)
+        with self._lock:
+            self.fetches += 1
+            self._known_remote.add(key)
+        return str(self.local.path(key))
+
+    def read(self, value: Optional[str]) -> Optional[bytes]:
+        path = self.local_path(value)
+        if path is None:
+            return None
+        try:
+            return Path(path).read_bytes()
+        except OSError:
+            return None
+
+    @staticmethod
+    def url(value: Optional[str]) -> str:
+        """Site-relative URL für Schlüssel und Altpfade."""
+        if not value:
+            return ""
+        value = str(value)
+        return value if value.startswith(("/", "http://", "https://", "data:")) else f"/{value}"
+
+    # ------------------------------------------------------------------
+    def shutdown(self, timeout: Optional[float] = 10.0) -> None:
+        try:
+            self.flush(timeout=timeout)
+        except Exception as exc:
+            logger.warning("Blob-Uploads beim Beenden nicht abgeschlossen: %s", exc)
+        with self._lock:
+            uploader, self._uploader = self._uploader, None
+        if uploader is not None:
+            uploader.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "local" if self.remote is None else type(self.remote).__name__,
+                "local_root": str(self.local.root),
+                "writes": self.writes,
+                "deduped": self.deduped,
+                "uploads": self.uploads,
+                "upload_skipped": self.upload_skipped,
+                "upload_failures": self.upload_failures,
+                "uploads_pending": len(self._pending),
+                "fetches": self.fetches,
+            }
+
+
+def _build_blob_store() -> BlobStore:
+    local = LocalBlobBackend(os.getenv("BLOB_LOCAL_ROOT", "storage"))
+    remote = None
+    backend = os.getenv("BLOB_BACKEND", "local").strip().lower()
+    if backend == "supabase":
+        url, api_key = os.getenv("SUPABASE_URL", ""), os.getenv("SUPABASE_KEY", "")
+        if url and api_key:
+            remote = SupabaseBlobBackend(url, api_key, os.getenv("BLOB_BUCKET", "qr-assets"))
+        else:
+            print("⚠️ BLOB_BACKEND=supabase, aber SUPABASE_URL/SUPABASE_KEY fehlen – nur lokale Ablage.")
+    return BlobStore(local=local, remote=remote, upload_workers=_env_int("BLOB_UPLOAD_WORKERS", 4))
+
+
+blob_store = _build_blob_store()
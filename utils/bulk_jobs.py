@@ -0,0 +1,495 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import Table
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models.bulk_job import QRBulkJob
+from models.qrcode import QRCode
+from utils.qr_image import qr_image_path, stored_render_params
+from utils.render_cache import RESULT_KEYS, render_cache, render_key
+from utils.render_pool import RenderPool
+from utils.schema_cache import mark_table_ready
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, fallback: int) -> int:
+    try:
+        return int(os.getenv(name, "") or fallback)
+    except ValueError:
+        return fallback
+
+
+BULK_DIR = Path(os.getenv("BULK_JOB_DIR", "cache/bulk_jobs"))
+BULK_MAX_ROWS = _env_int("BULK_MAX_ROWS", 50000)
+BULK_BATCH_SIZE = max(1, _env_int("BULK_BATCH_SIZE", 500))
+# Exportverzeichnisse fertiger Jobs werden danach gelöscht (Job -> expired)
+BULK_RETENTION_HOURS = max(0, _env_int("BULK_RETENTION_HOURS", 24))
+BULK_FORMATS = ("png", "webp", "svg", "pdf")
+
+MANIFEST_NAME = "manifest.csv"
+MANIFEST_FIELDS = ["row", "slug", "type", "title", "dynamic_url", "status", "error", "files", "png_encoder"]
+
+# Bereits komprimierte Formate werden im ZIP nur gespeichert
+_STORED_FORMATS = {"png", "webp", "pdf"}
+_ZIP_CHUNK = 64 * 1024
+
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class BulkInputError(ValueError):
+    """Upload nicht lesbar, leer oder über BULK_MAX_ROWS."""
+
+
+class BulkJobInterrupted(RuntimeError):
+    """Runner wird beendet, während ein Job noch läuft."""
+
+
+def ensure_bulk_job_table(engine: Engine) -> None:
+    """Erstellt die Tabelle qr_bulk_jobs idempotent."""
+    try:
+        table: Table = QRBulkJob.__table__
+        table.create(bind=engine, checkfirst=True)
+        mark_table_ready(engine, table.name)
+        print("✅ Bulk-Job-Tabelle geprüft/ergänzt.")
+    except Exception as exc:
+        print(f"⚠️ Konnte Bulk-Job-Tabelle nicht automatisch erstellen: {exc}")
+
+
+def recover_bulk_jobs(engine: Engine) -> None:
+    """
+    Beim Start: Jobs leben nur in der Warteschlange des Prozesses, noch
+    offene Jobs eines früheren Laufs werden nie fertig -> failed. Danach
+    werden abgelaufene Exportverzeichnisse aufgeräumt.
+    """
+    try:
+        with Session(bind=engine) as db:
+            orphaned = fail_jobs(db, "interrupted by restart")
+            removed = cleanup_job_dirs(db)
+        if orphaned or removed:
+            print(f"✅ Bulk-Jobs: {orphaned} verwaiste Jobs beendet, {removed} Exportverzeichnisse gelöscht.")
+    except Exception as exc:
+        print(f"⚠️ Konnte Bulk-Jobs nicht aufräumen: {exc}")
+
+
+# ----------------------------------------------------------------------
+# Eingabe
+# ----------------------------------------------------------------------
+def parse_formats(value: Optional[str]) -> Tuple[str, ...]:
+    """'png,svg' -> ('png', 'svg'); PNG ist immer dabei (wärmt das Bild hinter image_path vor)."""
+    wanted = {part.strip().lower() for part in str(value or "png").split(",") if part.strip()}
+    unknown = wanted - set(BULK_FORMATS)
+    if unknown:
+        raise BulkInputError(f"Unsupported formats: {', '.join(sorted(unknown))}")
+    wanted.add("png")
+    return tuple(fmt for fmt in BULK_FORMATS if fmt in wanted)
+
+
+def _row_from_mapping(raw: Dict[str, Any]) -> Dict[str, Any]:
+    data = raw.get("data")
+    row: Dict[str, Any] = {
+        "type": str(raw.get("type") or "").strip().lower(),
+        "title": str(raw.get("title") or "").strip(),
+        "style": str(raw.get("style") or "").strip() or "modern",
+        "data": {},
+    }
+    if isinstance(data, str) and data.strip():
+        try:
+            data = json.loads(data)
+        except ValueError:
+            row["error"] = "data is not valid JSON"
+            return row
+    if data not in (None, "") and not isinstance(data, dict):
+        row["error"] = "data must be an object"
+        return row
+    row["data"] = dict(data or {})
+    # CSV: weitere Spalten (url, phone, ...) landen direkt in data
+    for key, value in raw.items():
+        if key and key not in {"type", "title", "style", "data"} and value not in (None, ""):
+            row["data"].setdefault(str(key).strip(), value)
+    return row
+
+
+def parse_rows(raw: bytes, filename: str = "", max_rows: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    CSV (Kopfzeile type,title,style,data + beliebige Datenspalten) oder NDJSON
+    (ein Objekt pro Zeile) -> Zeilen {'type', 'title', 'style', 'data'}.
+    Fehlerhafte Zeilen bleiben mit 'error' erhalten und landen im Manifest.
+    """
+    limit = BULK_MAX_ROWS if max_rows is None else max_rows
+    try:
+        text = raw.decode("utf-8-sig")
+    except UnicodeDecodeError as exc:
+        raise BulkInputError("Upload must be UTF-8") from exc
+
+    name = (filename or "").lower()
+    is_ndjson = name.endswith((".ndjson", ".jsonl")) or text.lstrip().startswith("{")
+    rows: List[Dict[str, Any]] = []
+    if is_ndjson:
+        for line in text.splitlines():
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                item = None
+            rows.append(_row_from_mapping(item) if isinstance(item, dict) else {
+                "type": "", "title": "", "style": "modern", "data": {}, "error": "invalid JSON line",
+            })
+            if len(rows) > limit:
+                break
+    else:
+        for item in csv.DictReader(io.StringIO(text)):
+            rows.append(_row_from_mapping(item))
+            if len(rows) > limit:
+                break
+
+    if not rows:
+        raise BulkInputError("Upload contains no rows")
+    if len(rows) > limit:
+        raise BulkInputError(f"Too many rows (max {limit})")
+    return rows
+
+
+# ----------------------------------------------------------------------
+# Ausführung
+# ----------------------------------------------------------------------
+def job_dir(job_id: str) -> Path:
+    return BULK_DIR / job_id
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def fail_jobs(db: Session, reason: str, job_ids: Optional[List[str]] = None) -> int:
+    """Setzt offene Jobs (queued/running; optional nur `job_ids`) auf failed."""
+    query = db.query(QRBulkJob).filter(QRBulkJob.status.in_(ACTIVE_STATUSES))
+    if job_ids is not None:
+        if not job_ids:
+            return 0
+        query = query.filter(QRBulkJob.id.in_(job_ids))
+    now = _utcnow()
+    count = query.update(
+        {"status": "failed", "error": reason, "finished_at": now, "updated_at": now},
+        synchronize_session=False,
+    )
+    db.commit()
+    return count
+
+
+def cleanup_job_dirs(db: Session, retention_hours: Optional[int] = None, now: Optional[datetime] = None) -> int:
+    """
+    Löscht Exportverzeichnisse unter BULK_DIR: von fertigen Jobs nach der
+    Aufbewahrungszeit (Job -> expired), von fehlgeschlagenen sofort und
+    solche ohne Job-Zeile. Verzeichnisse offener Jobs bleiben unangetastet.
+    """
+    hours = BULK_RETENTION_HOURS if retention_hours is None else retention_hours
+    cutoff = (now or _utcnow()) - timedelta(hours=hours)
+    expired = db.query(QRBulkJob).filter(QRBulkJob.status == "done", QRBulkJob.finished_at < cutoff).all()
+    for job in expired:
+        job.status = "expired"
+    db.commit()
+
+    if not BULK_DIR.is_dir():
+        return 0
+    names = [path.name for path in BULK_DIR.iterdir() if path.is_dir()]
+    keep = {
+        job_id for (job_id,) in db.query(QRBulkJob.id).filter(
+            QRBulkJob.id.in_(names), QRBulkJob.status.in_(ACTIVE_STATUSES + ("done",))
+        )
+    } if names else set()
+    removed = 0
+    for name in names:
+        if name not in keep:
+            shutil.rmtree(BULK_DIR / name, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+class BulkJobRunner:
+    """
+    Führt Bulk-Jobs im Hintergrund aus: pro Batch (BULK_BATCH_SIZE Zeilen)
+    paralleles Rendern im eigenen Render-Pool (alle Kerne), danach eine
+    Transaktion für QRCode-Zeilen und Fortschritt. Die Exportdateien gehen
+    ins Job-Verzeichnis und wärmen den Render-Cache für /qr/img vor.
+    """
+
+    def __init__(self, mode: str = "process", workers: int = 0, batch_size: int = BULK_BATCH_SIZE,
+                 max_parallel_jobs: int = 1, session_factory: Optional[Callable[[], Session]] = None):
+        self.pool = RenderPool(mode=mode, workers=workers)
+        self.batch_size = max(1, int(batch_size))
+        self._session_factory = session_factory
+        self._jobs = ThreadPoolExecutor(max_workers=max(1, int(max_parallel_jobs)), thread_name_prefix="qr-bulk")
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._queued: set = set()
+        self.started = 0
+        self.finished = 0
+        self.failed = 0
+        self.rows_rendered = 0
+
+    def _new_session(self) -> Session:
+        if self._session_factory is None:
+            from database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    def submit(self, job_id: str, rows: List[Dict[str, Any]], url_prefix: str):
+        """Stellt einen bereits angelegten Job (Status queued) in die Warteschlange."""
+        with self._lock:
+            self._queued.add(job_id)
+        return self._jobs.submit(self.run, job_id, rows, url_prefix)
+
+    def _validate(self, row: Dict[str, Any]) -> Optional[str]:
+        if row.get("error"):
+            return str(row["error"])
+        if not row.get("type"):
+            return "missing type"
+        return None
+
+    def run(self, job_id: str, rows: List[Dict[str, Any]], url_prefix: str) -> None:
+        with self._lock:
+            self._queued.discard(job_id)
+            self.started += 1
+        db = self._new_session()
+        try:
+            job = db.get(QRBulkJob, job_id)
+            if job is None:
+                return
+            job.status = "running"
+            job.updated_at = _utcnow()
+            db.commit()
+
+            formats = tuple(job.formats.split(","))
+            files_dir = job_dir(job_id) / "files"
+            files_dir.mkdir(parents=True, exist_ok=True)
+
+            with open(job_dir(job_id) / MANIFEST_NAME, "w", newline="", encoding="utf-8") as fh:
+                manifest = csv.DictWriter(fh, fieldnames=MANIFEST_FIELDS)
+                manifest.writeheader()
+                for start in range(0, len(rows), self.batch_size):
+                    if self._stopping.is_set():
+                        raise BulkJobInterrupted("interrupted by shutdown")
+                    self._run_batch(db, job, rows[start:start + self.batch_size], start, url_prefix,
+                                    formats, files_dir, manifest)
+                    fh.flush()
+
+            job.status = "done"
+            job.finished_at = job.updated_at = _utcnow()
+            db.commit()
+            with self._lock:
+                self.finished += 1
+        except Exception as exc:
+            logger.exception("Bulk-Job %s fehlgeschlagen", job_id)
+            db.rollback()
+            job = db.get(QRBulkJob, job_id)
+            if job is not None:
+                job.status = "failed"
+                job.error = str(exc)[:500]
+                job.finished_at = job.updated_at = _utcnow()
+                db.commit()
+            with self._lock:
+                self.failed += 1
+        finally:
+            try:
+                cleanup_job_dirs(db)
+            except Exception:
+                logger.exception("Aufräumen der Bulk-Exporte fehlgeschlagen")
+            db.close()
+
+    def _run_batch(self, db: Session, job: QRBulkJob, batch: List[Dict[str, Any]], offset: int,
+                   url_prefix: str, formats: Tuple[str, ...], files_dir: Path,
+                   manifest: csv.DictWriter) -> None:
+        pending: List[Dict[str, Any]] = []
+        failed = 0
+        for index, row in enumerate(batch, start=offset + 1):
+            error = self._validate(row)
+            if error:
+                failed += 1
+                manifest.writerow({"row": index, "type": row.get("type", ""), "title": row.get("title", ""),
+                                   "status": "invalid", "error": error})
+                continue
+            slug = uuid.uuid4().hex[:10]
+            entry = {
+                "row": index,
+                "slug": slug,
+                "type": row["type"],
+                "title": row["title"] or f"{row['type'].upper()} QR",
+                "dynamic_url": f"{url_prefix}{slug}",
+            }
+            qr = QRCode(
+                user_id=job.user_id,
+                style=row["style"],
+                active=True,
+                **{key: entry[key] for key in ("slug", "type", "title", "dynamic_url")},
+            )
+            qr.set_data(row["data"])
+            # gleiche Parameter wie /qr/img/<slug>.png -> Export und Bild-URL zeigen dasselbe
+            params = stored_render_params(qr)
+            qr.image_path = qr_image_path(qr, params=params)
+            pending.append({"entry": entry, "qr": qr, "params": params})
+
+        futures = {self.pool.submit({**item["params"], "formats": formats}): item for item in pending}
+        rendered = 0
+        for future in as_completed(futures):
+            item = futures[future]
+            entry, slug = item["entry"], item["entry"]["slug"]
+            try:
+                _, _, result = future.result()
+                for fmt in formats:
+                    data = result[RESULT_KEYS[fmt]]
+                    (files_dir / f"{slug}.{fmt}").write_bytes(data)
+                    render_cache.put(render_key(fmt, item["params"]), data)
+            except Exception as exc:
+                failed += 1
+                manifest.writerow({**entry, "status": "render_failed", "error": str(exc)[:200]})
+                continue
+            rendered += 1
+            manifest.writerow({**entry, "status": "ok", "files": ";".join(f"{fmt}/{slug}.{fmt}" for fmt in formats),
+                               "png_encoder": result["encoding"].get("png_encoder") or ""})
+
+        # eine Transaktion pro Batch: QR-Zeilen zusammen mit dem Fortschritt;
+        # ohne Exportdatei bleibt der QR-Code gültig, sein Bild entsteht beim ersten Abruf
+        qrs = [item["qr"] for item in pending]
+        db.add_all(qrs)
+        job.created_count += len(qrs)
+        job.rendered_count += rendered
+        job.failed_count += failed
+        job.updated_at = _utcnow()
+        db.commit()
+        with self._lock:
+            self.rows_rendered += rendered
+
+    def shutdown(self) -> None:
+        """
+        Laufende Jobs brechen nach dem aktuellen Batch ab (-> failed);
+        noch wartende werden verworfen und ebenfalls als failed markiert,
+        damit pollende Clients einen Endzustand sehen.
+        """
+        self._stopping.set()
+        self._jobs.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            queued, self._queued = list(self._queued), set()
+        if queued:
+            db = self._new_session()
+            try:
+                fail_jobs(db, "cancelled by shutdown", queued)
+            except Exception:
+                logger.exception("Wartende Bulk-Jobs konnten nicht beendet werden")
+            finally:
+                db.close()
+        self.pool.shutdown()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "started": self.started,
+                "finished": self.finished,
+                "failed": self.failed,
+                "rows_rendered": self.rows_rendered,
+                "batch_size": self.batch_size,
+                "render_pool": self.pool.stats(),
+            }
+
+
+def serialize_job(job: QRBulkJob) -> Dict[str, Any]:
+    processed = job.rendered_count + job.failed_count
+    return {
+        "id": job.id,
+        "status": job.status,
+        "formats": job.formats.split(","),
+        "total": job.total,
+        "created": job.created_count,
+        "rendered": job.rendered_count,
+        "failed": job.failed_count,
+        "progress": round(processed / job.total, 4) if job.total else 1.0,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+
+# ----------------------------------------------------------------------
+# ZIP-Streaming
+# ----------------------------------------------------------------------
+class _ZipSink(io.RawIOBase):
+    """Nicht-seekbares Ziel für zipfile: sammelt geschriebene Bytes bis zum nächsten drain()."""
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _zip_entries(directory: Path) -> Iterator[Tuple[str, Path]]:
+    yield MANIFEST_NAME, directory / MANIFEST_NAME
+    files = directory / "files"
+    if files.is_dir():
+        for path in sorted(files.iterdir()):
+            ext = path.suffix.lstrip(".")
+            yield f"{ext}/{path.name}", path
+
+
+def iter_job_archive(job_id: str) -> Iterator[bytes]:
+    """
+    ZIP eines fertigen Jobs als Byte-Chunks: Dateien werden blockweise von der
+    Platte gelesen und sofort weitergereicht, das Archiv liegt nie komplett im
+    Speicher. PNG/PDF werden gespeichert (bereits komprimiert), SVG und
+    Manifest mit Deflate.
+    """
+    directory = job_dir(job_id)
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, mode="w") as zf:
+        for name, path in _zip_entries(directory):
+            if not path.is_file():
+                continue
+            info = zipfile.ZipInfo(name, date_time=time.localtime(path.stat().st_mtime)[:6])
+            ext = name.rsplit(".", 1)[-1]
+            info.compress_type = zipfile.ZIP_STORED if ext in _STORED_FORMATS else zipfile.ZIP_DEFLATED
+            with open(path, "rb") as src, zf.open(info, mode="w") as dst:
+                for chunk in iter(lambda: src.read(_ZIP_CHUNK), b""):
+                    dst.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    data = sink.drain()
+    if data:
+        yield data
+
+
+bulk_runner = BulkJobRunner(
+    mode=os.getenv("BULK_RENDER_MODE", "process").strip().lower() or "process",
+    workers=_env_int("BULK_RENDER_WORKERS", 0),
+    max_parallel_jobs=_env_int("BULK_MAX_PARALLEL_JOBS", 1),
+)
@@ -0,0 +1,125 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+
+@dataclass(frozen=True)
+class DownloadArtifact:
+    """Fertig gebaute Download-Datei (vCard/ICS) im Speicher."""
+
+    body: bytes
+    media_type: str
+    filename: str
+    etag: str
+
+
+def content_version(blob: Optional[str]) -> str:
+    """Kurzer Versions-Token aus dem gespeicherten (verschlüsselten) Inhalt."""
+    return hashlib.sha256((blob or "").encode("utf-8")).hexdigest()[:16]
+
+
+def build_artifact(text: str, media_type: str, filename: str) -> DownloadArtifact:
+    body = text.encode("utf-8")
+    etag = '"' + hashlib.sha256(body).hexdigest() + '"'
+    return DownloadArtifact(body=body, media_type=media_type, filename=filename, etag=etag)
+
+
+ArtifactKey = Tuple[str, str, str]  # (Art, Slug, Inhaltsversion)
+
+
+class ArtifactCache:
+    """LRU-Cache (Art, Slug, Version) -> DownloadArtifact; neue Version = neuer Schlüssel."""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[ArtifactKey, DownloadArtifact]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def get_or_build(
+        self, key: ArtifactKey, build: Callable[[], Optional[DownloadArtifact]]
+    ) -> Optional[DownloadArtifact]:
+        with self._lock:
+            artifact = self._entries.get(key)
+            if artifact is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return artifact
+            self.misses += 1
+
+        artifact = build()
+        if artifact is None:
+            return None
+        with self._lock:
+            self._entries[key] = artifact
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return artifact
+
+    def note_not_modified(self) -> None:
+        with self._lock:
+            self.not_modified += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "not_modified": self.not_modified,
+            }
+
+
+def _env_int(name: str, fallback: int) -> int:
+    try:
+        return int(os.getenv(name, "") or fallback)
+    except ValueError:
+        return fallback
+
+
+artifact_cache = ArtifactCache(max_entries=_env_int("ARTIFACT_CACHE_SIZE", 1000))
+ARTIFACT_MAX_AGE = _env_int("ARTIFACT_MAX_AGE", 60)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        # If-None-Match vergleicht schwach (RFC 9110), W/ also ignorieren
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def artifact_response(request: Request, artifact: DownloadArtifact) -> Response:
+    """200 mit Datei oder 304, wenn der Client die Version bereits hat."""
+    headers = {
+        "ETag": artifact.etag,
+        "Cache-Control": f"private, max-age={ARTIFACT_MAX_AGE}, must-revalidate",
+    }
+    if _etag_matches(request.headers.get("if-none-match", ""), artifact.etag):
+        artifact_cache.note_not_modified()
+        return Response(status_code=304, headers=headers)
+    headers["Content-Disposition"] = f'attachment; filename="{artifact.filename}"'
+    return Response(content=artifact.body, media_type=artifact.media_type, headers=headers)
@@ -7,6 +7,7 @@ from __future__ import annotations
 import os
 import base64
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.backends import default_backend
@@ -55,6 +56,30 @@ def derive_key(password: str, salt: bytes) -> bytes:
     return kdf.derive(password.encode())
 
 
+# Format v2: "v2:" + base64(iv || ciphertext || tag)
+# Der Inhaltsschlüssel wird EINMAL per HKDF aus dem Master-Key abgeleitet,
+# statt pro Datensatz PBKDF2 (480.000 Iterationen) laufen zu lassen.
+# v1 (ohne Präfix): base64(salt || iv || ciphertext || tag), PBKDF2 pro Datensatz.
+V2_PREFIX = "v2:"
+_V2_INFO = b"ouhud-qr/content-encryption/v2"
+
+
+def derive_content_key(master_key: bytes) -> bytes:
+    """Leitet den v2-Inhaltsschlüssel (AES-256) per HKDF-SHA256 ab."""
+    hkdf = HKDF(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=None,
+        info=_V2_INFO,
+    )
+    return hkdf.derive(master_key)
+
+
+def is_legacy_ciphertext(encrypted_data: Optional[str]) -> bool:
+    """True für v1-Blobs, die beim Lesen auf v2 umgeschrieben werden sollten."""
+    return bool(encrypted_data) and not str(encrypted_data).startswith(V2_PREFIX)
+
+
 # =============================================================================
 # 🔐 AES-256-GCM Encryption/Decryption
 # =============================================================================
@@ -62,51 +87,69 @@ def derive_key(password: str, salt: bytes) -> bytes:
 class QRContentEncryption:
     """
     Verschlüsselt und entschlüsselt QR-Inhalte mit AES-256-GCM.
-    Jeder QR-Code erhält seinen eigenen zufälligen Salt und IV.
+    Jeder Datensatz erhält einen eigenen zufälligen IV; der Schlüssel (v2)
+    wird einmal pro Prozess abgeleitet. v1-Blobs bleiben lesbar.
     """
     
     def __init__(self):
         self._key = get_encryption_key()
+        self._v2_aead = AESGCM(derive_content_key(self._key))
     
     def encrypt(self, data: Dict[str, Any]) -> str:
         """
-        Verschlüsselt ein Dictionary zu einem Base64-String.
-        Format: base64(salt || iv || ciphertext || tag)
+        Verschlüsselt ein Dictionary zu einem v2-String.
+        Format: "v2:" + base64(iv || ciphertext || tag)
         """
         if not data:
             return ""
         
-        # Salt für Key-Derivation (pro QR-Code eindeutig)
-        salt = os.urandom(16)
-        
-        # IV für AES-GCM
+        # IV für AES-GCM (pro Datensatz eindeutig)
         iv = os.urandom(12)
         
-        # Key ableiten
-        derived_key = derive_key(self._key.hex(), salt)
-        
-        # AES-GCM Cipher erstellen
-        aesgcm = AESGCM(derived_key)
-        
         # JSON serialisieren
         import json
         plaintext = json.dumps(data, ensure_ascii=False).encode('utf-8')
         
-        # Verschlüsseln
-        ciphertext = aesgcm.encrypt(iv, plaintext, None)
-        
-        # Zusammenfügen: salt + iv + ciphertext
-        combined = salt + iv + ciphertext
+        # Verschlüsseln (Präfix als AAD gebunden)
+        ciphertext = self._v2_aead.encrypt(iv, plaintext, V2_PREFIX.encode('ascii'))
         
-        return base64.b64encode(combined).decode('ascii')
+        return V2_PREFIX + base64.b64encode(iv + ciphertext).decode('ascii')
     
     def decrypt(self, encrypted_data: str) -> Optional[Dict[str, Any]]:
         """
-        Entschlüsselt einen Base64-String zurück zu einem Dictionary.
+        Entschlüsselt einen v2- oder v1-String zurück zu einem Dictionary.
         """
         if not encrypted_data:
             return None
         
+        if encrypted_data.startswith(V2_PREFIX):
+            return self._decrypt_v2(encrypted_data)
+        return self._decrypt_v1(encrypted_data)
+    
+    def _encrypt_v1(self, data: Dict[str, Any]) -> str:
+        """Legacy-Format v1 (nur für Kompatibilitätstests und Benchmarks)."""
+        import json
+        salt = os.urandom(16)
+        iv = os.urandom(12)
+        aesgcm = AESGCM(derive_key(self._key.hex(), salt))
+        plaintext = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        return base64.b64encode(salt + iv + aesgcm.encrypt(iv, plaintext, None)).decode('ascii')
+    
+    def _decrypt_v2(self, encrypted_data: str) -> Optional[Dict[str, Any]]:
+        try:
+            combined = base64.b64decode(encrypted_data[len(V2_PREFIX):].encode('ascii'))
+            iv = combined[:12]
+            ciphertext = combined[12:]
+            plaintext = self._v2_aead.decrypt(iv, ciphertext, V2_PREFIX.encode('ascii'))
+            import json
+            return json.loads(plaintext.decode('utf-8'))
+        except Exception as e:
+            if os.getenv("DEBUG_ENCRYPTION") == "1":
+                print(f"❌ Decryption (v2) failed: {e}")
+            return None
+    
+    def _decrypt_v1(self, encrypted_data: str) -> Optional[Dict[str, Any]]:
+        """Legacy-Format: PBKDF2 pro Datensatz (teuer, nur noch lesend)."""
         try:
             # Base64 dekodieren
             combined = base64.b64decode(encrypted_data.encode('ascii'))
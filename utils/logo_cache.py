@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, fallback: int) -> int:
+    try:
+        return int(os.getenv(name, "") or fallback)
+    except ValueError:
+        return fallback
+
+
+def logo_geometry(size: int, logo_scale: int) -> Tuple[int, int]:
+    """
+    (Logo-Kante, Plakettenrand) in Pixeln, proportional zur Bildgröße. Ohne
+    Mindestmaß: sonst verdeckte das Logo in Vorschaubildern und kleinen
+    ?size=-Stufen einen größeren Anteil des Symbols als im vollen Bild.
+    """
+    scale = max(8, min(int(logo_scale or 20), 20))
+    logo_size = max(1, int(size * (scale / 100)))
+    return logo_size, max(1, logo_size // 9)
+
+
+@lru_cache(maxsize=1024)
+def _digest_file(path: str, mtime_ns: int, size: int) -> str:
+    sha = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(65536), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def file_content_hash(path: Optional[str]) -> str:
+    """sha256 des Dateiinhalts (gemerkt pro Pfad/mtime/Größe); '' ohne Datei."""
+    if not path:
+        return ""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return ""
+    return _digest_file(os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def _image_bytes(img: Image.Image) -> int:
+    return img.width * img.height * len(img.getbands())
+
+
+class LogoCache:
+    """
+    Dekodierte Logos (RGBA) und fertig skalierte Varianten im Speicher,
+    begrenzt auf `max_bytes` (LRU). Schlüssel ist der Dateiinhalt (sha256,
+    gemerkt pro Pfad/mtime/Größe) – gleiche Logos unter anderem Pfad teilen
+    sich die Einträge, geänderte Dateien treffen nie einen alten Eintrag.
+    Zurückgegebene Bilder sind geteilt und dürfen nicht verändert werden.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max(0, int(max_bytes))
+        self._entries: "OrderedDict[Hashable, Tuple[Image.Image, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes_in_use = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _get(self, key: Hashable) -> Optional[Image.Image]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _put(self, key: Hashable, img: Image.Image) -> Image.Image:
+        size = _image_bytes(img)
+        if size > self.max_bytes:
+            return img
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes_in_use -= previous[1]
+            self._entries[key] = (img, size)
+            self.bytes_in_use += size
+            while self._entries and self.bytes_in_use > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes_in_use -= evicted
+                self.evictions += 1
+        return img
+
+    def decoded(self, path: Optional[str]) -> Optional[Image.Image]:
+        """Logo als RGBA; None, wenn die Datei fehlt oder nicht lesbar ist."""
+        digest = file_content_hash(path)
+        if not digest:
+            return None
+        key = ("rgba", digest)
+        img = self._get(key)
+        if img is not None:
+            return img
+        try:
+            img = Image.open(path).convert("RGBA")
+        except Exception as exc:
+            logger.warning("Logo load failed: %s", exc)
+            return None
+        return self._put(key, img)
+
+    def resized(self, path: Optional[str], size: Tuple[int, int], alpha: Optional[int] = None) -> Optional[Image.Image]:
+        """LANCZOS-skalierte Variante; `alpha` setzt eine feste Deckkraft (Hintergrund-Logo)."""
+        digest = file_content_hash(path)
+        if not digest:
+            return None
+        key = ("resized", digest, tuple(size), alpha)
+        img = self._get(key)
+        if img is not None:
+            return img
+        source = self.decoded(path)
+        if source is None:
+            return None
+        img = source.resize(tuple(size), Image.Resampling.LANCZOS)
+        if alpha is not None:
+            img.putalpha(alpha)
+        return self._put(key, img)
+
+    def plate(self, logo_size: int) -> Image.Image:
+        """Weiße, abgerundete Plakette hinter dem Logo (auto-white/blur), pro Logo-Größe."""
+        key = ("plate", int(logo_size))
+        img = self._get(key)
+        if img is not None:
+            return img
+        plate_pad = max(1, logo_size // 9)
+        side = logo_size + 2 * plate_pad
+        img = Image.new("RGBA", (side, side), (0, 0, 0, 0))
+        ImageDraw.Draw(img).rounded_rectangle(
+            [0, 0, side - 1, side - 1],
+            radius=max(1, logo_size // 5),
+            fill=(255, 255, 255, 235),
+            outline=(0, 0, 0, 28),
+            width=1,
+        )
+        return self._put(key, img)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes_in_use = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes_in_use": self.bytes_in_use,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+logo_cache = LogoCache(max_bytes=_env_int("LOGO_CACHE_MAX_MB", 64) * 1024 * 1024)
@@ -6,26 +6,41 @@
 
 from __future__ import annotations
 
-from io import BytesIO
 from pathlib import Path
-from typing import Dict, Optional, Tuple, Union
+from typing import Dict, Iterable, Optional, Tuple, Union
 import logging
 import os
-import time
 
 import qrcode
 import qrcode.image.styledpil
-import qrcode.image.styles.colormasks as mask
 import qrcode.image.styles.moduledrawers as mod
-from qrcode.constants import ERROR_CORRECT_H
+from qrcode.constants import ERROR_CORRECT_H, ERROR_CORRECT_L, ERROR_CORRECT_M, ERROR_CORRECT_Q
 from PIL import Image, ImageColor, ImageDraw, ImageFilter, ImageFont, ImageOps
 
+from utils.blob_storage import blob_store
+from utils.logo_cache import logo_cache, logo_geometry
+from utils.qr_pdf import render_pdf
+from utils.qr_png import encode_png, encode_webp
+from utils.qr_raster import rasterize_gradient, rasterize_modules
+from utils.qr_svg import gzip_svg, module_layer
+
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 DEFAULT_FG = "#0D2A78"
 DEFAULT_BG = "#FFFFFF"
 
+RENDER_FORMATS = frozenset({"png", "webp", "svg", "svgz", "pdf"})
+ALL_FORMATS = ("png", "svg", "pdf")
+
+EC_LEVELS = {"L": ERROR_CORRECT_L, "M": ERROR_CORRECT_M, "Q": ERROR_CORRECT_Q, "H": ERROR_CORRECT_H}
+# Wiederherstellbarer Anteil der Codewörter je Stufe; "L" wird nie automatisch gewählt
+EC_RECOVERY = (("M", 0.15), ("Q", 0.25), ("H", 0.30))
+# Verdeckte Fläche zählt doppelt: ein angeschnittenes Modul kostet ein ganzes Codewort
+EC_SAFETY_FACTOR = 2.0
+# Anteil des Symbols (ohne Quiet Zone) am quadratischen Bild bei kleinen Versionen
+SYMBOL_SHARE = 0.6
+
 
 def _normalize_hex(value: str, fallback: str) -> str:
     raw = str(value or "").strip()
@@ -34,11 +49,13 @@ def _normalize_hex(value: str, fallback: str) -> str:
     return fallback
 
 
-def _build_qr(payload: str, quiet_zone: int = 4) -> qrcode.QRCode:
+def _build_qr(payload: str, quiet_zone: int = 4, error_correction: str = "H",
+              version: Optional[int] = None) -> qrcode.QRCode:
+    """`version` ist eine Mindestversion: passt der Inhalt nicht, wählt qrcode die nächstgrößere."""
     border = max(2, min(int(quiet_zone or 4), 12))
     qr = qrcode.QRCode(
-        version=None,
-        error_correction=ERROR_CORRECT_H,
+        version=max(1, min(int(version), 40)) if version else None,
+        error_correction=EC_LEVELS.get(str(error_correction).upper(), ERROR_CORRECT_H),
         box_size=10,
         border=border,
     )
@@ -47,6 +64,78 @@ def _build_qr(payload: str, quiet_zone: int = 4) -> qrcode.QRCode:
     return qr
 
 
+def covered_ratio(
+    size: int,
+    logo_path: Optional[str],
+    logo_scale: int,
+    logo_position: str,
+    logo_bg_mode: str,
+    frame_style: str,
+) -> float:
+    """Geschätzter Anteil des Symbols, den Logo (inkl. Plakette) und Rahmen verdecken."""
+    ratio = 0.0
+    # "background" liegt unter dem deckenden QR-Hintergrund und verdeckt nichts
+    if logo_path and os.path.exists(logo_path) and logo_position != "background":
+        logo_size, plate_pad = logo_geometry(size, logo_scale)
+        side = logo_size
+        if str(logo_bg_mode or "auto-white").strip().lower() in {"auto-white", "blur"}:
+            side += 2 * plate_pad
+        ratio += (side / max(1, size)) ** 2 / SYMBOL_SHARE
+    if str(frame_style or "none").strip().lower() == "floating":
+        # Die SCAN-Blase ragt bei kleiner Quiet Zone in die untere rechte Ecke
+        ratio += 0.01
+    return ratio
+
+
+def choose_error_correction(covered: float) -> str:
+    """Niedrigste Stufe, deren Reserve die verdeckte Fläche (mit Sicherheitsfaktor) trägt."""
+    needed = covered * EC_SAFETY_FACTOR
+    for level, recovery in EC_RECOVERY:
+        if recovery >= needed:
+            return level
+    return "H"
+
+
+def _select_level(covered: float, error_correction: str) -> Tuple[str, str, str]:
+    """(Stufe, empfohlene Stufe, "auto"/"explicit") für die verdeckte Fläche."""
+    recommended = choose_error_correction(covered)
+    requested = str(error_correction or "auto").strip().upper()
+    level = requested if requested in EC_LEVELS else recommended
+    return level, recommended, "explicit" if level == requested else "auto"
+
+
+def plan_encoding(
+    payload: str,
+    size: int = 600,
+    logo_path: Optional[str] = None,
+    logo_scale: int = 20,
+    logo_position: str = "center",
+    logo_bg_mode: str = "auto-white",
+    frame_style: str = "none",
+    frame_text: Optional[str] = None,
+    quiet_zone: int = 4,
+    error_correction: str = "auto",
+    qr_version: Optional[int] = None,
+) -> Dict[str, Union[str, int, float]]:
+    """
+    Fehlerkorrektur und Version, die render_qr() mit diesen Parametern wählt –
+    ohne zu rastern. Damit rendern Vorschaubilder und andere Größen dieselbe
+    Matrix wie das Design.
+    """
+    if frame_text and frame_style in {"none", ""}:
+        frame_style = "pill"
+    covered = covered_ratio(size, logo_path, logo_scale, logo_position, logo_bg_mode, frame_style)
+    level, recommended, selection = _select_level(covered, error_correction)
+    qr = _build_qr(payload, quiet_zone=quiet_zone, error_correction=level, version=qr_version)
+    return {
+        "error_correction": level,
+        "recommended": recommended,
+        "selection": selection,
+        "version": qr.version,
+        "covered_ratio": round(covered, 4),
+    }
+
+
 def _module_drawer(module_style: str):
     style = str(module_style or "square").strip().lower()
     return {
@@ -150,27 +239,23 @@ def _apply_logo(
     if not logo_path or not os.path.exists(logo_path):
         return img
 
-    try:
-        logo = Image.open(logo_path).convert("RGBA")
-    except Exception as exc:
-        logger.warning("Logo load failed: %s", exc)
-        return img
-
+    # Dekodierte und skalierte Logos kommen aus dem Logo-Cache (warm: kein Decode, kein Resample)
     if logo_position == "background":
-        bg_logo = logo.resize(img.size, Image.Resampling.LANCZOS)
-        bg_logo.putalpha(170)
+        bg_logo = logo_cache.resized(logo_path, img.size, alpha=170)
+        if bg_logo is None:
+            return img
         return Image.alpha_composite(bg_logo, img)
 
-    scale = max(8, min(int(logo_scale or 20), 20))
-    logo_size = max(36, int(size * (scale / 100)))
-    logo = logo.resize((logo_size, logo_size), Image.Resampling.LANCZOS)
+    logo_size, plate_pad = logo_geometry(size, logo_scale)
+    logo = logo_cache.resized(logo_path, (logo_size, logo_size))
+    if logo is None:
+        return img
 
     pos_x = (img.width - logo_size) // 2
     pos_y = (img.height - logo_size) // 2
 
     mode = str(logo_bg_mode or "auto-white").strip().lower()
     if mode in {"auto-white", "blur"}:
-        plate_pad = max(8, logo_size // 9)
         plate_box = (
             pos_x - plate_pad,
             pos_y - plate_pad,
@@ -184,16 +269,7 @@ def _apply_logo(
             crop = Image.alpha_composite(crop, overlay)
             img.alpha_composite(crop, dest=(plate_box[0], plate_box[1]))
 
-        badge = Image.new("RGBA", (plate_box[2] - plate_box[0], plate_box[3] - plate_box[1]), (0, 0, 0, 0))
-        badge_draw = ImageDraw.Draw(badge)
-        badge_draw.rounded_rectangle(
-            [0, 0, badge.width - 1, badge.height - 1],
-            radius=max(10, logo_size // 5),
-            fill=(255, 255, 255, 235),
-            outline=(0, 0, 0, 28),
-            width=1,
-        )
-        img.alpha_composite(badge, dest=(plate_box[0], plate_box[1]))
+        img.alpha_composite(logo_cache.plate(logo_size), dest=(plate_box[0], plate_box[1]))
 
     img.alpha_composite(logo, dest=(pos_x, pos_y))
     return img
@@ -279,7 +355,7 @@ def _svg_eye_overlay(style: str, x: int, y: int, s: int, fg: str, bg: str) -> st
 
 
 def _generate_svg_bytes(
-    payload: str,
+    qr: qrcode.QRCode,
     size: int,
     fg: str,
     bg: str,
@@ -287,9 +363,7 @@ def _generate_svg_bytes(
     eye_style: str,
     frame_style: str,
     frame_text: Optional[str],
-    quiet_zone: int = 4,
 ) -> bytes:
-    qr = _build_qr(payload, quiet_zone=quiet_zone)
     matrix = qr.get_matrix()
     n = len(matrix)
     pad = 12
@@ -302,34 +376,14 @@ def _generate_svg_bytes(
 
     parts = [
         '<?xml version="1.0" encoding="UTF-8"?>',
-        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'width="{width}" height="{height}" viewBox="0 0 {width} {height}">',
         f'<rect x="0" y="0" width="{width}" height="{height}" fill="{bg}" />',
         f'<rect x="{pad}" y="{pad}" width="{qr_w}" height="{qr_w}" fill="{bg}" />',
     ]
 
-    mod_style = str(module_style or "square").lower()
-    for y, row in enumerate(matrix):
-        for x, on in enumerate(row):
-            if not on:
-                continue
-            px = pad + (x * cell)
-            py = pad + (y * cell)
-            if mod_style == "dots":
-                r = max(1, cell // 2)
-                parts.append(f'<circle cx="{px + r}" cy="{py + r}" r="{r}" fill="{fg}" />')
-            elif mod_style in {"rounded", "squircle", "soft"}:
-                rx = max(1, cell // (4 if mod_style == "rounded" else 3))
-                parts.append(
-                    f'<rect x="{px}" y="{py}" width="{cell}" height="{cell}" rx="{rx}" ry="{rx}" fill="{fg}" />'
-                )
-            elif mod_style == "thin-line":
-                line = max(1, cell // 3)
-                inset = (cell - line) // 2
-                parts.append(
-                    f'<rect x="{px + inset}" y="{py + inset}" width="{line}" height="{line}" fill="{fg}" />'
-                )
-            else:
-                parts.append(f'<rect x="{px}" y="{py}" width="{cell}" height="{cell}" fill="{fg}" />')
+    # Zusammengefasste Pfade bzw. <use> statt eines Elements pro Modul
+    parts.append(module_layer(matrix, cell, pad, module_style, fg))
 
     eye = str(eye_style or "square").strip().lower()
     if eye in {"rounded", "ring", "target"}:
@@ -361,14 +415,80 @@ def _generate_svg_bytes(
     return "".join(parts).encode("utf-8")
 
 
-def _to_pdf_bytes(png_bytes: bytes, dpi: int = 300) -> bytes:
-    with Image.open(BytesIO(png_bytes)).convert("RGB") as img:
-        out = BytesIO()
-        img.save(out, format="PDF", resolution=float(max(72, min(int(dpi or 300), 600))))
-        return out.getvalue()
+def _styled_pil_modules(qr: qrcode.QRCode, module_style: str, color_mask) -> Image.Image:
+    """Bisheriger Pfad über StyledPilImage (Drawer pro Modul, Farbmaske pro Pixel)."""
+    return qr.make_image(
+        image_factory=qrcode.image.styledpil.StyledPilImage,
+        module_drawer=_module_drawer(module_style),
+        color_mask=color_mask,
+    ).convert("RGBA")
 
 
-def generate_qr_png(
+def _render_raster(
+    qr: qrcode.QRCode,
+    size: int,
+    fg: str,
+    bg: str,
+    logo_path: Optional[str],
+    module_style: str,
+    eye_style: str,
+    frame_text: Optional[str],
+    frame_color: str,
+    gradient: Optional[Tuple[str, ...]],
+    logo_position: str,
+    frame_style: str,
+    logo_scale: int,
+    logo_bg_mode: str,
+) -> Image.Image:
+    # NumPy-Stamps statt Drawer-Aufruf pro Modul und Farbmaske pro Pixel
+    if gradient and len(gradient) in {2, 3}:
+        # (Start, Ende[, "radial" | "linear" | "diagonal"]); Feld wird pro Rastergröße gecacht
+        kind = str(gradient[2]).strip().lower() if len(gradient) == 3 else "radial"
+        img = rasterize_gradient(
+            qr, module_style, ImageColor.getrgb(gradient[0]), ImageColor.getrgb(gradient[1]), kind
+        )
+    else:
+        img = rasterize_modules(qr, module_style, ImageColor.getrgb(fg), ImageColor.getrgb(bg))
+
+    _draw_eye_overlays(img, qr, fg, bg, eye_style)
+
+    img = img.resize((size, size), Image.Resampling.NEAREST)
+    img = ImageOps.expand(img, border=8, fill=bg)
+
+    img = _apply_logo(
+        img=img,
+        logo_path=logo_path,
+        size=size,
+        logo_scale=logo_scale,
+        logo_bg_mode=logo_bg_mode,
+        logo_position=logo_position,
+    )
+
+    if frame_style not in {"", "none"}:
+        img = _apply_frame(
+            img=img,
+            frame_style=frame_style,
+            frame_text=frame_text,
+            fg=_normalize_hex(frame_color, fg),
+            bg=bg,
+        )
+    return img
+
+
+def _quality_warnings(contrast: float, size: int, module_style: str, logo_scale: int, quiet_zone: int) -> list[str]:
+    warnings: list[str] = []
+    if contrast < 4.5:
+        warnings.append(f"Low contrast ({contrast:.2f}:1). Recommended >= 4.5:1.")
+    if int(quiet_zone or 4) < 4:
+        warnings.append("Quiet zone below 4 modules can reduce scan reliability.")
+    if str(module_style or "").strip().lower() == "thin-line" and int(size or 0) < 700:
+        warnings.append("Thin-line modules with small size can be hard to scan.")
+    if int(logo_scale or 20) > 20:
+        warnings.append("Logo size above 20% is unsafe and has been clamped.")
+    return warnings
+
+
+def render_qr(
     payload: str,
     size: int = 600,
     fg: str = DEFAULT_FG,
@@ -378,7 +498,7 @@ def generate_qr_png(
     eye_style: str = "square",
     frame_text: Optional[str] = None,
     frame_color: str = "#4F46E5",
-    gradient: Optional[Tuple[str, str]] = None,
+    gradient: Optional[Tuple[str, ...]] = None,
     logo_position: str = "center",
     filename: Optional[str] = None,
     frame_style: str = "none",
@@ -386,100 +506,197 @@ def generate_qr_png(
     logo_bg_mode: str = "auto-white",
     quiet_zone: int = 4,
     dpi: int = 300,
-) -> Dict[str, Union[str, bytes]]:
+    formats: Iterable[str] = ("png",),
+    save_to_disk: bool = False,
+    error_correction: str = "auto",
+    qr_version: Optional[int] = None,
+) -> Dict[str, Union[str, bytes, None]]:
     """
-    Generates QR as PNG and also returns server-side SVG/PDF bytes.
-    Returns: {'path', 'bytes', 'svg_bytes', 'pdf_bytes'}
+    Rendert nur die angeforderten Formate (png/webp/svg/svgz/pdf) aus einer
+    einzigen QR-Matrix. Das Rasterbild entsteht nur für PNG/WebP oder
+    save_to_disk; PDF wird direkt als Vektor geschrieben. PNGs mit wenigen
+    Farben werden indiziert gespeichert, WebP verlustfrei.
+    Returns: {'path', 'key', 'bytes', 'webp_bytes', 'svg_bytes', 'svgz_bytes', 'pdf_bytes',
+    'contrast_ratio', 'quality_warnings', 'encoding'}; nicht angeforderte Formate sind b"",
+    encoding['png_encoder'] nennt den PNG-Encoder (z. B. "indexed-1bit"), 'path' ist None
+    ohne save_to_disk. save_to_disk ohne filename legt das PNG im Blob-Store ab
+    ('key' = Speicher-Schlüssel, 'path' = lokale Datei).
+
+    error_correction: "auto" wählt die niedrigste Stufe, die die von Logo und
+    Rahmen verdeckte Fläche trägt; "L"/"M"/"Q"/"H" erzwingt eine Stufe.
+    qr_version: Mindestversion (1-40), sonst die kleinste passende.
     """
+    wanted = {str(fmt).strip().lower() for fmt in formats}
+    unknown = wanted - RENDER_FORMATS
+    if unknown:
+        raise ValueError(f"Unbekannte QR-Formate: {sorted(unknown)}")
 
     safe_fg = _normalize_hex(fg, DEFAULT_FG)
     safe_bg = _normalize_hex(bg, DEFAULT_BG)
 
-    qr = _build_qr(payload, quiet_zone=quiet_zone)
-
-    if gradient and len(gradient) == 2:
-        start_rgb = ImageColor.getrgb(gradient[0])
-        end_rgb = ImageColor.getrgb(gradient[1])
-        color_mask = mask.RadialGradiantColorMask(center_color=start_rgb, edge_color=end_rgb)
-    else:
-        color_mask = mask.SolidFillColorMask(
-            front_color=ImageColor.getrgb(safe_fg),
-            back_color=ImageColor.getrgb(safe_bg),
-        )
-
-    img = qr.make_image(
-        image_factory=qrcode.image.styledpil.StyledPilImage,
-        module_drawer=_module_drawer(module_style),
-        color_mask=color_mask,
-    ).convert("RGBA")
-
-    _draw_eye_overlays(img, qr, safe_fg, safe_bg, eye_style)
-
-    img = img.resize((size, size), Image.Resampling.NEAREST)
-    img = ImageOps.expand(img, border=8, fill=safe_bg)
-
-    img = _apply_logo(
-        img=img,
-        logo_path=logo_path,
-        size=size,
-        logo_scale=logo_scale,
-        logo_bg_mode=logo_bg_mode,
-        logo_position=logo_position,
-    )
-
     if frame_text and frame_style in {"none", ""}:
         # Backward compatibility for old text-only frame behavior.
         frame_style = "pill"
 
-    if frame_style not in {"", "none"}:
-        img = _apply_frame(
-            img=img,
-            frame_style=frame_style,
+    covered = covered_ratio(size, logo_path, logo_scale, logo_position, logo_bg_mode, frame_style)
+    level, recommended, selection = _select_level(covered, error_correction)
+    qr = _build_qr(payload, quiet_zone=quiet_zone, error_correction=level, version=qr_version)
+
+    png_bytes = b""
+    png_encoder: Optional[str] = None
+    webp_bytes = b""
+    blob_key: Optional[str] = None
+    pdf_bytes = b""
+    svg_bytes = b""
+    svgz_bytes = b""
+    file_path: Optional[Path] = None
+
+    if wanted & {"png", "webp"} or save_to_disk:
+        img = _render_raster(
+            qr,
+            size=size,
+            fg=safe_fg,
+            bg=safe_bg,
+            logo_path=logo_path,
+            module_style=module_style,
+            eye_style=eye_style,
             frame_text=frame_text,
-            fg=_normalize_hex(frame_color, safe_fg),
+            frame_color=frame_color,
+            gradient=gradient,
+            logo_position=logo_position,
+            frame_style=frame_style,
+            logo_scale=logo_scale,
+            logo_bg_mode=logo_bg_mode,
+        )
+        if "webp" in wanted:
+            webp_bytes = encode_webp(img)
+        if "png" in wanted or save_to_disk:
+            png_bytes, png_encoder = encode_png(img)
+        if save_to_disk and filename:
+            output_dir = Path("static/generated_qr")
+            output_dir.mkdir(parents=True, exist_ok=True)
+            file_path = output_dir / filename
+            file_path.write_bytes(png_bytes)
+            logger.info("QR-Code gespeichert unter: %s", file_path)
+        elif save_to_disk:
+            # ohne Dateinamen inhaltsadressiert im Blob-Store (kollisionsfrei, dedupliziert)
+            blob_key = blob_store.put(png_bytes, "qr", "png")
+            file_path = Path(blob_store.local_path(blob_key) or blob_key)
+            logger.info("QR-Code gespeichert unter: %s", blob_key)
+        if save_to_disk:
+            if "png" not in wanted:
+                png_bytes = b""
+
+    if "pdf" in wanted:
+        pdf_bytes = render_pdf(
+            qr.get_matrix(),
+            border=qr.border,
+            size=size,
+            fg=safe_fg,
             bg=safe_bg,
+            module_style=module_style,
+            eye_style=eye_style,
+            logo_path=logo_path,
+            logo_scale=logo_scale,
+            logo_bg_mode=logo_bg_mode,
+            logo_position=logo_position,
+            frame_style=frame_style,
+            frame_text=frame_text,
+            frame_color=_normalize_hex(frame_color, safe_fg),
+            gradient=gradient,
+            dpi=dpi,
         )
 
-    output_dir = Path("static/generated_qr")
-    output_dir.mkdir(parents=True, exist_ok=True)
-    filename = filename or f"qr_{int(time.time())}.png"
-    file_path = output_dir / filename
+    if wanted & {"svg", "svgz"}:
+        svg_bytes = _generate_svg_bytes(
+            qr,
+            size=size,
+            fg=safe_fg,
+            bg=safe_bg,
+            module_style=module_style,
+            eye_style=eye_style,
+            frame_style=frame_style,
+            frame_text=frame_text,
+        )
+        if "svgz" in wanted:
+            svgz_bytes = gzip_svg(svg_bytes)
+        if "svg" not in wanted:
+            svg_bytes = b""
 
-    png_buffer = BytesIO()
-    img.save(png_buffer, format="PNG")
-    png_bytes = png_buffer.getvalue()
+    contrast = _contrast_ratio(safe_fg, safe_bg)
+    warnings = _quality_warnings(contrast, size, module_style, logo_scale, quiet_zone)
+    if "LMQH".index(level) < "LMQH".index(recommended):
+        warnings.append(f"Error correction {level} is below the recommended {recommended} for this logo/frame.")
+    return {
+        "path": str(file_path) if file_path else None,
+        "key": blob_key,
+        "bytes": png_bytes,
+        "webp_bytes": webp_bytes,
+        "svg_bytes": svg_bytes,
+        "svgz_bytes": svgz_bytes,
+        "pdf_bytes": pdf_bytes,
+        "contrast_ratio": contrast,
+        "quality_warnings": warnings,
+        "encoding": {
+            "error_correction": level,
+            "recommended": recommended,
+            "selection": selection,
+            "version": qr.version,
+            "modules": qr.modules_count,
+            "covered_ratio": round(covered, 4),
+            "png_encoder": png_encoder,
+            "webp_encoder": "webp-lossless" if webp_bytes else None,
+        },
+    }
 
-    img.save(file_path, format="PNG")
 
-    svg_bytes = _generate_svg_bytes(
+def generate_qr_png(
+    payload: str,
+    size: int = 600,
+    fg: str = DEFAULT_FG,
+    bg: str = DEFAULT_BG,
+    logo_path: Optional[str] = None,
+    module_style: str = "square",
+    eye_style: str = "square",
+    frame_text: Optional[str] = None,
+    frame_color: str = "#4F46E5",
+    gradient: Optional[Tuple[str, ...]] = None,
+    logo_position: str = "center",
+    filename: Optional[str] = None,
+    frame_style: str = "none",
+    logo_scale: int = 20,
+    logo_bg_mode: str = "auto-white",
+    quiet_zone: int = 4,
+    dpi: int = 300,
+    error_correction: str = "auto",
+    qr_version: Optional[int] = None,
+) -> Dict[str, Union[str, bytes]]:
+    """
+    Generates QR as PNG, writes it to static/generated_qr and also returns
+    server-side SVG/PDF bytes. Kompatibilitäts-Wrapper um render_qr();
+    neue Aufrufer fordern dort nur die benötigten Formate an.
+    Returns: {'path', 'bytes', 'svg_bytes', 'pdf_bytes'}
+    """
+    return render_qr(
         payload=payload,
         size=size,
-        fg=safe_fg,
-        bg=safe_bg,
+        fg=fg,
+        bg=bg,
+        logo_path=logo_path,
         module_style=module_style,
         eye_style=eye_style,
-        frame_style=frame_style,
         frame_text=frame_text,
+        frame_color=frame_color,
+        gradient=gradient,
+        logo_position=logo_position,
+        filename=filename,
+        frame_style=frame_style,
+        logo_scale=logo_scale,
+        logo_bg_mode=logo_bg_mode,
         quiet_zone=quiet_zone,
+        dpi=dpi,
+        formats=ALL_FORMATS,
+        save_to_disk=True,
+        error_correction=error_correction,
+        qr_version=qr_version,
     )
-    pdf_bytes = _to_pdf_bytes(png_bytes, dpi=dpi)
-    contrast = _contrast_ratio(safe_fg, safe_bg)
-    quality_warnings: list[str] = []
-    if contrast < 4.5:
-        quality_warnings.append(f"Low contrast ({contrast:.2f}:1). Recommended >= 4.5:1.")
-    if int(quiet_zone or 4) < 4:
-        quality_warnings.append("Quiet zone below 4 modules can reduce scan reliability.")
-    if str(module_style or "").strip().lower() == "thin-line" and int(size or 0) < 700:
-        quality_warnings.append("Thin-line modules with small size can be hard to scan.")
-    if int(logo_scale or 20) > 20:
-        quality_warnings.append("Logo size above 20% is unsafe and has been clamped.")
-
-    logger.info("QR-Code gespeichert unter: %s", file_path)
-    return {
-        "path": str(file_path),
-        "bytes": png_bytes,
-        "svg_bytes": svg_bytes,
-        "pdf_bytes": pdf_bytes,
-        "contrast_ratio": contrast,
-        "quality_warnings": quality_warnings,
-    }
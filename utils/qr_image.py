@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import inspect
+from typing import Any, Dict, Optional
+
+from PIL import features
+
+from utils.blob_storage import blob_store
+from utils.qr_config import get_qr_style
+from utils.qr_generator import plan_encoding
+from utils.qr_pdf import QR_PADDING
+from utils.render_cache import RESULT_KEYS, RenderCache, render_cache, render_key, render_qr_cached_async
+
+WEBP_SUPPORTED = features.check("webp")
+IMAGE_FORMATS = {"png": "image/png", "svg": "image/svg+xml", "pdf": "application/pdf"}
+if WEBP_SUPPORTED:
+    IMAGE_FORMATS["webp"] = "image/webp"
+# ?size= wird auf feste Stufen aufgerundet: der Endpunkt ist öffentlich, jede
+# freie Größe wäre ein eigener Render und ein eigener Cache-Eintrag
+SIZE_BUCKETS = (128, 256, 512, 1024, 2048, 4096)
+THEME_SIZE = 600
+
+# Vorschaubilder für Listen (Profil) mit srcset
+THUMB_WIDTHS = (64, 128, 256)
+# Erhöhen, wenn sich der Zuschnitt der Vorschaubilder ändert (URLs sind immutable)
+THUMB_LAYOUT = 2
+THUMB_FORMATS = {fmt: IMAGE_FORMATS[fmt] for fmt in ("png", "webp") if fmt in IMAGE_FORMATS}
+_PLAN_KEYS = frozenset(inspect.signature(plan_encoding).parameters)
+
+
+def _payload(qr: Any, data: Dict[str, Any]) -> str:
+    if qr.dynamic_url:
+        return qr.dynamic_url
+    # statische Event-Codes enthalten den iCal-Text direkt (dynamisch = /d/{slug})
+    if qr.type == "event" and not data.get("is_dynamic", True) and data.get("ics"):
+        return str(data["ics"])
+    return f"/d/{qr.slug}"
+
+
+def stored_render_params(qr: Any) -> Dict[str, Any]:
+    """
+    render_qr()-Parameter aus dem gespeicherten Design eines QR-Codes:
+    data['design'] (Formular-Routen, Editor) oder – ohne Design – das Theme
+    aus qr.style (Basis-Route, API, Bulk-Jobs). Das Design hat Vorrang vor
+    den Spalten, deren Defaults erst beim INSERT gesetzt werden – sonst
+    änderte sich die Version zwischen Anlegen und erstem Abruf.
+    """
+    data = qr.get_data() or {}
+    design = data.get("design") if isinstance(data.get("design"), dict) else None
+    params: Dict[str, Any] = {
+        "payload": _payload(qr, data),
+        "logo_path": blob_store.local_path(qr.logo_path),
+    }
+    if design is None:
+        theme = get_qr_style(qr.style or "modern")
+        params.update(
+            size=THEME_SIZE,
+            fg=theme["fg"],
+            bg=theme["bg"],
+            gradient=theme.get("gradient"),
+            frame_color=theme.get("frame_color"),
+            module_style=theme.get("module_style"),
+            eye_style=theme.get("eye_style"),
+        )
+        return params
+    params.update(
+        size=int(design.get("qr_size") or qr.qr_size or THEME_SIZE),
+        fg=str(design.get("fg") or qr.color_fg or "#0D2A78"),
+        bg=str(design.get("bg") or qr.color_bg or "#FFFFFF"),
+        module_style=str(design.get("module_style") or "square"),
+        eye_style=str(design.get("eye_style") or "square"),
+        frame_style=str(design.get("frame_style") or qr.frame_style or "none"),
+        logo_scale=int(design.get("logo_scale") or 20),
+        logo_bg_mode=str(design.get("logo_bg_mode") or "auto-white"),
+        quiet_zone=int(design.get("quiet_zone") or 4),
+        dpi=int(design.get("dpi") or 300),
+    )
+    return params
+
+
+def design_version(params: Dict[str, Any]) -> str:
+    """Kurzer Hash über Design, Logo-Inhalt und RENDER_VERSION (unabhängig von Format/Größe)."""
+    return render_key("design", params)[:16]
+
+
+def size_bucket(size: Optional[int], default: int) -> int:
+    """Ohne ?size= die Designgröße, sonst die nächstgrößere Stufe (höchstens die größte)."""
+    if not size:
+        return int(default)
+    return next((bucket for bucket in SIZE_BUCKETS if bucket >= size), SIZE_BUCKETS[-1])
+
+
+def sized_params(params: Dict[str, Any], size: int) -> Dict[str, Any]:
+    """
+    Renderparameter für eine andere Größe als das Design. Fehlerkorrektur und
+    Version werden auf die des Designs festgelegt: jede Größe zeigt dieselbe
+    Matrix, statt im kleinen Bild auf eine andere Stufe zu wechseln.
+    """
+    if int(size) == int(params["size"]):
+        return dict(params)
+    encoding = plan_encoding(**{k: v for k, v in params.items() if k in _PLAN_KEYS})
+    return {**params, "size": int(size), "error_correction": encoding["error_correction"],
+            "qr_version": encoding["version"]}
+
+
+def qr_image_path(qr: Any, fmt: str = "png", size: Optional[int] = None,
+                  params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Versionierter Bildpfad ohne führenden Slash (wie Blob-Schlüssel), z. B.
+    qr/img/ab12cd34ef.png?v=…; ändert sich mit jedem Design.
+    """
+    version = design_version(params or stored_render_params(qr))
+    path = f"qr/img/{qr.slug}.{fmt}?v={version}"
+    return f"{path}&size={int(size)}" if size else path
+
+
+def thumb_version(params: Dict[str, Any]) -> str:
+    return f"{design_version(params)}.{THUMB_LAYOUT}"
+
+
+def thumb_path(qr: Any, width: int, fmt: str = "png", params: Optional[Dict[str, Any]] = None) -> str:
+    """Versionierter Pfad eines Vorschaubilds, z. B. qr/img/ab12cd34ef-128.webp?v=…"""
+    version = thumb_version(params or stored_render_params(qr))
+    return f"qr/img/{qr.slug}-{int(width)}.{fmt}?v={version}"
+
+
+def thumb_srcset(qr: Any, fmt: str = "png", params: Optional[Dict[str, Any]] = None) -> str:
+    params = params or stored_render_params(qr)
+    return ", ".join(f"/{thumb_path(qr, width, fmt, params)} {width}w" for width in THUMB_WIDTHS)
+
+
+async def render_thumbnail(params: Dict[str, Any], width: int, fmt: str = "png",
+                           cache: Optional[RenderCache] = None) -> bytes:
+    """
+    Vorschaubild direkt in Zielgröße gerendert (scharfe Module, wenige KB)
+    statt aus dem vollen Bild herunterskaliert; liegt im Render-Cache.
+    Genau width × width wie im srcset angegeben: die Ruhezone des Rasterpfads
+    geht von der Modulfläche ab, Rahmen entfallen (ihre feste Höhe wäre
+    größer als das Vorschaubild selbst). Matrix wie im vollen Bild (sized_params).
+    """
+    thumb = {**sized_params(params, int(width) - 2 * QR_PADDING), "frame_style": "none", "frame_text": None}
+    result = await render_qr_cached_async(formats=(fmt,), cache=cache or render_cache, **thumb)
+    return result[RESULT_KEYS[fmt]]
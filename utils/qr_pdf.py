@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+import math
+import os
+import zlib
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image, ImageColor, ImageFont
+
+from utils.logo_cache import logo_cache, logo_geometry
+from utils.qr_svg import merged_rects
+
+BOX = 10          # Modulraster wie _build_qr(): box_size=10
+QR_PADDING = 8    # wie ImageOps.expand(img, border=8) im Rasterpfad
+KAPPA = 0.5522847498  # Bezier-Näherung für Viertelkreise
+LOGO_MAX_PX = 1024
+
+Rgb = Tuple[int, int, int]
+
+
+def _n(value: float, digits: int = 2) -> str:
+    text = f"{value:.{digits}f}".rstrip("0").rstrip(".")
+    return "0" if text in {"-0", ""} else text
+
+
+def _rgb(color: str) -> Rgb:
+    return ImageColor.getrgb(color)[:3]
+
+
+def _fill(rgb: Rgb) -> str:
+    return " ".join(_n(c / 255) for c in rgb) + " rg\n"
+
+
+def _rect(x: float, y: float, w: float, h: float) -> str:
+    return f"{_n(x)} {_n(y)} {_n(w)} {_n(h)} re\n"
+
+
+def _corner_rect(x: float, y: float, w: float, h: float, rx: float, ry: float,
+                 corners: Tuple[bool, bool, bool, bool]) -> str:
+    """Rechteck mit (elliptisch) abgerundeten Ecken; corners = (NW, NE, SE, SW)."""
+    nw, ne, se, sw = corners
+    kx, ky = rx * KAPPA, ry * KAPPA
+    x1, y1 = x + w, y + h
+    ops = [f"{_n(x + rx if nw else x)} {_n(y)} m"]
+    if ne:
+        ops.append(f"{_n(x1 - rx)} {_n(y)} l {_n(x1 - rx + kx)} {_n(y)} {_n(x1)} {_n(y + ry - ky)} {_n(x1)} {_n(y + ry)} c")
+    else:
+        ops.append(f"{_n(x1)} {_n(y)} l")
+    if se:
+        ops.append(f"{_n(x1)} {_n(y1 - ry)} l {_n(x1)} {_n(y1 - ry + ky)} {_n(x1 - rx + kx)} {_n(y1)} {_n(x1 - rx)} {_n(y1)} c")
+    else:
+        ops.append(f"{_n(x1)} {_n(y1)} l")
+    if sw:
+        ops.append(f"{_n(x + rx)} {_n(y1)} l {_n(x + rx - kx)} {_n(y1)} {_n(x)} {_n(y1 - ry + ky)} {_n(x)} {_n(y1 - ry)} c")
+    else:
+        ops.append(f"{_n(x)} {_n(y1)} l")
+    if nw:
+        ops.append(f"{_n(x)} {_n(y + ry)} l {_n(x)} {_n(y + ry - ky)} {_n(x + rx - kx)} {_n(y)} {_n(x + rx)} {_n(y)} c")
+    return " ".join(ops) + " h\n"
+
+
+def _rounded_rect(x: float, y: float, w: float, h: float, r: float) -> str:
+    r = max(0.0, min(r, w / 2, h / 2))
+    if r == 0:
+        return _rect(x, y, w, h)
+    return _corner_rect(x, y, w, h, r, r, (True, True, True, True))
+
+
+def _ellipse(x: float, y: float, w: float, h: float) -> str:
+    rx, ry = w / 2, h / 2
+    cx, cy = x + rx, y + ry
+    kx, ky = rx * KAPPA, ry * KAPPA
+    return (
+        f"{_n(cx + rx)} {_n(cy)} m "
+        f"{_n(cx + rx)} {_n(cy + ky)} {_n(cx + kx)} {_n(cy + ry)} {_n(cx)} {_n(cy + ry)} c "
+        f"{_n(cx - kx)} {_n(cy + ry)} {_n(cx - rx)} {_n(cy + ky)} {_n(cx - rx)} {_n(cy)} c "
+        f"{_n(cx - rx)} {_n(cy - ky)} {_n(cx - kx)} {_n(cy - ry)} {_n(cx)} {_n(cy - ry)} c "
+        f"{_n(cx + kx)} {_n(cy - ry)} {_n(cx + rx)} {_n(cy - ky)} {_n(cx + rx)} {_n(cy)} c h\n"
+    )
+
+
+def _text(x: float, top: float, text: str) -> str:
+    # Baseline 10 px unter der Oberkante, wie ImageFont.load_default() (Größe 10)
+    raw = text.encode("cp1252", errors="replace")
+    escaped = raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)").decode("latin-1")
+    return f"BT /F1 10 Tf 1 0 0 -1 {_n(x)} {_n(top + 10)} Tm ({escaped}) Tj ET\n"
+
+
+def _label_size(text: str) -> Tuple[int, int]:
+    return ImageFont.load_default().getbbox(text)[2:4]
+
+
+def module_paths(matrix: Sequence[Sequence[bool]], module_style: str) -> str:
+    """
+    Pfadoperatoren aller Datenmodule im Boxraster (10 Einheiten pro Modul),
+    mit derselben Geometrie wie die Drawer aus _module_drawer().
+    """
+    style = str(module_style or "square").strip().lower()
+    count = len(matrix)
+
+    def on(x: int, y: int) -> bool:
+        return 0 <= x < count and 0 <= y < count and bool(matrix[y][x])
+
+    parts: List[str] = []
+    if style == "thin-line":
+        # VerticalBarsDrawer: 8 breite Balken je senkrechtem Lauf, Enden halbelliptisch (4 x 5)
+        for x, y, w, h in merged_rects([list(col) for col in zip(*matrix)]):
+            for col in range(y, y + h):
+                parts.append(_corner_rect(col * BOX + 1, x * BOX, BOX - 2, w * BOX, 4, BOX / 2,
+                                          (True, True, True, True)))
+        return "".join(parts)
+    if style not in {"rounded", "squircle", "dots", "soft"}:
+        for x, y, w, h in merged_rects(matrix):
+            parts.append(_rect(x * BOX, y * BOX, w * BOX, h * BOX))
+        return "".join(parts)
+
+    for y, row in enumerate(matrix):
+        for x, active in enumerate(row):
+            if not active:
+                continue
+            px, py = x * BOX, y * BOX
+            if style == "dots":
+                parts.append(_ellipse(px, py, BOX, BOX))
+            elif style == "soft":
+                # GappedSquareModuleDrawer(size_ratio=0.8)
+                parts.append(_rect(px + 1, py + 1, BOX - 2, BOX - 2))
+            else:
+                # RoundedModuleDrawer: Ecke rund, wenn beide angrenzenden Nachbarn fehlen
+                n, e, s, w = on(x, y - 1), on(x + 1, y), on(x, y + 1), on(x - 1, y)
+                corners = (not (n or w), not (n or e), not (s or e), not (s or w))
+                if any(corners):
+                    parts.append(_corner_rect(px, py, BOX, BOX, BOX / 2, BOX / 2, corners))
+                else:
+                    parts.append(_rect(px, py, BOX, BOX))
+    return "".join(parts)
+
+
+def _eye_overlays(count: int, border: int, eye_style: str, fg: Rgb, bg: Rgb) -> str:
+    """Wie _draw_eye_overlays(): Maße im Boxraster, Kontur als gefüllte Fläche unter der Innenfläche."""
+    style = str(eye_style or "square").strip().lower()
+    if style not in {"rounded", "ring", "target", "dots"}:
+        return ""
+    mp = BOX
+    eye = 7 * mp
+    origins = [
+        (border * mp, border * mp),
+        ((count - border - 7) * mp, border * mp),
+        (border * mp, (count - border - 7) * mp),
+    ]
+    parts: List[str] = []
+    for ox, oy in origins:
+        outer = (ox, oy, eye, eye)
+        middle = (ox + mp, oy + mp, eye - 2 * mp, eye - 2 * mp)
+        inner = (ox + 2 * mp, oy + 2 * mp, eye - 4 * mp, eye - 4 * mp)
+        if style == "rounded":
+            radius = max(6, mp * 2)
+            shapes = [
+                (fg, _rounded_rect(*outer, radius)),
+                (bg, _rounded_rect(*middle, max(4, radius - mp))),
+                (fg, _rounded_rect(*inner, max(3, radius - 2 * mp))),
+            ]
+        elif style == "ring":
+            shapes = [(fg, _ellipse(*outer)), (bg, _ellipse(*middle)), (fg, _ellipse(*inner))]
+        elif style == "target":
+            shapes = [
+                (fg, _rounded_rect(*outer, max(4, mp))),
+                (bg, _rounded_rect(*middle, max(3, mp))),
+                (fg, _ellipse(*inner)),
+            ]
+        else:
+            r = max(2, mp)
+            cx, cy = ox + eye / 2, oy + eye / 2
+            shapes = [
+                (fg, _rounded_rect(*outer, max(4, mp))),
+                (bg, _rounded_rect(*middle, max(3, mp))),
+                (fg, _ellipse(cx - r, cy - r, 2 * r, 2 * r)),
+            ]
+        for color, path in shapes:
+            parts.append(_fill(color) + path + "f\n")
+    return "".join(parts)
+
+
+class _PdfWriter:
+    """Minimaler PDF-1.4-Schreiber: nummerierte Objekte, Streams, xref-Tabelle."""
+
+    def __init__(self) -> None:
+        self.objects: List[bytes] = []
+
+    def reserve(self) -> int:
+        self.objects.append(b"")
+        return len(self.objects)
+
+    def set(self, ref: int, body: str) -> int:
+        self.objects[ref - 1] = body.encode("latin-1")
+        return ref
+
+    def add(self, body: str) -> int:
+        return self.set(self.reserve(), body)
+
+    def add_stream(self, entries: str, data: bytes, compress: bool = True) -> int:
+        if compress:
+            data = zlib.compress(data, 6)
+            entries += " /Filter /FlateDecode"
+        ref = self.reserve()
+        self.objects[ref - 1] = f"<< {entries} /Length {len(data)} >>\nstream\n".encode("latin-1") + data + b"\nendstream"
+        return ref
+
+    def tobytes(self, root: int) -> bytes:
+        out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for number, body in enumerate(self.objects, start=1):
+            offsets.append(len(out))
+            out += f"{number} 0 obj\n".encode("latin-1") + body + b"\nendobj\n"
+        xref = len(out)
+        out += f"xref\n0 {len(self.objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+        for offset in offsets:
+            out += f"{offset:010d} 00000 n \n".encode("latin-1")
+        out += f"trailer\n<< /Size {len(self.objects) + 1} /Root {root} 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+        return bytes(out)
+
+
+def _logo_xobject(writer: _PdfWriter, logo_path: str) -> Optional[int]:
+    """Bettet das Logo einmal als Bild-XObject ein (RGB + SMask für Transparenz)."""
+    logo = logo_cache.decoded(logo_path)
+    if logo is None:
+        return None
+    if max(logo.size) > LOGO_MAX_PX:
+        # Geteiltes Cache-Bild nicht verändern: thumbnail() auf einer Kopie
+        logo = logo.copy()
+        logo.thumbnail((LOGO_MAX_PX, LOGO_MAX_PX), Image.Resampling.LANCZOS)
+    w, h = logo.size
+    head = f"/Type /XObject /Subtype /Image /Width {w} /Height {h} /BitsPerComponent 8"
+    smask = ""
+    alpha = logo.getchannel("A")
+    if alpha.getextrema()[0] < 255:
+        mask_ref = writer.add_stream(f"{head} /ColorSpace /DeviceGray", alpha.tobytes())
+        smask = f" /SMask {mask_ref} 0 R"
+    return writer.add_stream(f"{head} /ColorSpace /DeviceRGB{smask}", logo.convert("RGB").tobytes())
+
+
+def _shading(writer: _PdfWriter, kind: str, width: float, start: Rgb, end: Rgb) -> int:
+    """Verlauf wie utils.qr_raster.gradient_field(), im Boxraster der QR-Fläche."""
+    last = max(1.0, width - 1)
+    if kind == "linear":
+        head = f"/ShadingType 2 /Coords [0 0 {_n(last)} 0]"
+    elif kind == "diagonal":
+        head = f"/ShadingType 2 /Coords [0 0 {_n(last)} {_n(last)}]"
+    else:
+        c = width / 2
+        head = f"/ShadingType 3 /Coords [{_n(c)} {_n(c)} 0 {_n(c)} {_n(c)} {_n(math.sqrt(2) * width / 2)}]"
+    c0 = " ".join(_n(v / 255) for v in start)
+    c1 = " ".join(_n(v / 255) for v in end)
+    return writer.add(
+        f"<< {head} /ColorSpace /DeviceRGB /Extend [true true] "
+        f"/Function << /FunctionType 2 /Domain [0 1] /C0 [{c0}] /C1 [{c1}] /N 1 >> >>"
+    )
+
+
+def render_pdf(
+    matrix: Sequence[Sequence[bool]],
+    border: int,
+    size: int,
+    fg: str,
+    bg: str,
+    module_style: str = "square",
+    eye_style: str = "square",
+    logo_path: Optional[str] = None,
+    logo_scale: int = 20,
+    logo_bg_mode: str = "auto-white",
+    logo_position: str = "center",
+    frame_style: str = "none",
+    frame_text: Optional[str] = None,
+    frame_color: Optional[str] = None,
+    gradient: Optional[Tuple[str, ...]] = None,
+    dpi: int = 300,
+) -> bytes:
+    """
+    Vektor-PDF mit demselben Layout wie der PNG-Pfad (_render_raster): Module,
+    Eyes, Rahmen und Text als Pfade, das Logo einmal als Bild-XObject.
+    Koordinaten sind PNG-Pixel; die Seitengröße entspricht dem PNG bei `dpi`.
+    """
+    fg_rgb, bg_rgb = _rgb(fg), _rgb(bg)
+    count = len(matrix)
+    qr_px = size + 2 * QR_PADDING
+
+    frame = str(frame_style or "none").strip().lower()
+    text = (frame_text or "Scan me").strip() or "Scan me"
+    offset, width, height = 0, qr_px, qr_px
+    if frame == "corner":
+        offset, width, height = 18, qr_px + 36, qr_px + 36
+    elif frame == "floating":
+        offset, width, height = 28, qr_px + 56, qr_px + 56
+    elif frame not in {"", "none"}:
+        frame, height = "pill", qr_px + 78
+
+    writer = _PdfWriter()
+    resources: List[str] = []
+    ops: List[str] = []
+    scale = 72 / max(72, min(int(dpi or 300), 600))
+    # Pixelkoordinaten mit Ursprung oben links
+    ops.append(f"{_n(scale, 5)} 0 0 {_n(-scale, 5)} 0 {_n(height * scale, 3)} cm\n")
+    ops.append(_fill(bg_rgb) + _rect(0, 0, width, height) + "f\n")
+
+    origin = offset + QR_PADDING
+    box_scale = size / (count * BOX)
+    ops.append(f"q {_n(box_scale, 5)} 0 0 {_n(box_scale, 5)} {_n(origin)} {_n(origin)} cm\n")
+    paths = module_paths(matrix, module_style)
+    if gradient and len(gradient) in {2, 3}:
+        kind = str(gradient[2]).strip().lower() if len(gradient) == 3 else "radial"
+        shading = _shading(writer, kind, count * BOX, _rgb(gradient[0]), _rgb(gradient[1]))
+        resources.append(f"/Shading << /Sh1 {shading} 0 R >>")
+        # Verlaufsmaske malt wie im Rasterpfad auf Weiß
+        ops.append(_fill((255, 255, 255)) + _rect(0, 0, count * BOX, count * BOX) + "f\n")
+        if paths:
+            ops.append("q\n" + paths + "W n /Sh1 sh Q\n")
+    elif paths:
+        ops.append(_fill(fg_rgb) + paths + "f\n")
+    ops.append(_eye_overlays(count, border, eye_style, fg_rgb, bg_rgb))
+    ops.append("Q\n")
+
+    # Logo: bei "background" verdeckt der deckende QR-Hintergrund es auch im PNG vollständig
+    logo_ref = None
+    if logo_path and os.path.exists(logo_path) and logo_position != "background":
+        logo_ref = _logo_xobject(writer, logo_path)
+    if logo_ref is not None:
+        logo_size, plate_pad = logo_geometry(size, logo_scale)
+        pos_x = offset + (qr_px - logo_size) // 2
+        pos_y = offset + (qr_px - logo_size) // 2
+        if str(logo_bg_mode or "auto-white").strip().lower() in {"auto-white", "blur"}:
+            # Weiße Plakette (Alpha 235) mit feiner Kontur (Alpha 28), wie _apply_logo()
+            side = logo_size + 2 * plate_pad
+            resources.append("/ExtGState << /GS1 << /ca 0.9216 /CA 0.1098 >> >>")
+            ops.append(
+                "q /GS1 gs 1 1 1 rg 0 0 0 RG 1 w\n"
+                + _rounded_rect(pos_x - plate_pad + 0.5, pos_y - plate_pad + 0.5, side - 1, side - 1,
+                                max(1, logo_size // 5))
+                + "B Q\n"
+            )
+        resources.append(f"/XObject << /Im1 {logo_ref} 0 R >>")
+        ops.append(f"q {logo_size} 0 0 {-logo_size} {pos_x} {pos_y + logo_size} cm /Im1 Do Q\n")
+
+    frame_rgb = _rgb(frame_color) if frame_color else fg_rgb
+    if frame == "corner":
+        label_w, label_h = _label_size(text)
+        ops.append(_fill(frame_rgb) + _rounded_rect(8, 8, label_w + 22, label_h + 14, 10) + "f\n")
+        ops.append(_fill(bg_rgb) + _text(19, 14, text))
+    elif frame == "floating":
+        bubble = 66
+        bx, by = width - bubble - 10, height - bubble - 10
+        ops.append(_fill(frame_rgb) + _ellipse(bx, by, bubble, bubble) + "f\n")
+        ops.append(_fill(bg_rgb) + _text(bx + 13, by + 26, "SCAN"))
+    elif frame == "pill":
+        label_w, label_h = _label_size(text)
+        pill_w, pill_h = label_w + 40, label_h + 18
+        x1, y1 = (width - pill_w) // 2, qr_px + 16
+        ops.append(_fill(frame_rgb) + _rounded_rect(x1, y1, pill_w, pill_h, pill_h // 2) + "f\n")
+        ops.append(_fill(bg_rgb) + _text(x1 + 20, y1 + 9, text))
+    if frame in {"corner", "floating", "pill"}:
+        font = writer.add("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+        resources.append(f"/Font << /F1 {font} 0 R >>")
+
+    content = writer.add_stream("", "".join(ops).encode("latin-1"))
+    catalog = writer.reserve()
+    pages = writer.reserve()
+    page = writer.add(
+        f"<< /Type /Page /Parent {pages} 0 R /MediaBox [0 0 {_n(width * scale, 3)} {_n(height * scale, 3)}] "
+        f"/Resources << {' '.join(resources)} >> /Contents {content} 0 R >>"
+    )
+    writer.set(pages, f"<< /Type /Pages /Kids [{page} 0 R] /Count 1 >>")
+    writer.set(catalog, f"<< /Type /Catalog /Pages {pages} 0 R >>")
+    return writer.tobytes(catalog)
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from io import BytesIO
+from typing import Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Palettenbilder bis 256 Farben; Zwei-Farben-Codes werden 1-Bit-PNGs
+MAX_PALETTE = 256
+
+
+def _bit_depth(colors: int) -> int:
+    for bits in (1, 2, 4):
+        if colors <= 1 << bits:
+            return bits
+    return 8
+
+
+def _pack(rgba: np.ndarray) -> np.ndarray:
+    """RGBA-Tupel -> uint32, damit Pixel per searchsorted auf Palettenindizes fallen."""
+    rgba = rgba.astype(np.uint32)
+    return (rgba[..., 0] << 24) | (rgba[..., 1] << 16) | (rgba[..., 2] << 8) | rgba[..., 3]
+
+
+def encode_png(img: Image.Image) -> Tuple[bytes, str]:
+    """
+    PNG mit der kleinsten verlustfreien Darstellung: bis 256 Farben als
+    indiziertes PNG (1/2/4/8 Bit, Transparenz über tRNS), sonst RGB bzw.
+    RGBA, wenn das Bild echte Transparenz hat.
+    Returns: (Bytes, Encoder) – Encoder z. B. "indexed-1bit", "rgb", "rgba".
+    """
+    rgba = img if img.mode == "RGBA" else img.convert("RGBA")
+    colors = rgba.getcolors(MAX_PALETTE)
+    out = BytesIO()
+    if colors is None:
+        opaque = rgba.getextrema()[3][0] == 255
+        (rgba.convert("RGB") if opaque else rgba).save(out, format="PNG")
+        return out.getvalue(), "rgb" if opaque else "rgba"
+
+    palette = np.array(sorted(color for _, color in colors), dtype=np.uint8)
+    indices = np.searchsorted(_pack(palette), _pack(np.asarray(rgba))).astype(np.uint8)
+    indexed = Image.fromarray(indices, "P")
+    indexed.putpalette(palette[:, :3].tobytes())
+
+    bits = _bit_depth(len(palette))
+    options = {"bits": bits, "optimize": True}
+    if palette[:, 3].min() < 255:
+        options["transparency"] = palette[:, 3].tobytes()
+    indexed.save(out, format="PNG", **options)
+    return out.getvalue(), f"indexed-{bits}bit"
+
+
+def encode_webp(img: Image.Image) -> bytes:
+    """Verlustfreies WebP (method 4: guter Kompromiss aus Größe und Zeit)."""
+    out = BytesIO()
+    img.save(out, format="WEBP", lossless=True, method=4)
+    return out.getvalue()
+
+
+def encoder_name(fmt: str, data: bytes) -> Optional[str]:
+    """
+    Encoder aus den fertigen Bytes (IHDR bzw. WebP-Chunk) – gleiche Namen wie
+    encode_png()/render_qr(); so trägt jeder Cache-Treffer seinen Encoder mit.
+    """
+    if fmt == "png" and data[12:16] == b"IHDR":
+        bits, color_type = data[24], data[25]
+        return {3: f"indexed-{bits}bit", 2: "rgb", 6: "rgba"}.get(color_type, f"png-type{color_type}")
+    if fmt == "webp" and data[8:12] == b"WEBP":
+        return "webp-lossless" if b"VP8L" in data[12:64] else "webp-lossy"
+    return None
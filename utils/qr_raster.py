@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any, Tuple
+
+import math
+
+import numpy as np
+import qrcode
+from PIL import Image
+from qrcode.image.styles.colormasks import SolidFillColorMask
+from qrcode.image.styles.moduledrawers import SquareModuleDrawer
+from qrcode.main import ActiveWithNeighbors
+
+BOX_SIZE = 10  # wie _build_qr(): box_size=10
+
+# Stamp-Slots im Atlas: 0 = Hintergrund, 1 = Eye-Modul (immer Quadrat),
+# 2 + Nachbarcode (N<<3 | E<<2 | S<<1 | W) = Datenmodul
+BACKGROUND = 0
+EYE = 1
+FIRST_MODULE = 2
+CONTEXTS = 16
+
+WHITE = (255, 255, 255)
+GRADIENT_KINDS = ("radial", "linear", "diagonal")
+
+
+class _StampCanvas:
+    """Minimaler Ersatz für StyledPilImage, damit die echten qrcode-Drawer Stamps zeichnen."""
+
+    def __init__(self, mode: str, back_color: Tuple[int, ...], paint_color: Tuple[int, ...],
+                 color_mask: Any, slots: int):
+        self.mode = mode
+        self.box_size = BOX_SIZE
+        self.color_mask = color_mask
+        self.paint_color = paint_color
+        # Eine Box Rand oben/links: GappedSquareModuleDrawer zeichnet mit
+        # Float-Koordinaten, die bei 0 anders runden als im echten Raster
+        self._img = Image.new(mode, (slots * BOX_SIZE, 2 * BOX_SIZE), back_color)
+
+
+def _context(code: int) -> ActiveWithNeighbors:
+    return ActiveWithNeighbors(
+        NW=False, N=bool(code & 8), NE=False,
+        W=bool(code & 1), me=True, E=bool(code & 4),
+        SW=False, S=bool(code & 2), SE=False,
+    )
+
+
+def _draw_stamps(module_style: str, color_mask: Any) -> _StampCanvas:
+    """Zeichnet alle Stamp-Slots in Malfarbe auf den Maskenhintergrund (wie StyledPilImage)."""
+    from utils.qr_generator import _module_drawer
+
+    bg = color_mask.back_color
+    paint = tuple(0 for _ in bg)
+    if color_mask.has_transparency:
+        paint = (*bg[:3], 255)
+    slots = FIRST_MODULE + CONTEXTS
+    canvas = _StampCanvas("RGBA" if color_mask.has_transparency else "RGB", bg, paint, color_mask, slots)
+
+    eye_drawer = SquareModuleDrawer()
+    eye_drawer.initialize(img=canvas)
+    top, bottom = BOX_SIZE, 2 * BOX_SIZE - 1
+    eye_drawer.drawrect(((EYE * BOX_SIZE, top), (EYE * BOX_SIZE + BOX_SIZE - 1, bottom)), True)
+
+    drawer = _module_drawer(module_style)
+    drawer.initialize(img=canvas)
+    for code in range(CONTEXTS):
+        x = (FIRST_MODULE + code) * BOX_SIZE
+        active = _context(code) if drawer.needs_neighbors else True
+        drawer.drawrect(((x, top), (x + BOX_SIZE - 1, bottom)), active)
+    return canvas
+
+
+def _to_atlas(img: Image.Image, channels: int) -> np.ndarray:
+    slots = img.width // BOX_SIZE
+    atlas = np.asarray(img)[BOX_SIZE:]
+    atlas = atlas.reshape(BOX_SIZE, slots, BOX_SIZE, channels).transpose(1, 0, 2, 3).copy()
+    atlas.flags.writeable = False
+    return atlas
+
+
+@lru_cache(maxsize=64)
+def stamp_atlas(module_style: str, fg: Tuple[int, ...], bg: Tuple[int, ...]) -> np.ndarray:
+    """
+    Vorberechnete, fertig eingefärbte Modul-Stamps (slots, 10, 10, 4) als RGBA.
+    Gezeichnet mit denselben Drawern und derselben Farbmaske wie StyledPilImage,
+    daher pixelgleich zum bisherigen Pfad.
+    """
+    color_mask = SolidFillColorMask(front_color=fg, back_color=bg)
+    canvas = _draw_stamps(module_style, color_mask)
+    color_mask.initialize(canvas, canvas._img)
+    color_mask.apply_mask(canvas._img)
+    return _to_atlas(canvas._img.convert("RGBA"), 4)
+
+
+@lru_cache(maxsize=16)
+def _paint_atlas(module_style: str) -> np.ndarray:
+    """Ungefärbte Stamps (schwarz auf weiß, inkl. Antialiasing) für Verlaufsmasken."""
+    canvas = _draw_stamps(module_style, SolidFillColorMask(back_color=WHITE))
+    return _to_atlas(canvas._img, 3)
+
+
+def module_ids(qr: qrcode.QRCode) -> np.ndarray:
+    """Stamp-Slot pro Modul (inkl. Quiet Zone) aus der Modulmatrix."""
+    modules = np.array([[bool(v) for v in row] for row in qr.modules], dtype=bool)
+    count = modules.shape[0]
+
+    padded = np.pad(modules, 1)
+    north = padded[:-2, 1:-1]
+    south = padded[2:, 1:-1]
+    west = padded[1:-1, :-2]
+    east = padded[1:-1, 2:]
+    codes = (north.astype(np.int8) << 3) | (east.astype(np.int8) << 2) | (south.astype(np.int8) << 1) | west
+
+    rows = np.arange(count)[:, None]
+    cols = np.arange(count)[None, :]
+    # wie BaseImage.is_eye()
+    eye = ((rows < 7) & (cols < 7)) | ((rows < 7) & (count - cols < 8)) | ((count - rows < 8) & (cols < 7))
+
+    ids = np.where(modules, FIRST_MODULE + codes, BACKGROUND).astype(np.intp)
+    ids[modules & eye] = EYE
+    return np.pad(ids, qr.border, constant_values=BACKGROUND)
+
+
+def rasterize_modules(qr: qrcode.QRCode, module_style: str, fg: Tuple[int, ...], bg: Tuple[int, ...]) -> Image.Image:
+    """
+    Ersetzt StyledPilImage + SolidFillColorMask: setzt das Modulraster
+    (box_size=10) mit einem einzigen NumPy-Gather aus dem Stamp-Atlas zusammen.
+    """
+    atlas = stamp_atlas(str(module_style or "square").strip().lower(), tuple(fg), tuple(bg))
+    ids = module_ids(qr)
+    width = ids.shape[0] * BOX_SIZE
+    pixels = atlas[ids].transpose(0, 2, 1, 3, 4).reshape(width, width, 4)
+    return Image.fromarray(np.ascontiguousarray(pixels), "RGBA")
+
+
+@lru_cache(maxsize=32)
+def gradient_field(kind: str, width: int) -> np.ndarray:
+    """
+    Verlaufsparameter t (0 = Startfarbe, 1 = Endfarbe) pro Pixel, je Art und
+    Rastergröße einmal berechnet. "radial" entspricht exakt
+    RadialGradiantColorMask (Abstand zur Mitte / halbe Diagonale).
+    """
+    coords = np.arange(width, dtype=np.float64)
+    if kind == "linear":
+        t = np.broadcast_to(coords[None, :] / max(1, width - 1), (width, width))
+    elif kind == "diagonal":
+        t = (coords[None, :] + coords[:, None]) / max(1, 2 * (width - 1))
+    else:
+        dx = (coords[None, :] - width / 2) ** 2
+        dy = (coords[:, None] - width / 2) ** 2
+        t = np.sqrt(dx + dy) / (math.sqrt(2) * width / 2)
+    t = np.ascontiguousarray(t)
+    t.flags.writeable = False
+    return t
+
+
+@lru_cache(maxsize=32)
+def gradient_colors(kind: str, width: int, start: Tuple[int, ...], end: Tuple[int, ...]) -> np.ndarray:
+    """Vordergrundfarbe pro Pixel (width, width, 3) wie QRColorMask.interp_color (abgeschnitten)."""
+    t = gradient_field(kind, width)[..., None]
+    start_arr = np.asarray(start[:3], dtype=np.float64)
+    end_arr = np.asarray(end[:3], dtype=np.float64)
+    colors = np.trunc(end_arr * t + start_arr * (1 - t)).astype(np.uint8)
+    colors.flags.writeable = False
+    return colors
+
+
+def rasterize_gradient(qr: qrcode.QRCode, module_style: str, start: Tuple[int, ...], end: Tuple[int, ...],
+                       kind: str = "radial") -> Image.Image:
+    """
+    Ersetzt StyledPilImage + RadialGradiantColorMask: Deckung pro Pixel aus den
+    ungefärbten Stamps, Verlaufsfarben aus dem gecachten Feld, beides in einem
+    Schritt auf Weiß komponiert (wie die Maske: Hintergrund bleibt weiß).
+    """
+    kind = kind if kind in GRADIENT_KINDS else "radial"
+    ids = module_ids(qr)
+    width = ids.shape[0] * BOX_SIZE
+    atlas = _paint_atlas(str(module_style or "square").strip().lower())
+    paint = atlas[ids].transpose(0, 2, 1, 3, 4).reshape(width, width, 3)
+
+    # QRColorMask.extrap_color: Mittel der Kanal-Anteile zwischen Weiß und Schwarz
+    shares = (paint.astype(np.float64) - 255) / -255
+    norm = ((shares[..., 0] + shares[..., 1]) + shares[..., 2]) / 3
+    norm = norm[..., None]
+
+    colors = gradient_colors(kind, width, tuple(start), tuple(end))
+    pixels = np.trunc(colors * norm + 255 * (1 - norm)).astype(np.uint8)
+    return Image.fromarray(pixels, "RGB").convert("RGBA")
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import gzip
+from typing import List, Sequence, Tuple
+
+Rect = Tuple[int, int, int, int]  # x, y, Breite, Höhe in Modulen
+
+# Stile, deren Module als wiederverwendete Form (<defs>/<use>) gezeichnet werden
+ROUNDED_STYLES = {"rounded", "squircle", "soft"}
+
+
+def merged_rects(matrix: Sequence[Sequence[bool]]) -> List[Rect]:
+    """
+    Fasst dunkle Module zu Rechtecken zusammen: horizontale Läufe pro Zeile,
+    identische Läufe in direkt folgenden Zeilen werden nach unten verlängert.
+    """
+    rects: List[Rect] = []
+    open_runs: dict = {}  # (x0, x1) -> y0
+    for y, row in enumerate(matrix):
+        runs = set()
+        x = 0
+        n = len(row)
+        while x < n:
+            if not row[x]:
+                x += 1
+                continue
+            start = x
+            while x < n and row[x]:
+                x += 1
+            runs.add((start, x))
+        for run in list(open_runs):
+            if run not in runs:
+                y0 = open_runs.pop(run)
+                rects.append((run[0], y0, run[1] - run[0], y - y0))
+        for run in runs:
+            open_runs.setdefault(run, y)
+    end = len(matrix)
+    for (x0, x1), y0 in open_runs.items():
+        rects.append((x0, y0, x1 - x0, end - y0))
+    rects.sort(key=lambda r: (r[1], r[0]))
+    return rects
+
+
+def _dark(matrix: Sequence[Sequence[bool]]):
+    for y, row in enumerate(matrix):
+        for x, on in enumerate(row):
+            if on:
+                yield x, y
+
+
+def module_layer(matrix: Sequence[Sequence[bool]], cell: int, pad: int, module_style: str, fg: str) -> str:
+    """
+    SVG-Markup für alle Datenmodule: ein einziger <path> für eckige Stile,
+    <defs>/<use> für Punkte und abgerundete Module.
+    """
+    style = str(module_style or "square").strip().lower()
+
+    if style == "dots" or style in ROUNDED_STYLES:
+        if style == "dots":
+            r = max(1, cell // 2)
+            shape = f'<circle id="m" cx="{r}" cy="{r}" r="{r}"/>'
+        else:
+            rx = max(1, cell // (4 if style == "rounded" else 3))
+            shape = f'<rect id="m" width="{cell}" height="{cell}" rx="{rx}" ry="{rx}"/>'
+        # href (SVG 2) plus xlink:href für SVG-1.1-Werkzeuge (ältere Illustrator/librsvg, RIPs)
+        uses = "".join(
+            f'<use href="#m" xlink:href="#m" x="{pad + x * cell}" y="{pad + y * cell}"/>' for x, y in _dark(matrix)
+        )
+        return f'<defs>{shape}</defs><g fill="{fg}">{uses}</g>'
+
+    if style == "thin-line":
+        line = max(1, cell // 3)
+        inset = (cell - line) // 2
+        d = "".join(
+            f"M{pad + x * cell + inset} {pad + y * cell + inset}h{line}v{line}h-{line}z" for x, y in _dark(matrix)
+        )
+    else:
+        d = "".join(
+            f"M{pad + x * cell} {pad + y * cell}h{w * cell}v{h * cell}h-{w * cell}z"
+            for x, y, w, h in merged_rects(matrix)
+        )
+    return f'<path fill="{fg}" d="{d}"/>' if d else ""
+
+
+def gzip_svg(svg_bytes: bytes) -> bytes:
+    """.svgz: deterministisch (mtime=0), damit Render-Cache und ETags stabil bleiben."""
+    return gzip.compress(svg_bytes, compresslevel=9, mtime=0)
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def _env_float(name: str, fallback: float) -> float:
+    try:
+        return float(os.getenv(name, "") or fallback)
+    except ValueError:
+        return fallback
+
+
+class TokenBucketShield:
+    """
+    Token-Bucket pro Schlüssel (Slug oder IP), im Prozess gehalten.
+    `rate` Tokens pro Sekunde, höchstens `burst` angespart; rate <= 0 schaltet ab.
+    Die Zahl der verfolgten Schlüssel ist begrenzt (LRU), damit zufällige
+    Slugs den Speicher nicht aufblähen.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 20000):
+        self.rate = float(rate)
+        self.burst = max(1.0, float(burst))
+        self.max_keys = max(1, int(max_keys))
+        self._buckets: "OrderedDict[str, tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.allowed = 0
+        self.shed = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def allow(self, key: str, now: Optional[float] = None) -> bool:
+        if not self.enabled:
+            return True
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, last = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1.0:
+                self._buckets[key] = (tokens, now)
+                self._buckets.move_to_end(key)
+                self.shed += 1
+                return False
+            self._buckets[key] = (tokens - 1.0, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            self.allowed += 1
+            return True
+
+    def retry_after(self) -> int:
+        """Sekunden bis wieder ein Token verfügbar ist (für den Retry-After-Header)."""
+        return max(1, int(round(1.0 / self.rate))) if self.enabled else 0
+
+    def clear(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "tracked_keys": len(self._buckets),
+                "allowed": self.allowed,
+                "shed": self.shed,
+            }
+
+
+# Nur DB-Lookups (Cache-Miss-Pfad) von /d/{slug} und /dyn/{public_id} zählen
+slug_shield = TokenBucketShield(
+    rate=_env_float("RESOLVE_SHIELD_SLUG_RATE", 5),
+    burst=_env_float("RESOLVE_SHIELD_SLUG_BURST", 20),
+)
+# Pro IP standardmäßig aus: hinter einem Proxy teilen sich sonst alle Clients
+# eines Knotens einen Bucket. Einschalten mit RESOLVE_SHIELD_IP_RATE=10 (Burst
+# RESOLVE_SHIELD_IP_BURST=50) – hinter Proxys zusammen mit TRUSTED_PROXY_HOPS.
+ip_shield = TokenBucketShield(
+    rate=_env_float("RESOLVE_SHIELD_IP_RATE", 0),
+    burst=_env_float("RESOLVE_SHIELD_IP_BURST", 50),
+)
+# Anzahl vertrauenswürdiger Proxys vor der App; 0 = X-Forwarded-For ignorieren
+TRUSTED_PROXY_HOPS = max(0, int(_env_float("TRUSTED_PROXY_HOPS", 0)))
+
+
+def client_ip(forwarded_for: Optional[str], peer: Optional[str], hops: Optional[int] = None) -> Optional[str]:
+    """
+    Client-IP für den IP-Shield: bei `hops` vertrauenswürdigen Proxys der
+    hops-te Eintrag von rechts in X-Forwarded-For (weiter links kann der
+    Client selbst schreiben), sonst die Peer-Adresse der Verbindung.
+    """
+    hops = TRUSTED_PROXY_HOPS if hops is None else hops
+    if hops and forwarded_for:
+        chain = [part.strip() for part in forwarded_for.split(",") if part.strip()]
+        if chain:
+            return chain[-min(hops, len(chain))]
+    return peer
+
+
+def allow_lookup(slug: str, client_ip: Optional[str]) -> bool:
+    """True, wenn für diesen Slug/diese IP noch ein DB-Lookup erlaubt ist."""
+    if client_ip and not ip_shield.allow(client_ip):
+        return False
+    return slug_shield.allow(slug)
+
+
+def retry_after_seconds() -> int:
+    return max(1, ip_shield.retry_after(), slug_shield.retry_after())
+
+
+def shield_stats() -> Dict[str, Any]:
+    return {"per_slug": slug_shield.stats(), "per_ip": ip_shield.stats()}
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import delete, insert
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from models.qr_redirect import QRRedirect
+from utils.download_artifacts import content_version
+from utils.encryption import decrypt_qr_content, encrypt_qr_content
+from utils.resolve_cache import ResolvedQR
+from utils.schema_cache import mark_table_ready, table_exists
+
+# Schlüssel, die der Resolver nie liest (nur Editor/Renderer)
+_NON_ROUTING_KEYS = {"design", "raw"}
+
+
+def ensure_redirect_table(engine: Engine) -> None:
+    """Erstellt qr_redirects idempotent."""
+    try:
+        QRRedirect.__table__.create(bind=engine, checkfirst=True)
+        mark_table_ready(engine, QRRedirect.__tablename__)
+        print("✅ qr_redirects Tabelle geprüft/ergänzt.")
+    except Exception as exc:
+        print(f"⚠️ Konnte qr_redirects Tabelle nicht automatisch erstellen: {exc}")
+
+
+def redirect_table_ready(bind: Any) -> bool:
+    return table_exists(bind, QRRedirect.__tablename__)
+
+
+def routing_payload(data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {k: v for k, v in (data or {}).items() if k not in _NON_ROUTING_KEYS}
+
+
+def _row_values(qr: Any) -> Dict[str, Any]:
+    payload = routing_payload(qr.get_data(upgrade=False))
+    return {
+        "slug": str(qr.slug),
+        "qr_id": int(qr.id),
+        "user_id": int(qr.user_id),
+        "type": str(qr.type or "").lower(),
+        "active": bool(qr.active if qr.active is not None else True),
+        "payload": encrypt_qr_content(payload) if payload else None,
+        "updated_at": datetime.now(timezone.utc),
+    }
+
+
+def sync_redirect(connection: Connection, qr: Any, previous_slug: Optional[str] = None) -> None:
+    """Schreibt die Read-Model-Zeile für `qr` über die Flush-Connection (gleiche Transaktion)."""
+    if not redirect_table_ready(connection) or not qr.slug or qr.id is None:
+        return
+    table = QRRedirect.__table__
+    slugs = {str(qr.slug)}
+    if previous_slug:
+        slugs.add(str(previous_slug))
+    connection.execute(delete(table).where(table.c.slug.in_(slugs)))
+    connection.execute(insert(table).values(**_row_values(qr)))
+
+
+def delete_redirect(connection: Connection, slug: Optional[str]) -> None:
+    if not slug or not redirect_table_ready(connection):
+        return
+    table = QRRedirect.__table__
+    connection.execute(delete(table).where(table.c.slug == str(slug)))
+
+
+def load_redirect(db: Session, slug: str) -> Optional[ResolvedQR]:
+    """
+    Eine Primärschlüssel-Abfrage auf qr_redirects.
+    None, wenn die Tabelle fehlt oder der Slug (noch) nicht projiziert ist.
+    """
+    if not redirect_table_ready(db.connection()):
+        return None
+    row = db.get(QRRedirect, slug)
+    if row is None:
+        return None
+    data = decrypt_qr_content(row.payload) if row.payload else {}
+    return ResolvedQR(
+        qr_id=int(row.qr_id),
+        slug=str(row.slug),
+        type=str(row.type or "").lower(),
+        user_id=int(row.user_id),
+        active=bool(row.active),
+        data=data or {},
+        version=content_version(row.payload),
+    )
+
+
+def backfill_redirect(db: Session, qr: Any) -> None:
+    """Read-Repair: fehlende Zeile für einen bestehenden QR-Code nachtragen."""
+    if not redirect_table_ready(db.connection()):
+        return
+    try:
+        db.execute(insert(QRRedirect.__table__).values(**_row_values(qr)))
+        db.commit()
+    except Exception:
+        db.rollback()
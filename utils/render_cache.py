@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from utils.logo_cache import file_content_hash
+from utils.qr_generator import render_qr
+from utils.qr_png import encoder_name
+
+# Erhöhen, wenn sich die Render-Ausgabe ändert -> alte Einträge werden nie mehr getroffen
+RENDER_VERSION = 7
+
+RESULT_KEYS = {"png": "bytes", "webp": "webp_bytes", "svg": "svg_bytes", "svgz": "svgz_bytes", "pdf": "pdf_bytes"}
+# Neben den Bildern liegt je Parametersatz ein kleiner JSON-Eintrag mit der
+# Encoding-Entscheidung (Fehlerkorrektur, Version, ...) und den Warnungen
+META_FORMAT = "meta"
+
+
+def _env_int(name: str, fallback: int) -> int:
+    try:
+        return int(os.getenv(name, "") or fallback)
+    except ValueError:
+        return fallback
+
+
+def render_key(fmt: str, params: Dict[str, Any]) -> str:
+    """Stabiler Schlüssel aus Renderparametern; das Logo zählt über seinen Inhalt."""
+    canonical = {k: v for k, v in params.items() if k not in {"logo_path", "filename"}}
+    canonical["logo"] = file_content_hash(params.get("logo_path"))
+    canonical["format"] = fmt
+    canonical["v"] = RENDER_VERSION
+    blob = json.dumps(canonical, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    """
+    Inhaltsadressierter Render-Cache auf der Platte, begrenzt auf `max_bytes`.
+    Der Index (Schlüssel -> Größe, LRU-Reihenfolge) liegt im Speicher und
+    wird beim ersten Zugriff aus dem Verzeichnis aufgebaut.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max(0, int(max_bytes))
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.bytes_in_use = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        entries = []
+        if self.directory.is_dir():
+            for path in self.directory.glob("*/*"):
+                if path.is_file() and not path.name.endswith(".tmp"):
+                    st = path.stat()
+                    entries.append((st.st_mtime, path.name, st.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.bytes_in_use += size
+        self._loaded = True
+        self._evict()
+
+    def _evict(self) -> None:
+        while self._index and self.bytes_in_use > self.max_bytes:
+            key, size = self._index.popitem(last=False)
+            self.bytes_in_use -= size
+            self.evictions += 1
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+
+    def __contains__(self, key: str) -> bool:
+        """Nur Index-Prüfung (ohne Lesen, ohne Hit/Miss-Zählung) – für Batch-Skripte."""
+        with self._lock:
+            self._ensure_loaded()
+            return key in self._index
+
+    def get(self, key: str, record: bool = True) -> Optional[bytes]:
+        """record=False: Treffer/Fehlschlag nicht zählen (Metadaten neben einem Bild)."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            self._ensure_loaded()
+            if key not in self._index:
+                self.misses += record
+                return None
+            self._index.move_to_end(key)
+        try:
+            data = self._path(key).read_bytes()
+        except OSError:
+            # Datei extern gelöscht -> Index bereinigen
+            with self._lock:
+                size = self._index.pop(key, None)
+                if size is not None:
+                    self.bytes_in_use -= size
+                self.misses += record
+            return None
+        with self._lock:
+            self.hits += record
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if not self.enabled or not data or len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{key}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._ensure_loaded()
+            previous = self._index.pop(key, None)
+            if previous is not None:
+                self.bytes_in_use -= previous
+            self._index[key] = len(data)
+            self.bytes_in_use += len(data)
+            self._evict()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._ensure_loaded()
+            for key in list(self._index):
+                try:
+                    self._path(key).unlink()
+                except OSError:
+                    pass
+            self._index.clear()
+            self.bytes_in_use = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "directory": str(self.directory),
+                "entries": len(self._index),
+                "bytes_in_use": self.bytes_in_use,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+render_cache = RenderCache(
+    directory=os.getenv("RENDER_CACHE_DIR", "cache/qr_render"),
+    max_bytes=_env_int("RENDER_CACHE_MAX_MB", 256) * 1024 * 1024,
+)
+
+
+def _lookup(cache: RenderCache, formats: Iterable[str], params: Dict[str, Any]):
+    wanted = [str(fmt).strip().lower() for fmt in formats]
+    unknown = set(wanted) - set(RESULT_KEYS)
+    if unknown:
+        raise ValueError(f"Unbekannte QR-Formate: {sorted(unknown)}")
+    result: Dict[str, Any] = {key: b"" for key in RESULT_KEYS.values()}
+    keys = {fmt: render_key(fmt, params) for fmt in wanted}
+
+    hits = []
+    missing = []
+    for fmt in wanted:
+        data = cache.get(keys[fmt])
+        if data is None:
+            missing.append(fmt)
+        else:
+            result[RESULT_KEYS[fmt]] = data
+            hits.append(fmt)
+    result["cache_hits"] = hits
+    meta = cache.get(render_key(META_FORMAT, params), record=False)
+    result["meta"] = json.loads(meta) if meta else None
+    return result, keys, missing
+
+
+def _meta(rendered: Dict[str, Any]) -> Dict[str, Any]:
+    """Encoding-Entscheidung und Warnungen eines render_qr()-Ergebnisses (ohne Encoder-Namen)."""
+    return {
+        "encoding": {k: v for k, v in rendered["encoding"].items() if not k.endswith("_encoder")},
+        "quality_warnings": list(rendered["quality_warnings"]),
+        "contrast_ratio": rendered["contrast_ratio"],
+    }
+
+
+def _store(cache: RenderCache, result: Dict[str, Any], rendered: Dict[str, Any], keys: Dict[str, str],
+           missing: List[str], params: Dict[str, Any]) -> None:
+    for fmt in missing:
+        data = rendered[RESULT_KEYS[fmt]]
+        result[RESULT_KEYS[fmt]] = data
+        cache.put(keys[fmt], data)
+    if result["meta"] is None:
+        _put_meta(cache, result, rendered, params)
+
+
+def _put_meta(cache: RenderCache, result: Dict[str, Any], rendered: Dict[str, Any], params: Dict[str, Any]) -> None:
+    result["meta"] = _meta(rendered)
+    cache.put(render_key(META_FORMAT, params), json.dumps(result["meta"]).encode("utf-8"))
+
+
+def _fill_meta(cache: RenderCache, result: Dict[str, Any], params: Dict[str, Any]) -> None:
+    """Voller Treffer ohne Metadaten: render_qr() ohne Formate baut nur die Matrix."""
+    _put_meta(cache, result, render_qr(formats=(), **params), params)
+
+
+def _finish(result: Dict[str, Any], formats: List[str]) -> Dict[str, Any]:
+    """encoding wie in render_qr() – auch für Cache-Treffer – plus Warnungen und Kontrast."""
+    meta = result.pop("meta")
+    result["encoding"] = {
+        **meta["encoding"],
+        **{f"{fmt}_encoder": encoder_name(fmt, result[RESULT_KEYS[fmt]])
+           for fmt in ("png", "webp") if fmt in formats},
+    }
+    result["quality_warnings"] = meta["quality_warnings"]
+    result["contrast_ratio"] = meta["contrast_ratio"]
+    return result
+
+
+def render_qr_cached(formats: Iterable[str] = ("png",), cache: Optional[RenderCache] = None,
+                     **params: Any) -> Dict[str, Any]:
+    """
+    Wie render_qr (ohne save_to_disk), aber jedes Format wird zuerst im
+    Render-Cache gesucht; nur fehlende Formate werden gerendert.
+    Returns: {'bytes', 'webp_bytes', 'svg_bytes', 'svgz_bytes', 'pdf_bytes', 'cache_hits',
+    'encoding', 'quality_warnings', 'contrast_ratio'}; encoding wie in render_qr(), die
+    Encoder-Namen nur für angefragte Rasterformate. Fehlt bei vollem Treffer der
+    Metadaten-Eintrag (verdrängt, von Skripten befüllt), liefert ihn render_qr()
+    ohne Formate – das baut nur die Matrix, ohne zu rendern.
+    """
+    cache = cache or render_cache
+    result, keys, missing = _lookup(cache, formats, params)
+    if missing:
+        _store(cache, result, render_qr(formats=missing, **params), keys, missing, params)
+    elif result["meta"] is None:
+        _fill_meta(cache, result, params)
+    return _finish(result, list(keys))
+
+
+async def render_qr_cached_async(formats: Iterable[str] = ("png",), cache: Optional[RenderCache] = None,
+                                 **params: Any) -> Dict[str, Any]:
+    """
+    Wie render_qr_cached(); fehlende Formate rendert der Render-Pool, Cache-
+    Lesen und -Schreiben (Dateizugriffe, Logo-Hash) laufen in einem Thread –
+    beides außerhalb des Event-Loops.
+    """
+    from utils.render_pool import render_qr_async
+
+    cache = cache or render_cache
+    result, keys, missing = await asyncio.to_thread(_lookup, cache, formats, params)
+    if missing:
+        rendered = await render_qr_async(formats=missing, **params)
+        await asyncio.to_thread(_store, cache, result, rendered, keys, missing, params)
+    elif result["meta"] is None:
+        await asyncio.to_thread(_fill_meta, cache, result, params)
+    return _finish(result, list(keys))
@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from utils.qr_generator import render_qr
+
+logger = logging.getLogger(__name__)
+
+
+def _env_int(name: str, fallback: int) -> int:
+    try:
+        return int(os.getenv(name, "") or fallback)
+    except ValueError:
+        return fallback
+
+
+class RenderPoolBusy(RuntimeError):
+    """Alle Worker belegt und Warteschlange voll – Aufrufer antwortet mit 503."""
+
+
+def _render_job(params: Dict[str, Any]) -> Tuple[float, float, Dict[str, Any]]:
+    # time.time(), weil Start/Ende aus einem anderen Prozess kommen
+    started = time.time()
+    result = render_qr(**params)
+    return started, time.time(), result
+
+
+class RenderPool:
+    """
+    Führt render_qr() außerhalb des Event-Loops aus.
+
+    Modi:
+      - "process": ProcessPoolExecutor (spawn) mit `workers` Prozessen.
+      - "thread": ThreadPoolExecutor, z. B. für Tests oder kleine Instanzen.
+
+    `workers` 0 = Anzahl CPU-Kerne, `max_queue` None/negativ = 2 * workers.
+    Angenommen werden höchstens `workers + max_queue` Renders gleichzeitig;
+    darüber wartet der Aufrufer bis `wait_timeout` Sekunden auf einen Platz
+    und bekommt dann RenderPoolBusy.
+    """
+
+    def __init__(self, mode: str = "process", workers: int = 0, max_queue: Optional[int] = None,
+                 wait_timeout: float = 2.0):
+        self.mode = mode if mode in {"process", "thread"} else "process"
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.max_queue = 2 * self.workers if max_queue is None or max_queue < 0 else int(max_queue)
+        self.wait_timeout = max(0.0, float(wait_timeout))
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.queue_ms_total = 0.0
+        self.queue_ms_max = 0.0
+        self.render_ms_total = 0.0
+        self.render_ms_max = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.max_queue
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "thread":
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="qr-render")
+                else:
+                    # spawn statt fork: der Elternprozess hat bereits Threads (Scan-Ingest)
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                    )
+            return self._executor
+
+    def submit(self, params: Dict[str, Any]) -> "Future[Tuple[float, float, Dict[str, Any]]]":
+        """
+        Direkter Zugriff für Stapelverarbeitung (Bulk-Jobs): ohne Admission,
+        der Aufrufer begrenzt selbst, wie viele Renders gleichzeitig offen sind.
+        Ergebnis: (Start, Ende, render_qr-Resultat).
+        """
+        try:
+            return self._get_executor().submit(_render_job, params)
+        except BrokenProcessPool:
+            with self._lock:
+                self._executor = None
+            return self._get_executor().submit(_render_job, params)
+
+    def _try_admit(self) -> bool:
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                return False
+            self.in_flight += 1
+            self.submitted += 1
+            return True
+
+    async def _admit(self) -> None:
+        deadline = time.monotonic() + self.wait_timeout
+        while not self._try_admit():
+            if time.monotonic() >= deadline:
+                with self._lock:
+                    self.rejected += 1
+                raise RenderPoolBusy("QR-Render-Warteschlange voll")
+            await asyncio.sleep(0.02)
+
+    async def render(self, **params: Any) -> Dict[str, Any]:
+        """
+        Wie render_qr(), aber awaitable. Das Ergebnis enthält zusätzlich
+        'timings' = {'queue_ms', 'render_ms'}.
+        """
+        await self._admit()
+        queued = time.time()
+        try:
+            executor = self._get_executor()
+            started, finished, result = await asyncio.get_running_loop().run_in_executor(
+                executor, _render_job, params
+            )
+        except BrokenProcessPool:
+            # Worker abgestürzt (z. B. OOM) -> beim nächsten Render neu aufbauen
+            with self._lock:
+                self._executor = None
+                self.failed += 1
+            raise
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+        queue_ms = max(0.0, (started - queued) * 1000)
+        render_ms = max(0.0, (finished - started) * 1000)
+        with self._lock:
+            self.completed += 1
+            self.queue_ms_total += queue_ms
+            self.queue_ms_max = max(self.queue_ms_max, queue_ms)
+            self.render_ms_total += render_ms
+            self.render_ms_max = max(self.render_ms_max, render_ms)
+        logger.info("QR-Render: %.1f ms Warteschlange, %.1f ms Rendern", queue_ms, render_ms)
+        result["timings"] = {"queue_ms": round(queue_ms, 2), "render_ms": round(render_ms, 2)}
+        return result
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            done = self.completed or 1
+            return {
+                "mode": self.mode,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "in_flight": self.in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "queue_ms_avg": round(self.queue_ms_total / done, 2),
+                "queue_ms_max": round(self.queue_ms_max, 2),
+                "render_ms_avg": round(self.render_ms_total / done, 2),
+                "render_ms_max": round(self.render_ms_max, 2),
+            }
+
+
+render_pool = RenderPool(
+    mode=os.getenv("RENDER_POOL_MODE", "process").strip().lower() or "process",
+    workers=_env_int("RENDER_POOL_WORKERS", 0),
+    max_queue=_env_int("RENDER_POOL_QUEUE", -1),
+    wait_timeout=_env_int("RENDER_POOL_WAIT_MS", 2000) / 1000.0,
+)
+
+
+async def render_qr_async(**params: Any) -> Dict[str, Any]:
+    """Awaitable render_qr() über den globalen Render-Pool."""
+    return await render_pool.render(**params)
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, Dict, Optional
+
+from utils.routing_rules import CompiledRouting, compile_routing
+
+
+@dataclass(frozen=True)
+class ResolvedQR:
+    """Vorberechneter Auflösungsdatensatz für GET /d/{slug}."""
+
+    qr_id: int
+    slug: str
+    type: str
+    user_id: int
+    active: bool
+    data: Dict[str, Any] = field(default_factory=dict)
+    version: str = ""  # Inhaltsversion (Hash des gespeicherten Blobs)
+
+    @cached_property
+    def routing(self) -> CompiledRouting:
+        """Regeln/A-B-Ziele einmal pro Datensatz (= QR-Version) kompilieren."""
+        return compile_routing(self.data)
+
+
+def _env_int(name: str, fallback: int) -> int:
+    try:
+        return int(os.getenv(name, "") or fallback)
+    except ValueError:
+        return fallback
+
+
+class ResolveCache:
+    """
+    Begrenzter LRU/TTL-Cache slug -> ResolvedQR (pro Prozess).
+    Einträge laufen nach `ttl` Sekunden ab, damit Änderungen aus anderen
+    Worker-Prozessen spätestens dann sichtbar werden.
+
+    Zusätzlich merkt sich der Cache unbekannte/inaktive Slugs für kurze Zeit
+    (`negative_ttl`), damit wiederholte 404-Anfragen die DB nicht erreichen.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 5000,
+        ttl: float = 60.0,
+        negative_ttl: float = 10.0,
+        max_negative: int = 10000,
+    ):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self.negative_ttl = float(negative_ttl)
+        self.max_negative = max(1, int(max_negative))
+        self._entries: "OrderedDict[str, tuple[float, ResolvedQR]]" = OrderedDict()
+        self._negative: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.negative_hits = 0
+
+    def get(self, slug: str) -> Optional[ResolvedQR]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(slug)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, record = entry
+            if expires_at <= now:
+                del self._entries[slug]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(slug)
+            self.hits += 1
+            return record
+
+    def put(self, record: ResolvedQR) -> None:
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[record.slug] = (expires_at, record)
+            self._entries.move_to_end(record.slug)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def is_known_missing(self, slug: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._negative.get(slug)
+            if expires_at is None:
+                return False
+            if expires_at <= now:
+                del self._negative[slug]
+                return False
+            self.negative_hits += 1
+            return True
+
+    def put_missing(self, slug: str) -> None:
+        if self.negative_ttl <= 0:
+            return
+        expires_at = time.monotonic() + self.negative_ttl
+        with self._lock:
+            self._negative[slug] = expires_at
+            self._negative.move_to_end(slug)
+            while len(self._negative) > self.max_negative:
+                self._negative.popitem(last=False)
+
+    def invalidate(self, slug: str) -> None:
+        with self._lock:
+            removed = self._entries.pop(slug, None) is not None
+            removed = self._negative.pop(slug, None) is not None or removed
+            if removed:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._negative.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "negative_entries": len(self._negative),
+                "negative_ttl_seconds": self.negative_ttl,
+                "negative_hits": self.negative_hits,
+            }
+
+
+resolve_cache = ResolveCache(
+    max_entries=_env_int("RESOLVE_CACHE_SIZE", 5000),
+    ttl=_env_int("RESOLVE_CACHE_TTL", 60),
+    negative_ttl=_env_int("RESOLVE_NEGATIVE_TTL", 10),
+    max_negative=_env_int("RESOLVE_NEGATIVE_SIZE", 10000),
+)
+
+
+def invalidate_resolved_qr(slug: Optional[str]) -> None:
+    """Entfernt einen Slug aus dem Resolver-Cache (nach Edit/Delete/Deaktivierung)."""
+    if slug:
+        resolve_cache.invalidate(str(slug))
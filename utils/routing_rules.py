@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import bisect
+import random
+import re
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from utils.user_agent import classify_user_agent
+
+_TIME_RE = re.compile(r"^(\d{1,2}):(\d{2})$")
+
+
+def _language_tokens(accept_language: str) -> FrozenSet[str]:
+    """'de-DE,de;q=0.9,en;q=0.8' -> {'de-de', 'de', 'en'} (voller Tag + Primär-Subtag)."""
+    tokens = set()
+    for part in (accept_language or "").lower().split(","):
+        tag = part.split(";", 1)[0].strip()
+        if not tag or tag == "*":
+            continue
+        tokens.add(tag)
+        tokens.add(tag.split("-", 1)[0])
+    return frozenset(tokens)
+
+
+def _parse_minutes(value: Any) -> Optional[int]:
+    match = _TIME_RE.match(str(value or "").strip())
+    if not match:
+        return None
+    hours, minutes = int(match.group(1)), int(match.group(2))
+    if hours > 23 or minutes > 59:
+        return None
+    return hours * 60 + minutes
+
+
+@dataclass(frozen=True)
+class RequestAttributes:
+    """Routing-relevante Merkmale eines Requests – einmal pro Request ermittelt."""
+
+    country: str
+    languages: FrozenSet[str]
+    device: str
+    accept_language: str
+
+    @classmethod
+    def from_request(cls, request: Any) -> "RequestAttributes":
+        headers = request.headers
+        accept_language = headers.get("accept-language") or ""
+        return cls(
+            country=(headers.get("x-country") or request.query_params.get("country") or "").upper(),
+            languages=_language_tokens(accept_language),
+            device=classify_user_agent(headers.get("user-agent")).device_class,
+            accept_language=accept_language,
+        )
+
+
+def _index(values: Iterable[Tuple[int, Iterable[str]]]) -> Tuple[int, Dict[str, int]]:
+    """
+    Baut pro Dimension einen Bitmasken-Index:
+    (Maske der Regeln ohne Einschränkung, Wert -> Maske der Regeln, die ihn erlauben).
+    """
+    unrestricted = 0
+    by_value: Dict[str, int] = {}
+    for bit, accepted in values:
+        accepted = set(accepted)
+        if not accepted:
+            unrestricted |= bit
+            continue
+        for value in accepted:
+            by_value[value] = by_value.get(value, 0) | bit
+    return unrestricted, by_value
+
+
+class CompiledRouting:
+    """
+    Unveränderliche, vorkompilierte Form von data["rules"] und data["ab_targets"].
+
+    Jede Regel bekommt ein Bit; Land, Sprache und Gerät werden über
+    Wert -> Bitmaske nachgeschlagen, sodass die Auswertung nicht mit der
+    Regelanzahl wächst. Die erste passende Regel (niedrigstes Bit) gewinnt,
+    wie bei der bisherigen sequentiellen Prüfung.
+    """
+
+    __slots__ = (
+        "_targets", "_country", "_language", "_device",
+        "_untimed", "_windows", "_ab_urls", "_ab_cumulative",
+    )
+
+    def __init__(self, data: Dict[str, Any]):
+        targets: List[str] = []
+        countries: List[Tuple[int, Iterable[str]]] = []
+        languages: List[Tuple[int, Iterable[str]]] = []
+        devices: List[Tuple[int, Iterable[str]]] = []
+        untimed = 0
+        windows: List[Tuple[int, int, int]] = []
+
+        for rule in data.get("rules") or []:
+            if not isinstance(rule, dict):
+                continue
+            # Regeln ohne Ziel wurden auch bisher übersprungen
+            target = str(rule.get("target_url") or "")
+            if not target:
+                continue
+            bit = 1 << len(targets)
+            targets.append(target)
+            countries.append((bit, (str(c).upper() for c in rule.get("countries") or [])))
+            languages.append((bit, (str(l).lower() for l in rule.get("languages") or [])))
+            devices.append((bit, (str(d).lower() for d in rule.get("devices") or [])))
+
+            from_raw = str(rule.get("time_from", "")).strip()
+            to_raw = str(rule.get("time_to", "")).strip()
+            if not (from_raw and to_raw):
+                untimed |= bit
+                continue
+            start, end = _parse_minutes(from_raw), _parse_minutes(to_raw)
+            # Ungültige Zeitangaben matchen nie; Fenster über Mitternacht ebenfalls nicht
+            if start is not None and end is not None:
+                windows.append((bit, start, end))
+
+        self._targets = tuple(targets)
+        self._country = _index(countries)
+        self._language = _index(languages)
+        self._device = _index(devices)
+        self._untimed = untimed
+        self._windows = tuple(windows)
+
+        urls: List[str] = []
+        cumulative: List[float] = []
+        total = 0.0
+        for item in data.get("ab_targets") or []:
+            if not isinstance(item, dict) or not item.get("url"):
+                continue
+            try:
+                weight = float(item.get("weight", 1.0) or 1.0)
+            except (TypeError, ValueError):
+                weight = 1.0
+            if weight <= 0:
+                continue
+            total += weight
+            urls.append(str(item["url"]))
+            cumulative.append(total)
+        self._ab_urls = tuple(urls)
+        self._ab_cumulative = tuple(cumulative)
+
+    @property
+    def rule_count(self) -> int:
+        return len(self._targets)
+
+    def match_rule(self, attrs: RequestAttributes, now: Optional[datetime] = None) -> Optional[str]:
+        if not self._targets:
+            return None
+
+        unrestricted, by_value = self._country
+        mask = unrestricted | by_value.get(attrs.country, 0)
+        if not mask:
+            return None
+
+        unrestricted, by_value = self._language
+        lang_mask = unrestricted
+        for token in attrs.languages:
+            lang_mask |= by_value.get(token, 0)
+        mask &= lang_mask
+
+        unrestricted, by_value = self._device
+        mask &= unrestricted | by_value.get(attrs.device, 0)
+        if not mask:
+            return None
+
+        time_mask = self._untimed
+        if self._windows:
+            current = now or datetime.now(timezone.utc)
+            minute = current.hour * 60 + current.minute
+            for bit, start, end in self._windows:
+                if start <= minute <= end:
+                    time_mask |= bit
+        mask &= time_mask
+        if not mask:
+            return None
+        return self._targets[(mask & -mask).bit_length() - 1]
+
+    def pick_ab_target(self, rng: Optional[random.Random] = None) -> Optional[str]:
+        if not self._ab_urls:
+            return None
+        point = (rng or random).random() * self._ab_cumulative[-1]
+        index = bisect.bisect_right(self._ab_cumulative, point)
+        return self._ab_urls[min(index, len(self._ab_urls) - 1)]
+
+
+def compile_routing(data: Optional[Dict[str, Any]]) -> CompiledRouting:
+    return CompiledRouting(data or {})
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from models.qr_conversion import QRConversion
+from models.qr_scan import QRScan
+from utils.scan_rollups import apply_scan_rollups
+
+logger = logging.getLogger(__name__)
+
+SCAN = "scan"
+CONVERSION = "conversion"
+
+_TABLES = {
+    SCAN: QRScan.__table__,
+    CONVERSION: QRConversion.__table__,
+}
+
+
+def _env_int(name: str, fallback: int) -> int:
+    try:
+        return int(os.getenv(name, "") or fallback)
+    except ValueError:
+        return fallback
+
+
+class ScanIngestor:
+    """
+    Nimmt Scan- und Conversion-Events vom Redirect-Pfad ab und schreibt sie
+    gebündelt (Multi-Row-INSERT) in qr_scans / qr_conversions.
+
+    Modi:
+      - "buffered": Hintergrund-Thread, Flush bei `batch_size` Events oder
+        spätestens nach `flush_interval` Sekunden. Backlog ist begrenzt;
+        überzählige Events werden verworfen und gezählt. Schlägt ein Flush
+        fehl (Verbindungsabbruch, Failover), wird er bis zu `retries`-mal mit
+        Backoff wiederholt, erst danach gilt der Batch als verloren.
+      - "sync": schreibt sofort über die Session des Requests (für Tests).
+
+    Die Dashboard-Rollups folgen in einer eigenen Transaktion nach dem Commit
+    der Rohdaten: ein Fehler dort (Deadlock auf heißen Rollup-Zeilen) kostet
+    keine Scans, er wird gezählt und per scripts/rebuild_scan_rollups.py repariert.
+    """
+
+    def __init__(
+        self,
+        mode: str = "buffered",
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_backlog: int = 10000,
+        session_factory: Optional[Callable[[], Session]] = None,
+        retries: int = 3,
+        retry_backoff: float = 0.2,
+    ):
+        self.mode = mode
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = max(0.01, float(flush_interval))
+        self.max_backlog = max(1, int(max_backlog))
+        self.retries = max(0, int(retries))
+        self.retry_backoff = max(0.0, float(retry_backoff))
+        self._session_factory = session_factory
+        self._queue: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue(maxsize=self.max_backlog)
+        self._stop = threading.Event()
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.flushes = 0
+        self.errors = 0
+        self.lost = 0
+        self.rollup_errors = 0
+
+    # ------------------------------------------------------------------
+    # Konfiguration
+    # ------------------------------------------------------------------
+    def configure(
+        self,
+        mode: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        session_factory: Optional[Callable[[], Session]] = None,
+    ) -> None:
+        if mode is not None:
+            if mode != self.mode and mode == "sync":
+                self.shutdown()
+            self.mode = mode
+        if batch_size is not None:
+            self.batch_size = max(1, int(batch_size))
+        if flush_interval is not None:
+            self.flush_interval = max(0.01, float(flush_interval))
+        if session_factory is not None:
+            self._session_factory = session_factory
+
+    def _new_session(self) -> Session:
+        if self._session_factory is None:
+            from database import SessionLocal
+            self._session_factory = SessionLocal
+        return self._session_factory()
+
+    # ------------------------------------------------------------------
+    # Annahme
+    # ------------------------------------------------------------------
+    def submit(self, db: Optional[Session], events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Übernimmt Events; im sync-Modus in einem Commit über `db`."""
+        if not events:
+            return
+        if self.mode == "sync":
+            self._write_sync(db, events)
+            return
+
+        self._ensure_worker()
+        for event in events:
+            try:
+                self._queue.put_nowait(event)
+                self.enqueued += 1
+            except queue.Full:
+                self.dropped += 1
+
+    def record_scan(self, db: Optional[Session], scan: Optional[Dict[str, Any]] = None,
+                    conversion: Optional[Dict[str, Any]] = None) -> None:
+        events: List[Tuple[str, Dict[str, Any]]] = []
+        if scan:
+            events.append((SCAN, scan))
+        if conversion:
+            events.append((CONVERSION, conversion))
+        self.submit(db, events)
+
+    def _write_sync(self, db: Optional[Session], events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        own_session = db is None
+        session = db or self._new_session()
+        try:
+            try:
+                self._insert_batch(session, events)
+                session.commit()
+            except Exception as exc:
+                session.rollback()
+                self.errors += 1
+                self.lost += len(events)
+                logger.warning("Scan-Ingest (sync) fehlgeschlagen: %s", exc)
+                return
+            self.written += len(events)
+            self.flushes += 1
+            # im Request-Pfad ohne Backoff
+            self._apply_rollups(session, events, retries=0)
+        finally:
+            if own_session:
+                session.close()
+
+    @staticmethod
+    def _insert_batch(session: Session, events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for kind, row in events:
+            grouped.setdefault(kind, []).append(row)
+        # Scans zuerst: gleiche Reihenfolge wie bisher im Resolver
+        for kind in (SCAN, CONVERSION):
+            rows = grouped.get(kind)
+            if rows:
+                session.execute(insert(_TABLES[kind]), rows)
+
+    def _apply_rollups(self, session: Session, events: List[Tuple[str, Dict[str, Any]]],
+                       retries: Optional[int] = None) -> None:
+        """Rollups nach dem Commit der Rohdaten, eigene Transaktion mit Wiederholung."""
+        scans = [row for kind, row in events if kind == SCAN]
+        if not scans:
+            return
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            try:
+                apply_scan_rollups(session, scans)
+                session.commit()
+                return
+            except Exception as exc:
+                session.rollback()
+                if attempt >= retries:
+                    self.rollup_errors += 1
+                    logger.warning(
+                        "Scan-Rollups für %s Scans nicht fortgeschrieben (%s) – "
+                        "scripts/rebuild_scan_rollups.py baut sie neu auf", len(scans), exc,
+                    )
+                    return
+                time.sleep(self.retry_backoff * 2 ** attempt)
+
+    # ------------------------------------------------------------------
+    # Hintergrund-Worker
+    # ------------------------------------------------------------------
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name="scan-ingest", daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        batch: List[Tuple[str, Dict[str, Any]]] = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+
+            now = time.monotonic()
+            if len(batch) >= self.batch_size or (batch and now >= deadline):
+                self._flush(batch)
+                batch = []
+            if now >= deadline:
+                deadline = now + self.flush_interval
+
+            if self._stop.is_set() and self._queue.empty():
+                break
+
+        # Drain: alles, was noch in der Queue steckt, wegschreiben
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._flush(batch)
+                batch = []
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch: List[Tuple[str, Dict[str, Any]]]) -> None:
+        for attempt in range(self.retries + 1):
+            session = self._new_session()
+            try:
+                self._insert_batch(session, batch)
+                session.commit()
+            except Exception as exc:
+                session.rollback()
+                session.close()
+                self.errors += 1
+                if attempt >= self.retries:
+                    self.lost += len(batch)
+                    logger.warning("Scan-Ingest: Batch mit %s Events nach %s Versuchen verworfen: %s",
+                                   len(batch), attempt + 1, exc)
+                    return
+                logger.info("Scan-Ingest: Flush fehlgeschlagen (%s), neuer Versuch", exc)
+                time.sleep(self.retry_backoff * 2 ** attempt)
+                continue
+            self.written += len(batch)
+            self.flushes += 1
+            try:
+                self._apply_rollups(session, batch)
+            finally:
+                session.close()
+            return
+
+    def shutdown(self, timeout: float = 10.0) -> None:
+        """Stoppt den Worker und schreibt den restlichen Backlog weg."""
+        worker = self._worker
+        if worker is None:
+            return
+        self._stop.set()
+        worker.join(timeout=timeout)
+        self._worker = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "backlog": self._queue.qsize(),
+            "max_backlog": self.max_backlog,
+            "batch_size": self.batch_size,
+            "flush_interval_seconds": self.flush_interval,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "dropped": self.dropped,
+            "flushes": self.flushes,
+            "errors": self.errors,
+            "lost": self.lost,
+            "rollup_errors": self.rollup_errors,
+        }
+
+
+scan_ingestor = ScanIngestor(
+    mode=os.getenv("SCAN_INGEST_MODE", "buffered").strip().lower() or "buffered",
+    batch_size=_env_int("SCAN_INGEST_BATCH", 200),
+    flush_interval=_env_int("SCAN_INGEST_INTERVAL_MS", 1000) / 1000.0,
+    max_backlog=_env_int("SCAN_INGEST_MAX_BACKLOG", 10000),
+    retries=_env_int("SCAN_INGEST_RETRIES", 3),
+)
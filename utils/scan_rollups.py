@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import weakref
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import Table, delete, insert, inspect, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from models.qr_scan import QRScan
+from models.scan_rollup import ScanRollupDaily, ScanRollupHourly, ScanRollupState
+from utils.schema_cache import mark_table_ready, table_exists
+from utils.user_agent import classify_user_agent
+
+TEST_IPS = {"127.0.0.1", "::1", "localhost"}
+
+HOURLY = ScanRollupHourly.__table__
+DAILY = ScanRollupDaily.__table__
+STATE = ScanRollupState.__table__
+
+# Engines, deren Backfill abgeschlossen ist (ändert sich danach nicht mehr)
+_backfilled: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+def ensure_scan_rollup_tables(engine: Engine) -> None:
+    """
+    Erstellt die Scan-Rollup-Tabellen (stündlich/täglich) idempotent. Ohne
+    bisherige Scans gibt es nichts nachzutragen -> gleich als aufgebaut markiert.
+    """
+    try:
+        for table in (HOURLY, DAILY, STATE):
+            table.create(bind=engine, checkfirst=True)
+            mark_table_ready(engine, table.name)
+        with engine.begin() as conn:
+            scans = QRScan.__table__
+            has_scans = inspect(conn).has_table(scans.name) and conn.execute(
+                select(scans.c.id).limit(1)
+            ).first() is not None
+            if not has_scans:
+                _mark_backfilled(conn)
+        print("✅ Scan-Rollup-Tabellen geprüft/ergänzt.")
+    except Exception as exc:
+        print(f"⚠️ Konnte Scan-Rollup-Tabellen nicht automatisch erstellen: {exc}")
+
+
+def rollups_ready(bind: Any) -> bool:
+    return table_exists(bind, HOURLY.name) and table_exists(bind, DAILY.name)
+
+
+def rollups_backfilled(bind: Any) -> bool:
+    """Rollups existieren und enthalten die Historie (Backfill gelaufen)."""
+    engine = getattr(bind, "engine", bind)
+    if engine in _backfilled:
+        return True
+    if not rollups_ready(bind) or not table_exists(bind, STATE.name):
+        return False
+    done = bind.execute(select(STATE.c.id).where(STATE.c.id == 1)).first() is not None
+    if done:
+        _backfilled.add(engine)
+    return done
+
+
+def _mark_backfilled(conn: Any) -> None:
+    if conn.execute(select(STATE.c.id).where(STATE.c.id == 1)).first() is None:
+        conn.execute(STATE.insert().values(id=1, backfilled_at=_naive_utc(None)))
+
+
+def mark_backfilled(session: Session) -> None:
+    """Vom Rebuild-Skript nach einem vollständigen Backfill gesetzt."""
+    _mark_backfilled(session.connection())
+
+
+def rollup_dimensions(location: Optional[str], user_agent: Optional[str]) -> Tuple[str, bool, bool]:
+    """
+    (device_class, is_test, is_bot) eines Scans – wie im Dashboard gruppiert.
+    Test = lokale IP oder Test-Tool (curl, Postman, Insomnia, HTTPie).
+    """
+    info = classify_user_agent(user_agent)
+    device_class = info.device_class
+    if device_class == "other" and (info.is_bot or info.is_test_tool):
+        device_class = "bot"
+    is_test = (location or "") in TEST_IPS or info.is_test_tool
+    return device_class, is_test, info.is_bot
+
+
+def _naive_utc(ts: Optional[datetime]) -> datetime:
+    if ts is None:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def aggregate_scans(scans: Iterable[Dict[str, Any]]) -> Tuple[Counter, Counter]:
+    """
+    Verdichtet Scan-Zeilen (qr_id, timestamp, location, user_agent bzw. device)
+    zu stündlichen und täglichen Zählern.
+    """
+    hourly: Counter = Counter()
+    daily: Counter = Counter()
+    for scan in scans:
+        ts = _naive_utc(scan.get("timestamp"))
+        ua = scan.get("user_agent") or scan.get("device")
+        dims = rollup_dimensions(scan.get("location"), ua)
+        qr_id = int(scan["qr_id"])
+        hourly[(qr_id, ts.replace(minute=0, second=0, microsecond=0)) + dims] += 1
+        daily[(qr_id, ts.replace(hour=0, minute=0, second=0, microsecond=0)) + dims] += 1
+    return hourly, daily
+
+
+def _rows(counts: Counter) -> list[Dict[str, Any]]:
+    return [
+        {
+            "qr_id": qr_id,
+            "bucket": bucket,
+            "device_class": device_class,
+            "is_test": is_test,
+            "is_bot": is_bot,
+            "scans": count,
+        }
+        for (qr_id, bucket, device_class, is_test, is_bot), count in counts.items()
+    ]
+
+
+def _upsert(session: Session, table: Table, counts: Counter) -> None:
+    """
+    Addiert Zähler per dialektspezifischem Upsert (MySQL / SQLite / PostgreSQL),
+    sonst portabel: UPDATE je Zeile, INSERT, wenn keine Zeile getroffen wurde.
+    """
+    rows = _rows(counts)
+    if not rows:
+        return
+    dialect = session.get_bind().dialect.name
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(scans=table.c.scans + stmt.inserted.scans)
+    elif dialect in {"sqlite", "postgresql"}:
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[col.name for col in table.primary_key.columns],
+            set_={"scans": table.c.scans + stmt.excluded.scans},
+        )
+    else:
+        _update_or_insert(session, table, rows)
+        return
+    session.execute(stmt, rows)
+
+
+def _update_or_insert(session: Session, table: Table, rows: list[Dict[str, Any]]) -> None:
+    keys = [col.name for col in table.primary_key.columns]
+    for row in rows:
+        match = [table.c[key] == row[key] for key in keys]
+        result = session.execute(update(table).where(*match).values(scans=table.c.scans + row["scans"]))
+        if result.rowcount == 0:
+            session.execute(insert(table).values(**row))
+
+
+def apply_scan_rollups(session: Session, scans: Iterable[Dict[str, Any]]) -> None:
+    """
+    Zählt Scans in die Rollups ein – in derselben Transaktion wie der INSERT
+    in qr_scans (Aufruf aus dem Scan-Ingest).
+    """
+    if not rollups_ready(session.connection()):
+        return
+    hourly, daily = aggregate_scans(scans)
+    _upsert(session, HOURLY, hourly)
+    _upsert(session, DAILY, daily)
+
+
+def clear_scan_rollups(session: Session, since: Optional[datetime] = None) -> None:
+    """Löscht Rollups (ab `since`, auf Tagesanfang gerundet) für einen Neuaufbau."""
+    for table in (HOURLY, DAILY):
+        stmt = delete(table)
+        if since is not None:
+            day_start = _naive_utc(since).replace(hour=0, minute=0, second=0, microsecond=0)
+            stmt = stmt.where(table.c.bucket >= day_start)
+        session.execute(stmt)
@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from models.coupon_redemption import CouponRedemption
+from models.feedback_entry import FeedbackEntry
+from models.lead_capture import LeadCapture
+from models.qr_conversion import QRConversion
+from models.qr_scan import QRScan
+from models.scan_rollup import ScanRollupDaily, ScanRollupHourly
+from utils.scan_rollups import TEST_IPS, rollup_dimensions, rollups_backfilled
+
+
+@dataclass(frozen=True)
+class DayBucket:
+    day: date
+    device_class: str  # ios | android | desktop | other | bot
+    qr_id: int
+    scans: int
+
+
+@dataclass(frozen=True)
+class HourBucket:
+    hour: datetime  # naive UTC, auf volle Stunde
+    qr_id: int
+    scans: int
+
+
+def _naive(ts: Optional[datetime]) -> Optional[datetime]:
+    if ts is None or ts.tzinfo is None:
+        return ts
+    return ts.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _as_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _as_hour(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value.replace(minute=0, second=0, microsecond=0, tzinfo=None)
+    return datetime.strptime(str(value)[:13], "%Y-%m-%d %H")
+
+
+def exclude_test_scans(query: Any) -> Any:
+    """Filtert Test-Scans (lokale IP, curl/Postman/Insomnia/HTTPie) auf qr_scans."""
+    return (
+        query
+        .filter(or_(QRScan.location.is_(None), ~QRScan.location.in_(TEST_IPS)))
+        .filter(or_(QRScan.user_agent.is_(None), ~QRScan.user_agent.ilike("curl/%")))
+        .filter(or_(QRScan.user_agent.is_(None), ~QRScan.user_agent.ilike("%postmanruntime%")))
+        .filter(or_(QRScan.user_agent.is_(None), ~QRScan.user_agent.ilike("%insomnia%")))
+        .filter(or_(QRScan.user_agent.is_(None), ~QRScan.user_agent.ilike("%httpie/%")))
+    )
+
+
+class RollupScanStats:
+    """Aggregationen aus qr_scan_rollup_hourly/_daily (Kosten ~ Anzahl Buckets)."""
+
+    name = "rollup"
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _query(self, model: Any, qr_ids: Sequence[int], include_test: bool, *entities: Any) -> Any:
+        query = self.db.query(*entities).filter(model.qr_id.in_(qr_ids))
+        if not include_test:
+            query = query.filter(model.is_test == False)  # noqa: E712
+        return query
+
+    def total(self, qr_ids: Sequence[int], include_test: bool, since: Optional[datetime] = None) -> int:
+        if not qr_ids:
+            return 0
+        query = self._query(ScanRollupDaily, qr_ids, include_test, func.sum(ScanRollupDaily.scans))
+        if since is not None:
+            query = query.filter(ScanRollupDaily.bucket >= _naive(since))
+        return int(query.scalar() or 0)
+
+    def by_day(self, qr_ids: Sequence[int], include_test: bool, since: datetime) -> List[DayBucket]:
+        if not qr_ids:
+            return []
+        rows = (
+            self._query(
+                ScanRollupDaily, qr_ids, include_test,
+                ScanRollupDaily.bucket, ScanRollupDaily.device_class, ScanRollupDaily.qr_id,
+                func.sum(ScanRollupDaily.scans),
+            )
+            .filter(ScanRollupDaily.bucket >= _naive(since))
+            .group_by(ScanRollupDaily.bucket, ScanRollupDaily.device_class, ScanRollupDaily.qr_id)
+            .all()
+        )
+        return [DayBucket(_as_date(b), dc, int(qid), int(n or 0)) for b, dc, qid, n in rows]
+
+    def by_hour(self, qr_ids: Sequence[int], include_test: bool, since: datetime,
+                until: Optional[datetime] = None) -> List[HourBucket]:
+        if not qr_ids:
+            return []
+        query = (
+            self._query(
+                ScanRollupHourly, qr_ids, include_test,
+                ScanRollupHourly.bucket, ScanRollupHourly.qr_id, func.sum(ScanRollupHourly.scans),
+            )
+            .filter(ScanRollupHourly.bucket >= _naive(since).replace(minute=0, second=0, microsecond=0))
+        )
+        if until is not None:
+            query = query.filter(ScanRollupHourly.bucket < _naive(until))
+        rows = query.group_by(ScanRollupHourly.bucket, ScanRollupHourly.qr_id).all()
+        return [HourBucket(_as_hour(b), int(qid), int(n or 0)) for b, qid, n in rows]
+
+    def by_qr(self, qr_ids: Sequence[int], include_test: bool) -> Dict[int, int]:
+        if not qr_ids:
+            return {}
+        rows = (
+            self._query(ScanRollupDaily, qr_ids, include_test, ScanRollupDaily.qr_id, func.sum(ScanRollupDaily.scans))
+            .group_by(ScanRollupDaily.qr_id)
+            .all()
+        )
+        return {int(qid): int(n or 0) for qid, n in rows}
+
+
+class RawScanStats:
+    """
+    Dieselben Aggregationen per GROUP BY direkt auf qr_scans (ohne Rollups).
+    Es werden nie Scan-ORM-Objekte geladen; Geräteklassen werden pro
+    (Tag, User-Agent)-Gruppe klassifiziert, nicht pro Scan.
+    """
+
+    name = "raw"
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.dialect = db.get_bind().dialect.name
+
+    def _hour_expr(self) -> Any:
+        if self.dialect == "mysql":
+            return func.date_format(QRScan.timestamp, "%Y-%m-%d %H")
+        return func.strftime("%Y-%m-%d %H", QRScan.timestamp)
+
+    def _query(self, qr_ids: Sequence[int], include_test: bool, *entities: Any) -> Any:
+        query = self.db.query(*entities).filter(QRScan.qr_id.in_(qr_ids))
+        return query if include_test else exclude_test_scans(query)
+
+    def total(self, qr_ids: Sequence[int], include_test: bool, since: Optional[datetime] = None) -> int:
+        if not qr_ids:
+            return 0
+        query = self._query(qr_ids, include_test, func.count(QRScan.id))
+        if since is not None:
+            query = query.filter(QRScan.timestamp >= since)
+        return int(query.scalar() or 0)
+
+    def by_day(self, qr_ids: Sequence[int], include_test: bool, since: datetime) -> List[DayBucket]:
+        if not qr_ids:
+            return []
+        day = func.date(QRScan.timestamp)
+        ua = func.coalesce(QRScan.user_agent, QRScan.device)
+        rows = (
+            self._query(qr_ids, include_test, day, ua, QRScan.qr_id, func.count(QRScan.id))
+            .filter(QRScan.timestamp >= since)
+            .group_by(day, ua, QRScan.qr_id)
+            .all()
+        )
+        merged: Dict[tuple, int] = {}
+        for day_value, user_agent, qr_id, count in rows:
+            device_class = rollup_dimensions(None, user_agent)[0]
+            key = (_as_date(day_value), device_class, int(qr_id))
+            merged[key] = merged.get(key, 0) + int(count or 0)
+        return [DayBucket(d, dc, qid, n) for (d, dc, qid), n in merged.items()]
+
+    def by_hour(self, qr_ids: Sequence[int], include_test: bool, since: datetime,
+                until: Optional[datetime] = None) -> List[HourBucket]:
+        if not qr_ids:
+            return []
+        hour = self._hour_expr()
+        query = self._query(qr_ids, include_test, hour, QRScan.qr_id, func.count(QRScan.id)).filter(
+            QRScan.timestamp >= since
+        )
+        if until is not None:
+            query = query.filter(QRScan.timestamp < until)
+        rows = query.group_by(hour, QRScan.qr_id).all()
+        return [HourBucket(_as_hour(h), int(qid), int(n or 0)) for h, qid, n in rows if h is not None]
+
+    def by_qr(self, qr_ids: Sequence[int], include_test: bool) -> Dict[int, int]:
+        if not qr_ids:
+            return {}
+        rows = self._query(qr_ids, include_test, QRScan.qr_id, func.count(QRScan.id)).group_by(QRScan.qr_id).all()
+        return {int(qid): int(n or 0) for qid, n in rows}
+
+
+def scan_stats(db: Session) -> Any:
+    """
+    Wählt das Backend: SCAN_STATS_BACKEND=rollup|raw; Standard sind die
+    Rollups, sobald ihr Backfill abgeschlossen ist (vorher fehlte die Historie).
+    """
+    backend = os.getenv("SCAN_STATS_BACKEND", "").strip().lower()
+    if backend == "raw" or (backend != "rollup" and not rollups_backfilled(db.connection())):
+        return RawScanStats(db)
+    return RollupScanStats(db)
+
+
+def funnel_counts(db: Session, qr_ids: Sequence[int], since: datetime, until: datetime) -> Dict[str, int]:
+    """Visits, sonstige Conversions, Leads, Feedback und Coupons in einer Abfrage."""
+    keys = ("visits", "conversions", "leads", "feedback", "coupons")
+    if not qr_ids:
+        return dict.fromkeys(keys, 0)
+
+    def _count(model: Any, ts_column: Any, *criteria: Any) -> Any:
+        return (
+            select(func.count(model.id))
+            .where(model.qr_id.in_(qr_ids), ts_column >= since, ts_column < until, *criteria)
+            .scalar_subquery()
+        )
+
+    stmt = select(
+        _count(QRConversion, QRConversion.created_at, QRConversion.event_type == "visit").label("visits"),
+        _count(QRConversion, QRConversion.created_at, QRConversion.event_type != "visit").label("conversions"),
+        _count(LeadCapture, LeadCapture.created_at).label("leads"),
+        _count(FeedbackEntry, FeedbackEntry.created_at).label("feedback"),
+        _count(CouponRedemption, CouponRedemption.redeemed_at).label("coupons"),
+    )
+    row = db.execute(stmt).one()
+    return {key: int(getattr(row, key) or 0) for key in keys}
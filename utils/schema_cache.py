@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import weakref
+from typing import Any, Dict
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Engine
+
+# Engine -> {Tabellenname: vorhanden?}; Tests legen oft nur Teilschemata an
+_known: "weakref.WeakKeyDictionary[Engine, Dict[str, bool]]" = weakref.WeakKeyDictionary()
+
+
+def mark_table_ready(engine: Engine, table_name: str) -> None:
+    _known.setdefault(engine, {})[table_name] = True
+
+
+def table_exists(bind: Any, table_name: str) -> bool:
+    """
+    Prüft einmal pro Engine, ob eine (optionale) Tabelle existiert.
+    Innerhalb einer Transaktion die Connection übergeben, nicht die Engine:
+    bei StaticPool würde ein eigener Checkout/Checkin die Transaktion zurückrollen.
+    """
+    engine = getattr(bind, "engine", bind)
+    tables = _known.setdefault(engine, {})
+    ready = tables.get(table_name)
+    if ready is None:
+        try:
+            ready = inspect(bind).has_table(table_name)
+        except Exception:
+            ready = False
+        tables[table_name] = ready
+    return ready
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+
+# Alle relevanten Merkmale in einem Durchlauf über den (kleingeschriebenen) UA-String
+_TOKEN_RE = re.compile(
+    r"iphone|ipad|ipod|\bios\b|android|windows|macintosh|mac os|linux"
+    r"|bot|spider|crawler|curl/|postmanruntime|insomnia|httpie/"
+)
+_BOT_TOKENS = frozenset({"bot", "spider", "crawler"})
+_TOOL_TOKENS = frozenset({"postmanruntime", "insomnia", "httpie/"})
+_MAX_UA_LENGTH = 512
+
+
+@dataclass(frozen=True)
+class UAInfo:
+    """Klassifizierter User-Agent."""
+
+    device_class: str  # ios | android | desktop | other
+    os: str            # ios | android | windows | macos | linux | unknown
+    is_bot: bool
+    is_test_tool: bool  # curl, Postman, Insomnia, HTTPie
+
+    @property
+    def label(self) -> str:
+        """Geräte-Label für Dashboard-Statistiken."""
+        if self.device_class == "ios":
+            return "iPhone/iPad"
+        if self.device_class == "android":
+            return "Android"
+        if self.device_class == "desktop":
+            return "Desktop"
+        if self.is_bot or self.is_test_tool:
+            return "Bot/Tool"
+        return "Andere"
+
+    @property
+    def device_name(self) -> str:
+        """Gerätename für Login-Geräte."""
+        return {
+            "ios": "iPhone/iPad",
+            "android": "Android",
+            "windows": "Windows",
+            "macos": "Mac",
+            "linux": "Linux",
+        }.get(self.os, "Unbekannt")
+
+
+_UNKNOWN = UAInfo(device_class="other", os="unknown", is_bot=False, is_test_tool=False)
+
+
+def _env_int(name: str, fallback: int) -> int:
+    try:
+        return int(os.getenv(name, "") or fallback)
+    except ValueError:
+        return fallback
+
+
+@lru_cache(maxsize=_env_int("UA_CACHE_SIZE", 4096))
+def _classify(ua: str) -> UAInfo:
+    lowered = ua.lower()
+    tokens = set(_TOKEN_RE.findall(lowered))
+
+    if tokens & {"iphone", "ipad", "ipod", "ios"}:
+        os_name = "ios"
+    elif "android" in tokens:
+        os_name = "android"
+    elif "windows" in tokens:
+        os_name = "windows"
+    elif "macintosh" in tokens or "mac os" in tokens:
+        os_name = "macos"
+    elif "linux" in tokens:
+        os_name = "linux"
+    else:
+        os_name = "unknown"
+
+    if os_name in {"ios", "android"}:
+        device_class = os_name
+    elif os_name == "unknown":
+        device_class = "other"
+    else:
+        device_class = "desktop"
+
+    return UAInfo(
+        device_class=device_class,
+        os=os_name,
+        is_bot=bool(tokens & _BOT_TOKENS),
+        is_test_tool=lowered.startswith("curl/") or bool(tokens & _TOOL_TOKENS),
+    )
+
+
+def classify_user_agent(user_agent: str | None) -> UAInfo:
+    """
+    Klassifiziert einen User-Agent (Geräteklasse, OS, Bot, Test-Tool).
+    Ergebnisse werden pro UA-String in einem begrenzten LRU-Cache gehalten.
+    """
+    if not user_agent:
+        return _UNKNOWN
+    return _classify(user_agent[:_MAX_UA_LENGTH])
+
+
+def classifier_stats() -> dict:
+    info = _classify.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        "entries": info.currsize,
+        "max_entries": info.maxsize,
+        "hits": info.hits,
+        "misses": info.misses,
+        "hit_ratio": round(info.hits / lookups, 4) if lookups else 0.0,
+    }